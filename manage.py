@@ -7,6 +7,9 @@ import sys
 def main():
     """Run administrative tasks."""
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'moneymind.settings')
+    if len(sys.argv) > 1 and sys.argv[1] == 'test':
+        # Los tests nunca usan la base de datos ni las cachés reales (ver TESTING en settings)
+        os.environ.setdefault('DJANGO_TESTING', '1')
     try:
         from django.core.management import execute_from_command_line
     except ImportError as exc:
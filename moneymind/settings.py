@@ -10,6 +10,8 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
+import tempfile
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -51,9 +53,11 @@ INSTALLED_APPS = [
     'moneymind_apps.alerts',
     'moneymind_apps.movements',
     'moneymind_apps.balances',
+    'moneymind_apps.monitoring',
 ]
 
 MIDDLEWARE = [
+    "moneymind_apps.monitoring.middleware.RequestTimingMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.common.CommonMiddleware",
     'django.middleware.security.SecurityMiddleware',
@@ -82,8 +86,12 @@ CORS_ALLOW_HEADERS = [
     "user-agent",
     "x-csrftoken",
     "x-requested-with",
+    "if-none-match",
 ]
 
+# El cliente necesita leer el ETag para enviarlo luego en If-None-Match
+CORS_EXPOSE_HEADERS = ["etag", "server-timing"]
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.SessionAuthentication",
@@ -96,6 +104,85 @@ REST_FRAMEWORK = {
 
 ROOT_URLCONF = 'moneymind.urls'
 
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Respuestas de los reportes por usuario y versión de datos
+    "reports": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "moneymind-reports",
+        "TIMEOUT": 60 * 60,  # 1 hora
+        "OPTIONS": {
+            "MAX_ENTRIES": 2000,
+        },
+    },
+    # Resultados del análisis de recibos por hash de la imagen (compartido entre workers)
+    "receipts": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": Path(tempfile.gettempdir()) / "moneymind" / "receipts",
+        "TIMEOUT": 60 * 60 * 24,  # 24 horas
+        "OPTIONS": {
+            "MAX_ENTRIES": 5000,
+            "CULL_FREQUENCY": 4,  # al llenarse elimina 1/4 de las entradas
+        },
+    },
+}
+
+# Las fotos de recibos (3-8 MB en celulares) se mantienen en memoria en lugar
+# de escribirse a un archivo temporal durante la subida
+FILE_UPLOAD_MAX_MEMORY_SIZE = 10 * 1024 * 1024
+
+# Preprocesamiento de fotos de recibos antes de enviarlas a Gemini
+RECEIPT_IMAGE_MAX_EDGE = 1600  # px del lado mayor
+RECEIPT_IMAGE_JPEG_QUALITY = 80
+RECEIPT_IMAGE_GRAYSCALE = True
+
+# Con un QR de SUNAT válido la fecha y el total se leen localmente y solo categoría
+# y lugar se piden a Gemini con una consulta reducida. Desactivarlo evita esa
+# llamada: la respuesta trae category en null y missing_fields = ["category"]
+RECEIPT_QR_CLASSIFY_WITH_MODEL = True
+
+# Fracción de requests medidos por RequestTimingMiddleware (header Server-Timing
+# y log JSON en "moneymind.requests"); 0 lo desactiva
+REQUEST_TIMING_SAMPLE_RATE = 1.0 if DEBUG else 0.05
+REQUEST_TIMING_HEADER = True
+
+# /metrics (Prometheus). Con varios workers de gunicorn definir METRICS_MULTIPROC_DIR
+# (directorio vacío al iniciar): cada worker vuelca ahí sus métricas cada
+# METRICS_FLUSH_INTERVAL segundos y /metrics suma las de todos. Los archivos de
+# workers terminados (pid que ya no corre, o sin actualizar en METRICS_SNAPSHOT_TTL
+# segundos) se eliminan al leer /metrics; sus contadores dejan de sumarse
+METRICS_MULTIPROC_DIR = os.environ.get("METRICS_MULTIPROC_DIR")
+METRICS_FLUSH_INTERVAL = 5
+METRICS_SNAPSHOT_TTL = 60 * 60
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Modo opcional: EXPLAIN (ANALYZE, BUFFERS) de una muestra de las consultas SELECT
+# más lentas que el umbral, guardado en SlowQueryPlan (/api/monitoring/slow-queries/)
+SLOW_QUERY_EXPLAIN = os.environ.get("SLOW_QUERY_EXPLAIN", "") == "1"
+SLOW_QUERY_THRESHOLD_MS = 200
+SLOW_QUERY_SAMPLE_RATE = 0.1
+SLOW_QUERY_MAX_PER_REQUEST = 3
+
+# Filas por lote al leer movimientos con .iterator() en los exportes
+EXPORT_CHUNK_SIZE = 2000
+
+# Exportes con ?async=true: archivos en MEDIA_ROOT/EXPORT_ARTIFACTS_DIR generados por
+# `python manage.py process_export_jobs`, que además poda los de más de
+# EXPORT_ARTIFACTS_MAX_AGE_HOURS y los menos usados si se pasa de EXPORT_ARTIFACTS_MAX_BYTES
+EXPORT_ARTIFACTS_DIR = "exports"
+EXPORT_ARTIFACTS_MAX_AGE_HOURS = 24 * 7
+EXPORT_ARTIFACTS_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+# Procesos por worker de gunicorn para maquetar PDFs (reportlab retiene el GIL);
+# 0 renderiza en el hilo del request
+PDF_RENDER_PROCESSES = int(os.environ.get("PDF_RENDER_PROCESSES", "2"))
+PDF_RENDER_TIMEOUT = 120  # segundos
+
 MEDIA_URL = "/media/"
 MEDIA_ROOT = BASE_DIR / "media"
 
@@ -142,6 +229,46 @@ DATABASES = {
     }
 }
 
+# Con DJANGO_TESTING=1 se usa SQLite y cachés en memoria, sin servicios externos.
+# `manage.py test` lo define solo; con otro runner (pytest, IDE) hay que exportarlo
+TESTING = os.environ.get("DJANGO_TESTING", "") == "1"
+
+if TESTING:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        }
+    }
+    CACHES = {
+        alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": f"test-{alias}"}
+        for alias in CACHES
+    }
+    PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+    # Sin pool de procesos salvo en los tests que lo activan
+    PDF_RENDER_PROCESSES = 0
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "simple": {"format": "{asctime} {levelname} {name}: {message}", "style": "{"},
+        # Las líneas de "moneymind.requests" ya son JSON
+        "message": {"format": "{message}", "style": "{"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+        "requests": {"class": "logging.StreamHandler", "formatter": "message"},
+    },
+    "loggers": {
+        "moneymind_apps": {"handlers": ["console"], "level": "WARNING" if TESTING else "INFO"},
+        "moneymind.requests": {
+            "handlers": ["requests"],
+            "level": "WARNING" if TESTING else "INFO",
+            "propagate": False,
+        },
+    },
+}
 
 
 # Password validation
@@ -0,0 +1,119 @@
+import io
+from contextlib import contextmanager, ExitStack
+from datetime import date
+from unittest import mock
+import cv2
+from PIL import Image
+from django.core.cache import caches
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from moneymind_apps.movements.utils.rollups import rebuild_rollup_for_users
+from moneymind_apps.users.models import User
+from moneymind_apps.users.utils.seed_data import seed_user_history
+
+GEMINI_RECEIPT_RESPONSE = (
+    '{"valid": true, "validation_error": null, "category": "alimentacion", "place": "Tambo", '
+    '"title": "Sueldo", "date": "2025-05-01", "time": "10:00", "total": 25.5, "comment": null}'
+)
+
+
+def receipt_image(size=(2400, 3200), color="white"):
+    """Foto de recibo sintética (JPEG del tamaño de una cámara de celular)"""
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, "JPEG")
+    return SimpleUploadedFile("recibo.jpg", buffer.getvalue(), content_type="image/jpeg")
+
+
+def sunat_qr_image(payload="20100070970|03|B001|00012345|3.89|25.50|2025-05-01|1|12345678|"):
+    """Foto de boleta electrónica con el QR de SUNAT (generado con OpenCV)"""
+    qr = cv2.QRCodeEncoder.create().encode(payload)
+    qr = cv2.resize(qr, None, fx=12, fy=12, interpolation=cv2.INTER_NEAREST)
+    qr = cv2.copyMakeBorder(qr, 80, 80, 80, 80, cv2.BORDER_CONSTANT, value=255)
+    _, buffer = cv2.imencode(".jpg", qr)
+    return SimpleUploadedFile("boleta.jpg", buffer.tobytes(), content_type="image/jpeg")
+
+
+@contextmanager
+def stub_external_services():
+    """
+    Reemplaza Gemini y OneSignal por mocks sin red. Retorna (gemini, onesignal):
+    `gemini` es el mock de `GenerativeModel`, `onesignal` el de `requests.post`.
+    """
+    with ExitStack() as stack:
+        gemini = stack.enter_context(mock.patch("google.generativeai.GenerativeModel"))
+        gemini.return_value.generate_content.return_value.text = GEMINI_RECEIPT_RESPONSE
+
+        onesignal = stack.enter_context(
+            mock.patch("moneymind_apps.alerts.utils.onesignal_notifications.requests.post")
+        )
+        onesignal.return_value.status_code = 200
+        onesignal.return_value.json.return_value = {"id": "test-notification"}
+
+        yield gemini, onesignal
+
+
+class SeededAPITestCase(TestCase):
+    """
+    Base de los tests de endpoints: un usuario con historial realista (miles de
+    movimientos en las 16 categorías, recordatorios, alertas, cierres de mes),
+    Gemini y OneSignal simulados, y `assertMaxQueries` para fijar un máximo de
+    consultas SQL por endpoint.
+
+    Los máximos no dependen del volumen de datos: si un endpoint vuelve a hacer
+    una consulta por mes, categoría o movimiento el test falla.
+    """
+    seed_months = 24
+    expenses_per_month = 120
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.today = date.today()
+        cls.user = User.objects.create_user(
+            username="seed@moneymind.pe",
+            email="seed@moneymind.pe",
+            password="moneymind123",
+            first_name="Ana",
+            last_name="Quispe",
+        )
+        cls.seed_counts = seed_user_history(
+            cls.user,
+            months=cls.seed_months,
+            expenses_per_month=cls.expenses_per_month,
+            today=cls.today,
+        )
+        rebuild_rollup_for_users([cls.user.id])
+
+    def setUp(self):
+        for alias in ("default", "reports", "receipts"):
+            caches[alias].clear()
+
+        self.gemini, self.onesignal = self.enterContext(stub_external_services())
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        """Falla si el bloque ejecuta más de `limit` consultas SQL"""
+        with CaptureQueriesContext(connection) as context:
+            yield context
+
+        executed = len(context.captured_queries)
+        if executed > limit:
+            queries = "\n".join(
+                f"{index}. {query['sql']}" for index, query in enumerate(context.captured_queries, start=1)
+            )
+            self.fail(f"{executed} consultas ejecutadas, máximo permitido {limit}:\n{queries}")
+
+    def get_json(self, url, max_queries, expected_status=200, **extra):
+        """GET con máximo de consultas; retorna el JSON de la respuesta"""
+        with self.assertMaxQueries(max_queries):
+            response = self.client.get(url, **extra)
+        self.assertEqual(response.status_code, expected_status, response.content[:500])
+        return response.json() if response.content else None
+
+    def send_json(self, method, url, data, max_queries, expected_status=200):
+        """POST/PATCH/DELETE con cuerpo JSON y máximo de consultas"""
+        with self.assertMaxQueries(max_queries):
+            response = getattr(self.client, method)(url, data, content_type="application/json")
+        self.assertEqual(response.status_code, expected_status, response.content[:500])
+        return response.json()
@@ -25,4 +25,6 @@ urlpatterns = [
     path('api/reports/', include('moneymind_apps.reports.urls')),
     path('api/alerts/', include('moneymind_apps.alerts.urls')),
     path('api/balances/', include('moneymind_apps.balances.urls')),
+
+    path('', include('moneymind_apps.monitoring.urls')),
 ]
@@ -1,3 +1,96 @@
-from django.test import TestCase
+from datetime import date
+from moneymind.testing import SeededAPITestCase
+from moneymind_apps.alerts.models import Alert, AlertType, RecurringPaymentReminder
 
-# Create your tests here.
+
+class AlertEndpointsTests(SeededAPITestCase):
+
+    def test_user_alerts(self):
+        data = self.get_json(f"/api/alerts/user-alerts/?user_id={self.user.id}", max_queries=2)
+        self.assertEqual(len(data["data"]), self.seed_counts["alerts"])
+        self.assertEqual(data["unread_count"], Alert.objects.filter(user=self.user, seen=False).count())
+
+    def test_user_alerts_mark_seen(self):
+        ids = list(Alert.objects.filter(user=self.user, seen=False).values_list("id", flat=True))
+        self.send_json("patch", "/api/alerts/user-alerts/", {"alert_ids": ids}, max_queries=1)
+        self.assertFalse(Alert.objects.filter(user=self.user, seen=False).exists())
+
+    def test_user_alerts_pagination(self):
+        url = f"/api/alerts/user-alerts-pagination/?user_id={self.user.id}&page=2&page_size=5"
+        data = self.get_json(url, max_queries=5)
+        self.assertEqual(data["pagination"]["loaded_count"], 5)
+        self.assertEqual(data["pagination"]["total_alerts"], self.seed_counts["alerts"])
+
+    def test_user_alerts_pagination_etag(self):
+        url = f"/api/alerts/user-alerts-pagination/?user_id={self.user.id}"
+        with self.assertMaxQueries(5):
+            response = self.client.get(url)
+        etag = response["ETag"]
+
+        # Sin cambios: 304 solo con las consultas del ETag
+        with self.assertMaxQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Marcar como vistas cambia el estado de las alertas
+        self.send_json("patch", "/api/alerts/user-alerts-pagination/", {
+            "mark_all": True,
+            "user_id": self.user.id,
+        }, max_queries=1)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["unread_count"], 0)
+
+    def test_mark_alert_as_seen(self):
+        alert = Alert.objects.filter(user=self.user, seen=False).first()
+        self.send_json("patch", f"/api/alerts/mark-seen/{self.user.id}/{alert.id}/", {}, max_queries=2)
+        alert.refresh_from_db()
+        self.assertTrue(alert.seen)
+
+    def test_mark_all_risk_alerts_as_seen(self):
+        data = self.send_json("patch", f"/api/alerts/mark-all-risk-seen/{self.user.id}/", {}, max_queries=1)
+        self.assertEqual(data["updated_count"], 1)
+        self.assertFalse(
+            Alert.objects.filter(user=self.user, alert_type=AlertType.RISK.value, seen=False).exists()
+        )
+
+
+class RecurringPaymentEndpointsTests(SeededAPITestCase):
+    seed_months = 6
+
+    def setUp(self):
+        super().setUp()
+        self.reminder = RecurringPaymentReminder.objects.filter(user=self.user).first()
+
+    def test_create_schedules_notifications(self):
+        data = self.send_json("post", "/api/alerts/recurring-payments/create/", {
+            "user_id": self.user.id,
+            "name": "Spotify",
+            "category": "streaming_suscripciones",
+            "amount": "19.90",
+            "payment_day": 15,
+            "start_date": date.today().isoformat(),
+        }, max_queries=4, expected_status=201)
+
+        self.assertEqual(data["data"]["name"], "Spotify")
+        self.assertLessEqual(self.onesignal.call_count, 3)
+
+    def test_list_by_user(self):
+        data = self.get_json(f"/api/alerts/recurring-payments/all/?user_id={self.user.id}", max_queries=1)
+        self.assertEqual(len(data), self.seed_counts["reminders"])
+
+    def test_list_due_reminders(self):
+        self.get_json(f"/api/alerts/recurring-payments/list/?user_id={self.user.id}", max_queries=1)
+        self.get_json("/api/alerts/recurring-payments/list/", max_queries=0, expected_status=400)
+
+    def test_mark_paid_update_and_delete(self):
+        base = f"/api/alerts/recurring-payments/{self.reminder.id}"
+
+        self.send_json("post", f"{base}/mark-paid/", {}, max_queries=3)
+        self.send_json("post", f"{base}/mark-paid/", {}, max_queries=1, expected_status=400)
+
+        data = self.send_json("patch", f"{base}/update/", {"amount": "55.00"}, max_queries=3)
+        self.assertEqual(data["data"]["amount"], "55.00")
+
+        self.send_json("delete", f"{base}/delete/", {}, max_queries=3)
+        self.assertFalse(RecurringPaymentReminder.objects.filter(id=self.reminder.id).exists())
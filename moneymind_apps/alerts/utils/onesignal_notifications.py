@@ -2,6 +2,8 @@ import requests
 from datetime import timedelta, datetime
 import logging
 from dateutil.relativedelta import relativedelta
+from moneymind_apps.monitoring.utils.metrics import inc_counter
+from moneymind_apps.monitoring.utils.request_timing import track_external_call
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +45,7 @@ def schedule_recurring_payment_notifications(user, reminder):
 
         # ⭐ VERIFICAR que la fecha sea futura
         if notification_date <= current_date:
+            inc_counter("moneymind_onesignal_notifications_total", "skipped_past_date")
             logger.warning(
                 f"⏭️ Saltando notificación para {notification_date.strftime('%d/%m/%Y')} "
                 f"({days_before} días antes) - fecha en el pasado"
@@ -79,15 +82,18 @@ def schedule_recurring_payment_notifications(user, reminder):
         }
 
         try:
-            response = requests.post(base_url, headers=headers, json=payload, timeout=10)
+            with track_external_call("onesignal", "schedule_notification"):
+                response = requests.post(base_url, headers=headers, json=payload, timeout=10)
             response_data = response.json()
 
             if response.status_code == 200:
                 if "errors" in response_data and response_data["errors"]:
+                    inc_counter("moneymind_onesignal_notifications_total", "rejected")
                     logger.error(
                         f"❌ Error OneSignal para user {user.id}: {response_data['errors']}"
                     )
                 else:
+                    inc_counter("moneymind_onesignal_notifications_total", "scheduled")
                     notification_id = response_data.get('id', 'N/A')
                     logger.info(
                         f"✅ Notificación #{notifications_scheduled + 1} programada: "
@@ -96,13 +102,16 @@ def schedule_recurring_payment_notifications(user, reminder):
                     )
                     notifications_scheduled += 1
             else:
+                inc_counter("moneymind_onesignal_notifications_total", "http_error")
                 logger.error(
                     f"❌ Error OneSignal ({response.status_code}): {response_data}"
                 )
 
         except requests.exceptions.RequestException as e:
+            inc_counter("moneymind_onesignal_notifications_total", "network_error")
             logger.error(f"❌ Error de red con OneSignal: {str(e)}")
         except Exception as e:
+            inc_counter("moneymind_onesignal_notifications_total", "unexpected_error")
             logger.error(f"❌ Error inesperado en OneSignal: {str(e)}")
 
     if notifications_scheduled > 0:
@@ -10,7 +10,11 @@ from datetime import date
 from datetime import timedelta
 from dateutil.relativedelta import relativedelta
 import calendar
+import logging
 from moneymind_apps.alerts.utils.onesignal_notifications import *
+from moneymind_apps.users.utils.etags import etag_on_user_state
+
+logger = logging.getLogger(__name__)
 
 class UserAlertsView(APIView):
     permission_classes = [AllowAny]
@@ -82,6 +86,7 @@ class UserAlertsPaginationView(APIView):
     Obtiene las alertas/notificaciones del usuario con paginación
     """
 
+    @etag_on_user_state()
     def get(self, request):
         user_id = request.query_params.get('user_id')
         seen = request.query_params.get('seen')  # Opcional: 'true', 'false'
@@ -195,7 +200,7 @@ class MarkAlertAsSeenView(APIView):
             if not alert.seen:
                 alert.seen = True
                 alert.save(update_fields=['seen'])
-                print("🟢 Alerta marcada como vista.")
+                logger.debug("Alerta %s marcada como vista", alert_id)
 
             return Response(
                 {
@@ -413,10 +418,7 @@ def get_recurring_payment_reminders(user_id: int, day=None, month=None, year=Non
     year = int(year) if year else today.year
     current_date = date(year, month, day)
 
-    # 👇 Depuración
-    print("📅 Fecha actual del sistema:", today)
-    print("🧩 Parámetros recibidos → day:", day, "| month:", month, "| year:", year)
-    print("🧾 Fecha generada → current_date:", current_date)
+    logger.debug("Recordatorios de usuario %s para %s (hoy: %s)", user_id, current_date, today)
 
     # Obtener recordatorios activos
     reminders = RecurringPaymentReminder.objects.filter(
@@ -0,0 +1,151 @@
+import random
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.db.models import Sum
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from moneymind_apps.balances.models import Balance
+from moneymind_apps.movements.models import Expense, Income, MonthlyCategoryTotal, Category
+from moneymind_apps.movements.utils.rollups import rebuild_rollup_for_users
+from moneymind_apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark de concurrencia: lanza escrituras paralelas (gastos, ingresos y "
+        "eliminaciones) contra un mismo usuario y verifica que el balance final sea "
+        "exactamente el esperado. Se ejecuta sobre una base de datos de prueba "
+        "temporal; usar con Postgres para resultados representativos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8, help="Hilos concurrentes (default: 8).")
+        parser.add_argument("--ops", type=int, default=50, help="Operaciones por hilo (default: 50).")
+        parser.add_argument("--seed", type=int, default=42, help="Semilla aleatoria (default: 42).")
+        parser.add_argument("--keepdb", action="store_true", help="Reutiliza la base de datos de prueba.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+        if connection.vendor != "postgresql":
+            self.stderr.write(self.style.WARNING(
+                f"La base de datos es {connection.vendor}, no PostgreSQL: con varios hilos las "
+                "escrituras se bloquean entre sí y muchas peticiones fallarán. Los resultados "
+                "no representan producción."
+            ))
+        try:
+            ok = self._run(options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        if not ok:
+            raise CommandError("El balance final no coincide con los movimientos registrados")
+
+    def _run(self, options):
+        initial_amount = Decimal("1000.00")
+        user = User.objects.create_user(
+            username=f"bench-{uuid.uuid4().hex[:8]}@moneymind.local",
+            email=f"bench-{uuid.uuid4().hex[:8]}@moneymind.local",
+            password=uuid.uuid4().hex,
+            first_name="Bench",
+            last_name="Concurrency"
+        )
+        Balance.objects.create(user=user, current_amount=initial_amount)
+
+        categories = [cat.value for cat in Category]
+        lock = threading.Lock()
+        created = {"expense": [], "income": []}
+        latencies = []
+        outcomes = {"ok": 0, "failed": 0}
+
+        def worker(worker_index):
+            rnd = random.Random(options["seed"] + worker_index)
+            # Un error del servidor (p. ej. "database table is locked") se cuenta como
+            # petición fallida en lugar de detener el benchmark
+            client = Client(raise_request_exception=False)
+            try:
+                for op_index in range(options["ops"]):
+                    action = rnd.choice(["expense", "expense", "income", "delete"])
+                    amount = f"{rnd.randint(100, 50000) / 100:.2f}"
+                    day = date(2025, 1, 1) + timedelta(days=rnd.randrange(365))
+                    moment = f"{rnd.randrange(24):02d}:{rnd.randrange(60):02d}:{op_index % 60:02d}"
+                    tag = f"bench-{worker_index}-{op_index}"
+
+                    start = time.perf_counter()
+                    if action == "expense":
+                        response = client.post("/api/movements/expense/create/", {
+                            "user_id": user.id, "category": rnd.choice(categories), "place": tag,
+                            "date": day.isoformat(), "time": moment, "total": amount
+                        }, content_type="application/json")
+                        if response.status_code == 201:
+                            with lock:
+                                created["expense"].append(response.json()["expense"]["id"])
+                    elif action == "income":
+                        response = client.post("/api/movements/income/create/", {
+                            "user_id": user.id, "title": tag,
+                            "date": day.isoformat(), "time": moment, "total": amount
+                        }, content_type="application/json")
+                        if response.status_code == 201:
+                            with lock:
+                                created["income"].append(response.json()["income"]["id"])
+                    else:
+                        # Eliminar un movimiento existente; varios hilos pueden elegir el mismo
+                        with lock:
+                            movement_type = rnd.choice(["expense", "income"])
+                            candidates = created[movement_type]
+                            movement_id = rnd.choice(candidates) if candidates else None
+                        if movement_id is None:
+                            continue
+                        response = client.delete(f"/api/movements/{movement_type}/delete/{movement_id}/")
+
+                    elapsed = time.perf_counter() - start
+                    with lock:
+                        latencies.append(elapsed)
+                        # 404 es válido: otro hilo ya eliminó ese movimiento
+                        if response.status_code in (200, 201, 404):
+                            outcomes["ok"] += 1
+                        else:
+                            outcomes["failed"] += 1
+            finally:
+                connections.close_all()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options["workers"]) as executor:
+            list(executor.map(worker, range(options["workers"])))
+        wall_time = time.perf_counter() - started
+
+        balance = Balance.objects.get(user=user)
+        total_incomes = Income.objects.filter(user=user).aggregate(total=Sum("total"))["total"] or Decimal("0")
+        total_expenses = Expense.objects.filter(user=user).aggregate(total=Sum("total"))["total"] or Decimal("0")
+        expected = initial_amount + total_incomes - total_expenses
+
+        rollup_drift = rebuild_rollup_for_users([user.id], dry_run=True)
+        rollup_ok = not any(rollup_drift.values())
+
+        requests_done = len(latencies)
+        self.stdout.write(f"Base de datos: {connection.vendor}")
+        self.stdout.write(f"Peticiones: {requests_done} ({outcomes['failed']} fallidas) en {wall_time:.2f}s "
+                          f"→ {requests_done / wall_time:.1f} req/s")
+        if latencies:
+            ordered = sorted(latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            self.stdout.write(f"Latencia p50={statistics.median(ordered) * 1000:.1f}ms p95={p95 * 1000:.1f}ms")
+        self.stdout.write(f"Balance final: {balance.current_amount} | esperado: {expected}")
+        self.stdout.write(f"Acumulado mensual consistente: {'sí' if rollup_ok else rollup_drift}")
+        self.stdout.write(f"Filas de acumulado: {MonthlyCategoryTotal.objects.filter(user=user).count()}")
+
+        ok = balance.current_amount == expected and rollup_ok
+        if ok:
+            self.stdout.write(self.style.SUCCESS("OK: no se perdieron actualizaciones"))
+        return ok
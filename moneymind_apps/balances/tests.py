@@ -1,3 +1,22 @@
-from django.test import TestCase
+from moneymind.testing import SeededAPITestCase
+from moneymind_apps.balances.models import Balance
 
-# Create your tests here.
+
+class BalanceEndpointsTests(SeededAPITestCase):
+    seed_months = 6
+
+    def test_user_balance(self):
+        data = self.get_json(f"/api/balances/user-balance/?user_id={self.user.id}", max_queries=2)
+        balance = Balance.objects.get(user=self.user)
+        self.assertEqual(str(data["current_balance"]), str(balance.current_amount))
+
+    def test_user_balance_requires_user_id(self):
+        self.get_json("/api/balances/user-balance/", max_queries=0, expected_status=400)
+
+    def test_update_monthly_income(self):
+        self.send_json("patch", "/api/balances/update-monthly-income/", {
+            "user_id": self.user.id,
+            "new_monthly_income": "5100.50",
+        }, max_queries=5)
+
+        self.assertEqual(str(Balance.objects.get(user=self.user).monthly_income), "5100.50")
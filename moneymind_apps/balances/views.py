@@ -8,7 +8,11 @@ from rest_framework import status
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
+from django.db.models import F
 from moneymind_apps.users.models import *
+import logging
+
+logger = logging.getLogger(__name__)
 
 def update_monthly_income(user_id, new_income):
     try:
@@ -19,6 +23,20 @@ def update_monthly_income(user_id, new_income):
     except Exception as e:
         raise ValueError(f"Error al actualizar monthly_income: {str(e)}")
 
+def apply_balance_delta(user_id, delta):
+    """
+    Suma `delta` (negativo para restar) al balance actual del usuario con un
+    UPDATE atómico en la base de datos (F('current_amount') + delta), sin
+    reescribir el resto de columnas. Debe llamarse dentro de la misma
+    transacción que crea o elimina el movimiento.
+    Lanza Balance.DoesNotExist si el usuario no tiene balance.
+    """
+    balance = Balance.objects.get(user_id=user_id)
+    balance.current_amount = F('current_amount') + delta
+    balance.save(update_fields=['current_amount'])
+    balance.refresh_from_db(fields=['current_amount'])
+    return balance
+
 def check_and_register_monthly_balance(user_id):
     """
     Verifica si el balance del mes anterior está registrado.
@@ -48,10 +66,13 @@ def check_and_register_monthly_balance(user_id):
                 amount=balance.current_amount
             )
 
-            print(f"✓ Balance histórico registrado para {last_day_previous_month}: S/ {balance.current_amount}")
+            logger.info(
+                "Balance histórico de usuario %s registrado para %s: S/ %s",
+                user_id, last_day_previous_month, balance.current_amount
+            )
 
         except Balance.DoesNotExist:
-            print(f"✗ Usuario {user_id} no tiene balance configurado")
+            logger.debug("Usuario %s no tiene balance configurado", user_id)
 
 class UpdateMonthlyIncomeView(APIView):
     permission_classes = [AllowAny]
@@ -0,0 +1,108 @@
+import json
+import logging
+import random
+import time
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+from moneymind_apps.monitoring.utils.metrics import inc_counter, observe
+from moneymind_apps.monitoring.utils.slow_queries import SlowQueryCollector
+from moneymind_apps.monitoring.utils.request_timing import (
+    RequestTimings,
+    current_timings,
+    measure_request,
+    server_timing_header,
+)
+
+logger = logging.getLogger("moneymind.requests")
+
+
+def _view_name(request):
+    resolver_match = getattr(request, "resolver_match", None)
+    return resolver_match.view_name if resolver_match else "unmatched"
+
+
+class RequestTimingMiddleware:
+    """
+    Todos los requests suman a las métricas de cantidad y latencia por nombre de URL.
+
+    Además mide un porcentaje de los requests (REQUEST_TIMING_SAMPLE_RATE):
+    cantidad y tiempo de consultas SQL, tiempo en Gemini/OneSignal y render de
+    la respuesta. Esos resultados van en el header Server-Timing, en una línea
+    de log JSON y en los histogramas de consultas por request.
+
+    Con SLOW_QUERY_EXPLAIN activo guarda además el plan de una muestra de las
+    consultas lentas (ver SlowQueryCollector).
+
+    Los requests no muestreados solo pagan un random() y dos contadores en
+    memoria, así que se puede dejar activo en producción.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        sample_rate = getattr(settings, "REQUEST_TIMING_SAMPLE_RATE", 0.0)
+        sampled = sample_rate > 0 and random.random() < sample_rate
+        explain_slow_queries = SlowQueryCollector.enabled()
+
+        if not sampled and not explain_slow_queries:
+            response = self.get_response(request)
+            self._record_metrics(request, response, started)
+            return response
+
+        timings = RequestTimings() if sampled else None
+        collectors = []
+        with ExitStack() as stack:
+            if timings is not None:
+                stack.enter_context(measure_request(timings))
+            for connection in connections.all():
+                if timings is not None:
+                    stack.enter_context(connection.execute_wrapper(timings))
+                if explain_slow_queries:
+                    collector = SlowQueryCollector(connection.alias)
+                    collectors.append(collector)
+                    stack.enter_context(connection.execute_wrapper(collector))
+            response = self.get_response(request)
+
+        view = self._record_metrics(request, response, started)
+
+        for collector in collectors:
+            if collector.captured:
+                collector.store(view)
+
+        if timings is None:
+            return response
+
+        observe("moneymind_db_queries_per_request", timings.db_queries, view)
+        observe("moneymind_db_time_per_request_seconds", timings.db_seconds, view)
+
+        summary = timings.summary()
+        if getattr(settings, "REQUEST_TIMING_HEADER", True):
+            response["Server-Timing"] = server_timing_header(summary)
+
+        logger.info(json.dumps({
+            "event": "request",
+            "method": request.method,
+            "path": request.path,
+            "view": view,
+            "status": response.status_code,
+            **summary,
+        }))
+
+        return response
+
+    def _record_metrics(self, request, response, started):
+        view = _view_name(request)
+        observe("moneymind_http_request_duration_seconds", time.perf_counter() - started, view, request.method)
+        inc_counter("moneymind_http_requests_total", view, request.method, response.status_code)
+        return view
+
+    def process_template_response(self, request, response):
+        # Las respuestas DRF se renderizan después de esta llamada
+        timings = current_timings()
+        if timings is not None:
+            timings.start_render()
+            response.add_post_render_callback(timings.finish_render)
+        return response
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQueryPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('view_name', models.CharField(blank=True, default='', max_length=200)),
+                ('origin', models.CharField(max_length=255)),
+                ('sql', models.TextField()),
+                ('params', models.JSONField(default=list)),
+                ('duration_ms', models.FloatField()),
+                ('vendor', models.CharField(max_length=20)),
+                ('plan', models.JSONField(null=True)),
+                ('seq_scans', models.JSONField(default=list)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'slow_query_plans',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['origin', '-created_at'], name='slow_query_origin_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import models
+
+
+class SlowQueryPlan(models.Model):
+    """
+    Plan de ejecución (EXPLAIN ANALYZE) de una consulta lenta muestreada,
+    con la vista y la función del código que la originaron.
+    """
+    view_name = models.CharField(max_length=200, blank=True, default="")
+    origin = models.CharField(max_length=255)  # p. ej. "export_stream._expense_rows"
+    sql = models.TextField()
+    params = models.JSONField(default=list)
+    duration_ms = models.FloatField()
+    vendor = models.CharField(max_length=20)
+    plan = models.JSONField(null=True)
+    seq_scans = models.JSONField(default=list)  # tablas recorridas completas según el plan
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = "slow_query_plans"
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['origin', '-created_at'], name='slow_query_origin_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.origin} ({self.duration_ms:.0f} ms)"
@@ -0,0 +1,217 @@
+import json
+import os
+import tempfile
+import time
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from moneymind.testing import SeededAPITestCase, receipt_image
+from moneymind_apps.monitoring.models import SlowQueryPlan
+from moneymind_apps.monitoring.utils.metrics import (
+    collect_snapshots,
+    inc_counter,
+    observe,
+    registry,
+    render_prometheus,
+)
+from moneymind_apps.monitoring.utils.slow_queries import SlowQueryCollector, is_read_query
+from moneymind_apps.users.models import User
+
+
+@override_settings(REQUEST_TIMING_SAMPLE_RATE=1.0)
+class RequestTimingMiddlewareTests(SeededAPITestCase):
+    seed_months = 2
+
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs("moneymind.requests", level="INFO") as logs:
+            response = self.client.get(f"/api/reports/unified-analysis/?user_id={self.user.id}")
+
+        self.assertIn('db;dur=', response["Server-Timing"])
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+        line = json.loads(logs.records[0].getMessage())
+        self.assertEqual(line["view"], "unified-analysis")
+        self.assertEqual(line["status"], 200)
+        self.assertEqual(line["db_queries"], 3)
+
+    def test_external_calls_are_timed(self):
+        chart_data_list = [{"values": [index]} for index in range(5)]
+        response = self.client.post(
+            "/api/reports/generate-chart-comments/", {"chart_data_list": chart_data_list}, content_type="application/json"
+        )
+        self.assertIn('gemini;dur=', response["Server-Timing"])
+        self.assertIn('desc="1 calls"', response["Server-Timing"])
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        with self.assertNoLogs("moneymind.requests", level="INFO"):
+            response = self.client.get(f"/api/reports/unified-analysis/?user_id={self.user.id}")
+        self.assertNotIn("Server-Timing", response)
+
+
+class MetricsEndpointTests(SeededAPITestCase):
+    seed_months = 2
+
+    def setUp(self):
+        super().setUp()
+        registry.reset()
+
+    def test_metrics_after_requests(self):
+        url = f"/api/reports/unified-analysis/?user_id={self.user.id}"
+        self.client.get(url)
+        self.client.get(url)
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+
+        body = response.content.decode()
+        self.assertIn('moneymind_http_requests_total{view="unified-analysis",method="GET",status="200"} 2', body)
+        self.assertIn('moneymind_http_request_duration_seconds_count{view="unified-analysis",method="GET"} 2', body)
+        self.assertIn('moneymind_cache_requests_total{cache="reports",result="hit"} 1', body)
+        self.assertIn('moneymind_cache_requests_total{cache="reports",result="miss"} 1', body)
+
+    def test_gemini_result_codes(self):
+        self.gemini.return_value.generate_content.return_value.text = ""
+        self.client.post("/api/movements/analyze-income/", {"file": receipt_image(size=(200, 200))})
+
+        body = self.client.get("/metrics").content.decode()
+        self.assertIn('moneymind_gemini_results_total{operation="analyze_income",code="EMPTY_RESPONSE"} 1', body)
+        self.assertIn('moneymind_external_call_duration_seconds_count{service="gemini",operation="analyze_income"} 1', body)
+
+    @override_settings(METRICS_TOKEN="secreto")
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get("/metrics").status_code, 401)
+        self.assertEqual(self.client.get("/metrics", HTTP_AUTHORIZATION="Bearer secreto").status_code, 200)
+
+
+class MetricsRegistryTests(SimpleTestCase):
+
+    def setUp(self):
+        registry.reset()
+
+    def test_histogram_buckets_are_cumulative(self):
+        for value in (0.004, 0.02, 3.0):
+            observe("moneymind_http_request_duration_seconds", value, "home-dashboard", "GET")
+
+        body = render_prometheus(collect_snapshots())
+        labels = 'view="home-dashboard",method="GET"'
+        self.assertIn(f'moneymind_http_request_duration_seconds_bucket{{{labels},le="0.005"}} 1', body)
+        self.assertIn(f'moneymind_http_request_duration_seconds_bucket{{{labels},le="0.025"}} 2', body)
+        self.assertIn(f'moneymind_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3', body)
+        self.assertIn(f'moneymind_http_request_duration_seconds_count{{{labels}}} 3', body)
+
+    def test_multiprocess_export_sums_worker_files(self):
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            # Archivo de un worker reciclado cuyo pid reutiliza este proceso
+            with open(os.path.join(directory, f"{os.getpid()}-1.json"), "w") as file:
+                json.dump({
+                    "counters": [["moneymind_onesignal_notifications_total", ["scheduled"], 4]],
+                    "histograms": [],
+                }, file)
+
+            inc_counter("moneymind_onesignal_notifications_total", "scheduled", amount=2)
+            body = render_prometheus(collect_snapshots())
+
+            self.assertIn('moneymind_onesignal_notifications_total{outcome="scheduled"} 6', body)
+            self.assertTrue(os.path.exists(registry.snapshot_path(directory)))
+
+    def test_dead_worker_snapshots_are_pruned(self):
+        snapshot = {"counters": [["moneymind_onesignal_notifications_total", ["scheduled"], 4]], "histograms": []}
+
+        with tempfile.TemporaryDirectory() as directory, override_settings(METRICS_MULTIPROC_DIR=directory):
+            dead = os.path.join(directory, "999999999-1.json")
+            stale = os.path.join(directory, f"{os.getpid()}-1.json")
+            for path in (dead, stale):
+                with open(path, "w") as file:
+                    json.dump(snapshot, file)
+            # pid vivo (reutilizado) pero sin actualizar desde hace dos horas
+            os.utime(stale, (time.time() - 7200, time.time() - 7200))
+
+            body = render_prometheus(collect_snapshots())
+
+            self.assertFalse(os.path.exists(dead))
+            self.assertFalse(os.path.exists(stale))
+            self.assertNotIn('moneymind_onesignal_notifications_total{outcome="scheduled"} 4', body)
+
+    def test_flush_errors_do_not_reach_the_request(self):
+        with tempfile.TemporaryDirectory() as directory:
+            missing = os.path.join(directory, "no-existe")
+            with override_settings(METRICS_MULTIPROC_DIR=missing), self.assertLogs(
+                "moneymind_apps.monitoring.utils.metrics", "ERROR"
+            ):
+                inc_counter("moneymind_onesignal_notifications_total", "scheduled")
+                registry.maybe_flush(force=True)
+
+
+@override_settings(
+    SLOW_QUERY_EXPLAIN=True, SLOW_QUERY_THRESHOLD_MS=0, SLOW_QUERY_SAMPLE_RATE=1.0, SLOW_QUERY_MAX_PER_REQUEST=10
+)
+class SlowQueryPlanTests(SeededAPITestCase):
+    seed_months = 2
+
+    def test_slow_queries_are_explained_with_their_origin(self):
+        response = self.client.get(
+            f"/api/reports/export/?user_id={self.user.id}&report_type=monthly&file_format=excel"
+        )
+        self.assertEqual(response.status_code, 200)
+
+        origins = set(SlowQueryPlan.objects.values_list("origin", flat=True))
+        self.assertIn("export_stream._expense_rows", origins)
+
+        plan = SlowQueryPlan.objects.filter(origin="export_stream._expense_rows").first()
+        self.assertEqual(plan.view_name, "export-report")
+        self.assertTrue(plan.plan)
+        self.assertTrue(plan.sql.startswith("SELECT"))
+
+    def test_union_and_cte_queries_are_explained(self):
+        self.assertTrue(is_read_query("(SELECT 1) UNION ALL (SELECT 2)"))
+        self.assertTrue(is_read_query("  WITH recent AS (SELECT updated_at FROM t) SELECT * FROM recent"))
+        self.assertFalse(is_read_query("WITH moved AS (DELETE FROM t RETURNING id) SELECT * FROM moved"))
+        self.assertFalse(is_read_query("SELECT id FROM t FOR UPDATE"))
+        self.assertFalse(is_read_query("INSERT INTO t VALUES (1)"))
+
+        collector = SlowQueryCollector("default")
+        with connection.execute_wrapper(collector), connection.cursor() as cursor:
+            cursor.execute("WITH numbers AS (SELECT 1 AS n) SELECT n FROM numbers")
+        collector.store("cte")
+
+        self.assertTrue(SlowQueryPlan.objects.filter(view_name="cte", sql__startswith="WITH").exists())
+
+    def test_writes_are_never_explained(self):
+        response = self.client.post("/api/movements/income/create/", {
+            "user_id": self.user.id,
+            "title": "Venta",
+            "date": self.today.isoformat(),
+            "time": "18:00",
+            "total": "10.00",
+        }, content_type="application/json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(SlowQueryPlan.objects.exists())
+        self.assertFalse(SlowQueryPlan.objects.exclude(sql__startswith="SELECT").exists())
+
+    def test_endpoint_is_admin_only(self):
+        self.client.get(f"/api/reports/export/?user_id={self.user.id}&report_type=monthly&file_format=pdf")
+        self.assertEqual(self.client.get("/api/monitoring/slow-queries/").status_code, 403)
+
+        admin = User.objects.create_superuser(
+            username="admin@moneymind.pe", email="admin@moneymind.pe", password="x", first_name="A", last_name="B"
+        )
+        self.client.force_login(admin)
+
+        with override_settings(SLOW_QUERY_EXPLAIN=False):
+            data = self.client.get(
+                "/api/monitoring/slow-queries/?origin=export_stream._expense_rows"
+            ).json()
+            self.assertGreater(data["total_count"], 0)
+            self.assertEqual(data["origins"][0]["origin"], "export_stream._expense_rows")
+
+            for query in ("page=abc", "page_size=x", "min_duration_ms=x"):
+                response = self.client.get(f"/api/monitoring/slow-queries/?{query}")
+                self.assertEqual(response.status_code, 400, query)
+                self.assertIn("error", response.json())
+
+            detail = self.client.get(f"/api/monitoring/slow-queries/{data['plans'][0]['id']}/").json()
+            self.assertIn("plan", detail)
+            self.assertIn("params", detail)
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import *
+
+urlpatterns = [
+    path('metrics', MetricsView.as_view(), name='metrics'),
+    path('api/monitoring/slow-queries/', SlowQueryPlanListView.as_view(), name='slow-query-plans'),
+    path('api/monitoring/slow-queries/<int:plan_id>/', SlowQueryPlanDetailView.as_view(), name='slow-query-plan'),
+]
@@ -0,0 +1,256 @@
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+COUNTER = "counter"
+HISTOGRAM = "histogram"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+EXTERNAL_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 8, 13, 20, 50, 100, 250)
+
+# nombre: (tipo, ayuda, etiquetas, buckets)
+METRICS = {
+    "moneymind_http_requests_total": (
+        COUNTER, "Requests atendidos por nombre de URL, método y código HTTP.", ("view", "method", "status"), None),
+    "moneymind_http_request_duration_seconds": (
+        HISTOGRAM, "Duración de los requests por nombre de URL.", ("view", "method"), LATENCY_BUCKETS),
+    "moneymind_db_queries_per_request": (
+        HISTOGRAM, "Consultas SQL por request (solo requests muestreados).", ("view",), QUERY_COUNT_BUCKETS),
+    "moneymind_db_time_per_request_seconds": (
+        HISTOGRAM, "Tiempo en consultas SQL por request (solo requests muestreados).", ("view",), LATENCY_BUCKETS),
+    "moneymind_external_call_duration_seconds": (
+        HISTOGRAM, "Duración de llamadas a servicios externos.", ("service", "operation"), EXTERNAL_BUCKETS),
+    "moneymind_external_call_errors_total": (
+        COUNTER, "Llamadas a servicios externos que lanzaron una excepción.", ("service", "operation"), None),
+    "moneymind_gemini_results_total": (
+        COUNTER, "Resultados del análisis de recibos con Gemini por código.", ("operation", "code"), None),
+    "moneymind_onesignal_notifications_total": (
+        COUNTER, "Notificaciones programadas en OneSignal por resultado.", ("outcome",), None),
+    "moneymind_cache_requests_total": (
+        COUNTER, "Consultas a cachés (reportes, recibos, ETag) por resultado hit/miss.", ("cache", "result"), None),
+}
+
+
+class MetricsRegistry:
+    """
+    Agregación en memoria del proceso. Con METRICS_MULTIPROC_DIR cada worker de
+    gunicorn vuelca periódicamente su estado a `<pid>-<inicio>.json` en ese
+    directorio y /metrics suma los archivos de todos los workers.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # Un solo hilo escribe el archivo a la vez: un snapshot viejo nunca pisa a uno nuevo
+        self._flush_lock = threading.Lock()
+        self._counters = {}  # {(nombre, etiquetas): valor}
+        self._histograms = {}  # {(nombre, etiquetas): [conteo por bucket..., +Inf, suma]}
+        self._last_flush = 0.0
+        self._pid = None
+        self._process_tag = None
+
+    def inc(self, name, labels, amount=1):
+        key = (name, tuple(str(label) for label in labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+        self.maybe_flush()
+
+    def observe(self, name, labels, value):
+        buckets = METRICS[name][3]
+        key = (name, tuple(str(label) for label in labels))
+        with self._lock:
+            state = self._histograms.get(key)
+            if state is None:
+                state = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+            state[bisect_left(buckets, value)] += 1
+            state[-1] += value
+        self.maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {
+            "counters": [[name, list(labels), value] for (name, labels), value in self._counters.items()],
+            "histograms": [[name, list(labels), list(state)] for (name, labels), state in self._histograms.items()],
+        }
+
+    def snapshot_path(self, directory):
+        """
+        Archivo de este proceso: pid más el momento en que empezó a escribir. Si
+        gunicorn recicla un worker y el nuevo reutiliza el pid, no pisa el archivo
+        del anterior (los contadores sumados no retroceden)
+        """
+        pid = os.getpid()
+        if self._pid != pid:
+            # También tras un fork: el hijo no hereda la identidad del padre
+            self._pid = pid
+            self._process_tag = f"{pid}-{time.time_ns()}"
+        return os.path.join(directory, f"{self._process_tag}.json")
+
+    def maybe_flush(self, force=False):
+        """
+        Escribe el estado del proceso en METRICS_MULTIPROC_DIR cada
+        METRICS_FLUSH_INTERVAL segundos. Un error de disco se registra en el log
+        y no llega al request que incrementó la métrica.
+        """
+        directory = getattr(settings, "METRICS_MULTIPROC_DIR", None)
+        if not directory:
+            return
+
+        # Si otro hilo ya está escribiendo no hace falta esperarlo
+        if not self._flush_lock.acquire(blocking=force):
+            return
+
+        try:
+            with self._lock:
+                now = time.monotonic()
+                if not force and now - self._last_flush < getattr(settings, "METRICS_FLUSH_INTERVAL", 5):
+                    return
+                self._last_flush = now
+                snapshot = self._snapshot()
+
+            path = self.snapshot_path(directory)
+            temporary = None
+            try:
+                descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".tmp")
+                with os.fdopen(descriptor, "w") as file:
+                    json.dump(snapshot, file)
+                # rename es atómico: /metrics nunca lee un archivo a medio escribir
+                os.replace(temporary, path)
+            except OSError:
+                logger.exception("No se pudieron volcar las métricas en %s", directory)
+                if temporary and os.path.exists(temporary):
+                    os.remove(temporary)
+        finally:
+            self._flush_lock.release()
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+registry = MetricsRegistry()
+
+
+def inc_counter(name, *labels, amount=1):
+    registry.inc(name, labels, amount)
+
+
+def observe(name, value, *labels):
+    registry.observe(name, labels, value)
+
+
+def _pid_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        # Existe pero es de otro usuario
+        return True
+    return True
+
+
+def _is_dead_snapshot(path, expired_before):
+    """
+    Archivo de un worker que ya no existe: su pid no corre en esta máquina o no
+    se actualizó desde `expired_before` (pid reutilizado u otro servidor)
+    """
+    try:
+        pid = int(os.path.basename(path).split("-", 1)[0])
+        modified = os.path.getmtime(path)
+    except (ValueError, OSError):
+        return False
+    return not _pid_running(pid) or modified < expired_before
+
+
+def collect_snapshots():
+    """Estado de este proceso o, en modo multiproceso, de todos los workers"""
+    directory = getattr(settings, "METRICS_MULTIPROC_DIR", None)
+    if not directory:
+        return [registry.snapshot()]
+
+    registry.maybe_flush(force=True)
+    own_path = registry.snapshot_path(directory)
+    expired_before = time.time() - getattr(settings, "METRICS_SNAPSHOT_TTL", 3600)
+
+    snapshots = []
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        path = os.path.join(directory, filename)
+        if path != own_path and _is_dead_snapshot(path, expired_before):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            continue
+        try:
+            with open(path) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+
+    return snapshots
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def render_prometheus(snapshots):
+    """Suma los snapshots y los escribe en el formato de texto de Prometheus 0.0.4"""
+    counters = {}
+    histograms = {}
+
+    for snapshot in snapshots:
+        for name, labels, value in snapshot["counters"]:
+            key = (name, tuple(labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, state in snapshot["histograms"]:
+            key = (name, tuple(labels))
+            if key in histograms:
+                histograms[key] = [total + value for total, value in zip(histograms[key], state)]
+            else:
+                histograms[key] = list(state)
+
+    lines = []
+    for name, (metric_type, help_text, label_names, buckets) in METRICS.items():
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+        if metric_type == COUNTER:
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+            continue
+
+        for (metric, labels), state in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(list(buckets) + ["+Inf"], state[:-1]):
+                cumulative += count
+                le = bound if bound == "+Inf" else f"{bound:g}"
+                lines.append(f"{name}_bucket{_format_labels(label_names, labels, [('le', le)])} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(label_names, labels)} {state[-1]}")
+            lines.append(f"{name}_count{_format_labels(label_names, labels)} {cumulative}")
+
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,110 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from moneymind_apps.monitoring.utils.metrics import inc_counter, observe
+
+_current_timings = ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    """
+    Tiempos de un request muestreado: consultas SQL (cantidad y duración),
+    llamadas a servicios externos por nombre y render de la respuesta DRF.
+    Las duraciones se guardan en segundos.
+    """
+    __slots__ = ("started", "db_queries", "db_seconds", "external", "render_started", "render_seconds")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.external = {}  # {servicio: [llamadas, segundos]}
+        self.render_started = None
+        self.render_seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper de Django: cuenta y cronometra cada consulta"""
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_seconds += time.perf_counter() - started
+
+    def add_external(self, service, seconds):
+        calls = self.external.setdefault(service, [0, 0.0])
+        calls[0] += 1
+        calls[1] += seconds
+
+    def start_render(self):
+        self.render_started = time.perf_counter()
+
+    def finish_render(self, response=None):
+        if self.render_started is not None:
+            self.render_seconds += time.perf_counter() - self.render_started
+            self.render_started = None
+
+    def summary(self):
+        """Duraciones en ms; `app` es lo que queda fuera de BD, servicios externos y render"""
+        total = time.perf_counter() - self.started
+        external_seconds = sum(seconds for _, seconds in self.external.values())
+        app = max(0.0, total - self.db_seconds - external_seconds - self.render_seconds)
+
+        return {
+            "total_ms": round(total * 1000, 2),
+            "db_ms": round(self.db_seconds * 1000, 2),
+            "db_queries": self.db_queries,
+            "external": {
+                service: {"calls": calls, "ms": round(seconds * 1000, 2)}
+                for service, (calls, seconds) in self.external.items()
+            },
+            "render_ms": round(self.render_seconds * 1000, 2),
+            "app_ms": round(app * 1000, 2),
+        }
+
+
+def server_timing_header(summary):
+    """Valor del header Server-Timing (https://www.w3.org/TR/server-timing/)"""
+    metrics = [f'db;dur={summary["db_ms"]};desc="{summary["db_queries"]} queries"']
+    for service, call in summary["external"].items():
+        metrics.append(f'{service};dur={call["ms"]};desc="{call["calls"]} calls"')
+    metrics.append(f'render;dur={summary["render_ms"]}')
+    metrics.append(f'app;dur={summary["app_ms"]}')
+    metrics.append(f'total;dur={summary["total_ms"]}')
+    return ", ".join(metrics)
+
+
+def current_timings():
+    """RequestTimings del request en curso o None si no se está midiendo"""
+    return _current_timings.get()
+
+
+@contextmanager
+def measure_request(timings):
+    token = _current_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _current_timings.reset(token)
+
+
+@contextmanager
+def track_external_call(service, operation=""):
+    """
+    Cronometra una llamada a un servicio externo (Gemini, OneSignal): la suma al
+    request en curso si está muestreado y la registra siempre en las métricas
+    de latencia y errores.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        inc_counter("moneymind_external_call_errors_total", service, operation)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("moneymind_external_call_duration_seconds", elapsed, service, operation)
+
+        timings = _current_timings.get()
+        if timings is not None:
+            timings.add_external(service, elapsed)
@@ -0,0 +1,157 @@
+import logging
+import os
+import random
+import re
+import sys
+import time
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+APPS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+MONITORING_DIR = os.path.join(APPS_DIR, "monitoring")
+
+
+def query_origin(frame):
+    """
+    Primera función del proyecto en la pila (fuera de monitoring), como
+    `Clase.método` o `modulo.función`
+    """
+    while frame is not None:
+        filename = os.path.abspath(frame.f_code.co_filename)
+        if filename.startswith(APPS_DIR) and not filename.startswith(MONITORING_DIR):
+            owner = frame.f_locals.get("self")
+            if owner is not None:
+                return f"{type(owner).__name__}.{frame.f_code.co_name}"
+            module = frame.f_globals.get("__name__", "").rsplit(".", 1)[-1]
+            return f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "desconocido"
+
+
+WRITE_KEYWORDS = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+
+def is_read_query(sql):
+    """
+    Consultas que se pueden explicar con EXPLAIN ANALYZE sin efectos: SELECT,
+    uniones entre paréntesis como `(SELECT ...) UNION ALL (SELECT ...)` y CTE
+    (`WITH ...`) que no escriben. Nunca SELECT ... FOR UPDATE.
+    """
+    head = sql.lstrip(" \t\r\n(")[:6].upper()
+    if head.startswith("WITH"):
+        if WRITE_KEYWORDS.search(sql):
+            return False
+    elif head != "SELECT":
+        return False
+    return " FOR UPDATE" not in sql.upper()
+
+
+def _json_params(params):
+    if params is None:
+        return []
+    if not isinstance(params, (list, tuple)):
+        return [str(params)]
+    return [param if isinstance(param, (int, float, str, bool, type(None))) else str(param) for param in params]
+
+
+def _seq_scans_postgres(plan):
+    scans = []
+    nodes = [entry["Plan"] for entry in plan]
+    while nodes:
+        node = nodes.pop()
+        if node.get("Node Type") == "Seq Scan":
+            scans.append(node.get("Relation Name"))
+        nodes.extend(node.get("Plans", []))
+    return sorted(set(filter(None, scans)))
+
+
+def _seq_scans_sqlite(plan):
+    # "SCAN expenses" es un recorrido completo; "SEARCH expenses USING INDEX ..." no
+    return sorted({
+        row[-1].split()[1] for row in plan
+        if row[-1].startswith("SCAN ") and " USING " not in row[-1]
+    })
+
+
+def explain_query(connection, sql, params):
+    """
+    (plan, tablas con seq scan). En PostgreSQL ejecuta EXPLAIN (ANALYZE, BUFFERS)
+    dentro de una transacción que siempre se revierte; en SQLite (desarrollo)
+    usa EXPLAIN QUERY PLAN.
+    """
+    with transaction.atomic(using=connection.alias):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+                plan = cursor.fetchone()[0]
+                seq_scans = _seq_scans_postgres(plan)
+            elif connection.vendor == "sqlite":
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+                plan = [list(row) for row in cursor.fetchall()]
+                seq_scans = _seq_scans_sqlite(plan)
+            else:
+                plan, seq_scans = None, []
+        transaction.set_rollback(True, using=connection.alias)
+
+    return plan, seq_scans
+
+
+class SlowQueryCollector:
+    """
+    execute_wrapper que guarda las consultas de lectura (is_read_query) más
+    lentas que SLOW_QUERY_THRESHOLD_MS (con probabilidad SLOW_QUERY_SAMPLE_RATE y como
+    máximo SLOW_QUERY_MAX_PER_REQUEST por request). El EXPLAIN se hace después,
+    en `store`, fuera de las consultas del request.
+    """
+
+    def __init__(self, alias):
+        self.alias = alias
+        self.threshold = getattr(settings, "SLOW_QUERY_THRESHOLD_MS", 200) / 1000
+        self.sample_rate = getattr(settings, "SLOW_QUERY_SAMPLE_RATE", 0.1)
+        self.max_queries = getattr(settings, "SLOW_QUERY_MAX_PER_REQUEST", 3)
+        self.captured = []
+
+    @classmethod
+    def enabled(cls):
+        return getattr(settings, "SLOW_QUERY_EXPLAIN", False)
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        result = execute(sql, params, many, context)
+        elapsed = time.perf_counter() - started
+
+        if (
+            elapsed >= self.threshold
+            and not many
+            and len(self.captured) < self.max_queries
+            and is_read_query(sql)
+            and random.random() < self.sample_rate
+        ):
+            self.captured.append((sql, params, elapsed, query_origin(sys._getframe(1))))
+
+        return result
+
+    def store(self, view_name):
+        """Ejecuta el EXPLAIN de cada consulta capturada y guarda los planes"""
+        from moneymind_apps.monitoring.models import SlowQueryPlan
+
+        connection = connections[self.alias]
+        for sql, params, elapsed, origin in self.captured:
+            try:
+                plan, seq_scans = explain_query(connection, sql, params)
+                SlowQueryPlan.objects.create(
+                    view_name=view_name or "",
+                    origin=origin[:255],
+                    sql=sql,
+                    params=_json_params(params),
+                    duration_ms=round(elapsed * 1000, 2),
+                    vendor=connection.vendor,
+                    plan=plan,
+                    seq_scans=seq_scans,
+                )
+            except Exception:
+                logger.exception("No se pudo guardar el plan de una consulta lenta de %s", origin)
+
+        self.captured = []
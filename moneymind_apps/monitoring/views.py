@@ -0,0 +1,128 @@
+from django.conf import settings
+from django.db.models import Avg, Count, Max
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from moneymind_apps.monitoring.models import SlowQueryPlan
+from moneymind_apps.monitoring.utils.metrics import collect_snapshots, render_prometheus
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class MetricsView(APIView):
+    permission_classes = [AllowAny]
+    authentication_classes = []
+    """
+    Métricas en formato Prometheus. Si METRICS_TOKEN está configurado se exige
+    `Authorization: Bearer <token>`.
+    """
+
+    def get(self, request):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if token and request.headers.get("Authorization") != f"Bearer {token}":
+            return HttpResponse("No autorizado", status=401)
+
+        return HttpResponse(render_prometheus(collect_snapshots()), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
+def _slow_query_data(plan, include_plan=False):
+    data = {
+        "id": plan.id,
+        "view_name": plan.view_name,
+        "origin": plan.origin,
+        "duration_ms": plan.duration_ms,
+        "seq_scans": plan.seq_scans,
+        "vendor": plan.vendor,
+        "sql": plan.sql,
+        "created_at": plan.created_at.isoformat(),
+    }
+    if include_plan:
+        data["params"] = plan.params
+        data["plan"] = plan.plan
+    return data
+
+
+class SlowQueryPlanListView(APIView):
+    permission_classes = [IsAdminUser]
+    """
+    Planes de consultas lentas capturados (solo administradores), del más
+    reciente al más antiguo, con un resumen por función de origen.
+    Filtros opcionales: origin, view_name, seq_scan (tabla) y min_duration_ms.
+    """
+
+    def get(self, request):
+        try:
+            page = int(request.query_params.get('page', 1))
+            page_size = min(int(request.query_params.get('page_size', 20)), 100)
+        except ValueError:
+            return Response(
+                {"error": "Los parámetros page y page_size deben ser números enteros"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if page < 1 or page_size < 1:
+            return Response(
+                {"error": "Los parámetros page y page_size deben ser >= 1"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        plans = SlowQueryPlan.objects.all()
+
+        origin = request.query_params.get('origin')
+        if origin:
+            plans = plans.filter(origin=origin)
+
+        view_name = request.query_params.get('view_name')
+        if view_name:
+            plans = plans.filter(view_name=view_name)
+
+        min_duration = request.query_params.get('min_duration_ms')
+        if min_duration:
+            try:
+                plans = plans.filter(duration_ms__gte=float(min_duration))
+            except ValueError:
+                return Response(
+                    {"error": "El parámetro min_duration_ms debe ser un número"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+
+        table = request.query_params.get('seq_scan')
+        if table:
+            # JSONField __contains no está disponible en SQLite
+            ids = [plan_id for plan_id, scans in plans.values_list('id', 'seq_scans') if table in scans]
+            plans = plans.filter(id__in=ids)
+
+        total_count = plans.count()
+        offset = (page - 1) * page_size
+
+        origins = plans.order_by().values('origin').annotate(
+            count=Count('id'),
+            avg_duration_ms=Avg('duration_ms'),
+            max_duration_ms=Max('duration_ms')
+        ).order_by('-max_duration_ms')[:20]
+
+        return Response(
+            {
+                "plans": [_slow_query_data(plan) for plan in plans[offset:offset + page_size]],
+                "origins": list(origins),
+                "page": page,
+                "page_size": page_size,
+                "total_count": total_count,
+                "has_more": (offset + page_size) < total_count,
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+class SlowQueryPlanDetailView(APIView):
+    permission_classes = [IsAdminUser]
+    """
+    Un plan completo (EXPLAIN ANALYZE en JSON) con la consulta y sus parámetros
+    """
+
+    def get(self, request, plan_id):
+        plan = get_object_or_404(SlowQueryPlan, id=plan_id)
+        return Response(_slow_query_data(plan, include_plan=True), status=status.HTTP_200_OK)
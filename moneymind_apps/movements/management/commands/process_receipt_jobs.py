@@ -0,0 +1,74 @@
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from moneymind_apps.movements.utils.receipt_jobs import (
+    claim_receipt_jobs,
+    process_receipt_job,
+    purge_finished_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Procesa los análisis de recibos encolados con ?async=true. "
+        "Se pueden ejecutar varios workers en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5,
+            help="Jobs reclamados por iteración (default: 5)."
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Segundos de espera cuando no hay jobs pendientes (default: 1)."
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=3,
+            help="Intentos ante errores transitorios antes de marcar el job como fallido (default: 3)."
+        )
+        parser.add_argument(
+            "--purge-after-hours",
+            type=int,
+            default=24,
+            help="Elimina los jobs terminados hace más de estas horas (default: 24)."
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa lo pendiente y termina en lugar de quedarse escuchando."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        purge_after = timedelta(hours=options["purge_after_hours"])
+        processed = 0
+
+        purged = purge_finished_jobs(purge_after)
+        if purged:
+            self.stdout.write(f"{purged} jobs antiguos eliminados")
+
+        try:
+            while True:
+                jobs = claim_receipt_jobs(batch_size, max_attempts=options["max_attempts"])
+
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                for job in jobs:
+                    status = process_receipt_job(job, max_attempts=options["max_attempts"])
+                    processed += 1
+                    self.stdout.write(f"Job {job.id} ({job.kind}): {status}")
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"{processed} jobs procesados"))
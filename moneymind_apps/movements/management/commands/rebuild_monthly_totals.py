@@ -0,0 +1,67 @@
+from django.core.management.base import BaseCommand
+from django.contrib.auth import get_user_model
+from moneymind_apps.movements.utils.rollups import rebuild_rollup_for_users
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Reconstruye o repara el acumulado mensual por categoría (monthly_category_totals) "
+        "a partir de la tabla de gastos, procesando los usuarios por lotes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="ID de usuario a procesar (se puede repetir). Por defecto todos."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=100,
+            help="Cantidad de usuarios por lote/transacción (default: 100)."
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo reporta las diferencias sin escribir cambios."
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = max(1, options["chunk_size"])
+        dry_run = options["dry_run"]
+
+        users = User.objects.order_by("id").values_list("id", flat=True)
+        if options["user_ids"]:
+            users = users.filter(id__in=options["user_ids"])
+
+        totals = {"created": 0, "updated": 0, "deleted": 0}
+        processed = 0
+        last_id = 0
+
+        # Paginación por id para no cargar todos los usuarios en memoria
+        while True:
+            chunk = list(users.filter(id__gt=last_id)[:chunk_size])
+            if not chunk:
+                break
+
+            stats = rebuild_rollup_for_users(chunk, dry_run=dry_run)
+            for key in totals:
+                totals[key] += stats[key]
+
+            processed += len(chunk)
+            last_id = chunk[-1]
+            self.stdout.write(
+                f"Usuarios {chunk[0]}-{chunk[-1]}: "
+                f"{stats['created']} creadas, {stats['updated']} actualizadas, {stats['deleted']} eliminadas"
+            )
+
+        prefix = "[dry-run] " if dry_run else ""
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}{processed} usuarios procesados: "
+            f"{totals['created']} filas creadas, {totals['updated']} actualizadas, {totals['deleted']} eliminadas"
+        ))
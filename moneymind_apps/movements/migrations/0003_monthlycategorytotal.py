@@ -0,0 +1,33 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movements', '0002_user_date_time_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCategoryTotal',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('year', models.IntegerField()),
+                ('month', models.IntegerField()),
+                ('category', models.CharField(choices=[('vivienda', 'vivienda'), ('servicios_basicos', 'servicios_basicos'), ('alimentacion', 'alimentacion'), ('transporte', 'transporte'), ('salud', 'salud'), ('entretenimiento', 'entretenimiento'), ('streaming_suscripciones', 'streaming_suscripciones'), ('mascotas', 'mascotas'), ('cuidado_personal', 'cuidado_personal'), ('deudas_prestamos', 'deudas_prestamos'), ('ahorro_inversion', 'ahorro_inversion'), ('seguros', 'seguros'), ('educacion_desarrollo', 'educacion_desarrollo'), ('regalos_celebraciones', 'regalos_celebraciones'), ('viajes_vacaciones', 'viajes_vacaciones'), ('imprevistos', 'imprevistos')], max_length=50)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('count', models.IntegerField(default=0)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_category_totals', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'monthly_category_totals',
+                'ordering': ['year', 'month'],
+                'unique_together': {('user', 'year', 'month', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.6 on 2026-10-17 22:07
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movements', '0003_monthlycategorytotal'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptAnalysisJob',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('expense', 'expense'), ('income', 'income')], max_length=10)),
+                ('status', models.CharField(choices=[('pending', 'pending'), ('processing', 'processing'), ('done', 'done'), ('failed', 'failed')], default='pending', max_length=12)),
+                ('image', models.BinaryField(null=True)),
+                ('mime_type', models.CharField(max_length=50)),
+                ('cache_key', models.CharField(max_length=200)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('attempts', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'receipt_analysis_jobs',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='receipt_jobs_status_idx')],
+            },
+        ),
+    ]
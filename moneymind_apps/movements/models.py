@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.conf import settings
 from enum import Enum
@@ -143,6 +144,9 @@ class Expense(models.Model):
     class Meta:
         db_table = "expenses"
         ordering = ["-date", "-time"]
+        indexes = [
+            models.Index(fields=["user", "date", "time"], name="expenses_user_date_time_idx"),
+        ]
 
     def __str__(self):
         return f"{self.place} - {self.total} ({self.date})"
@@ -167,8 +171,89 @@ class Income(models.Model):
     class Meta:
         db_table = "incomes"
         ordering = ["-date", "-time"]
+        indexes = [
+            models.Index(fields=["user", "date", "time"], name="incomes_user_date_time_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} - {self.total} ({self.date})"
 
 
+
+class MonthlyCategoryTotal(models.Model):
+    """
+    Acumulado mensual de gastos por usuario y categoría.
+
+    Se mantiene de forma incremental al registrar o eliminar un gasto (en la misma
+    transacción) y los reportes lo leen en lugar de recorrer la tabla de gastos.
+    Puede reconstruirse con `python manage.py rebuild_monthly_totals`.
+    """
+    id = models.AutoField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="monthly_category_totals"
+    )
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1-12
+    category = models.CharField(
+        max_length=50,
+        choices=[(tag.value, tag.value) for tag in Category]
+    )
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "monthly_category_totals"
+        unique_together = ['user', 'year', 'month', 'category']
+        ordering = ['year', 'month']
+
+    def __str__(self):
+        return f"{self.user_id} - {self.month}/{self.year} - {self.category}: {self.total}"
+
+
+class ReceiptKind(Enum):
+    EXPENSE = "expense"
+    INCOME = "income"
+
+
+class ReceiptJobStatus(Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ReceiptAnalysisJob(models.Model):
+    """
+    Análisis de recibo encolado: el POST guarda la imagen ya preprocesada y
+    `python manage.py process_receipt_jobs` la envía a Gemini fuera del request.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(
+        max_length=10,
+        choices=[(tag.value, tag.value) for tag in ReceiptKind]
+    )
+    status = models.CharField(
+        max_length=12,
+        choices=[(tag.value, tag.value) for tag in ReceiptJobStatus],
+        default=ReceiptJobStatus.PENDING.value
+    )
+    image = models.BinaryField(null=True)  # Se borra al terminar el análisis
+    mime_type = models.CharField(max_length=50)
+    cache_key = models.CharField(max_length=200)  # Clave de la imagen original en la caché de recibos
+    result = models.JSONField(null=True, blank=True)
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "receipt_analysis_jobs"
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="receipt_jobs_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} - {self.status} ({self.id})"
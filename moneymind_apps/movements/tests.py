@@ -1,3 +1,259 @@
-from django.test import TestCase
+import io
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.management import call_command
+from django.db.models import Sum
+from django.test.utils import override_settings
+from django.utils import timezone
+from PIL import Image
+from moneymind.testing import SeededAPITestCase, receipt_image, sunat_qr_image
+from moneymind_apps.balances.models import Balance, UserBalanceHistory
+from moneymind_apps.movements.models import Expense, Income, MonthlyCategoryTotal, ReceiptAnalysisJob
+from moneymind_apps.movements.utils.receipt_jobs import claim_receipt_jobs, process_receipt_job
 
-# Create your tests here.
+
+class ReceiptAnalysisTests(SeededAPITestCase):
+    seed_months = 2
+
+    def test_analyze_expense_is_cached_by_image(self):
+        image = receipt_image()
+
+        with self.assertMaxQueries(0):
+            response = self.client.post("/api/movements/analyze-expense/", {"file": image})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["data"]["category"], "alimentacion")
+
+        image.seek(0)
+        response = self.client.post("/api/movements/analyze-expense/", {"file": image})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.gemini.return_value.generate_content.call_count, 1)
+
+    def test_analyze_sends_downscaled_grayscale_image(self):
+        self.client.post("/api/movements/analyze-income/", {"file": receipt_image()})
+
+        parts = self.gemini.return_value.generate_content.call_args[0][0][0]["parts"]
+        sent = Image.open(io.BytesIO(parts[1]["data"]))
+        self.assertEqual(parts[1]["mime_type"], "image/jpeg")
+        self.assertEqual(sent.mode, "L")
+        self.assertLessEqual(max(sent.size), 1600)
+
+    def test_sunat_qr_scan_still_returns_category(self):
+        response = self.client.post("/api/movements/analyze-expense/", {"file": sunat_qr_image()})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()["data"]
+        # Fecha y total del QR, categoría y lugar de la consulta reducida al modelo
+        self.assertEqual((data["date"], data["total"]), ("2025-05-01", 25.5))
+        self.assertEqual(data["comment"], "Boleta B001-00012345")
+        self.assertEqual((data["category"], data["place"]), ("alimentacion", "Tambo"))
+        self.assertEqual(data["missing_fields"], [])
+
+        prompt = self.gemini.return_value.generate_content.call_args[0][0][0]["parts"][0]
+        self.assertIn('"category"', prompt)
+        self.assertNotIn('"total"', prompt)
+
+    def test_sunat_qr_scan_retries_failed_classification(self):
+        generate = self.gemini.return_value.generate_content
+        generate.side_effect = ConnectionError("sin red")
+
+        image = sunat_qr_image()
+        data = self.client.post("/api/movements/analyze-expense/", {"file": image}).json()["data"]
+        self.assertIsNone(data["category"])
+        self.assertEqual(data["missing_fields"], ["category"])
+
+        # El resultado sin categoría no quedó en caché: se vuelve a consultar al modelo
+        generate.side_effect = None
+        image.seek(0)
+        data = self.client.post("/api/movements/analyze-expense/", {"file": image}).json()["data"]
+        self.assertEqual(data["category"], "alimentacion")
+        self.assertEqual(generate.call_count, 2)
+
+    @override_settings(RECEIPT_QR_CLASSIFY_WITH_MODEL=False)
+    def test_sunat_qr_scan_without_model_flags_missing_category(self):
+        response = self.client.post("/api/movements/analyze-expense/", {"file": sunat_qr_image()})
+        self.assertEqual(response.status_code, 200)
+
+        data = response.json()["data"]
+        self.assertIsNone(data["category"])
+        self.assertEqual(data["missing_fields"], ["category"])
+        self.assertEqual(self.gemini.return_value.generate_content.call_count, 0)
+
+    def test_analyze_requires_file(self):
+        response = self.client.post("/api/movements/analyze-expense/", {})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["code"], "NO_IMAGE")
+
+    def test_async_job_flow(self):
+        with self.assertMaxQueries(1):
+            response = self.client.post("/api/movements/analyze-expense/?async=true", {"file": receipt_image()})
+        self.assertEqual(response.status_code, 202)
+        status_url = response.json()["status_url"]
+        self.assertEqual(self.gemini.return_value.generate_content.call_count, 0)
+
+        data = self.get_json(status_url, max_queries=1)
+        self.assertEqual(data["status"], "pending")
+
+        call_command("process_receipt_jobs", "--once", stdout=io.StringIO())
+
+        data = self.get_json(status_url, max_queries=1)
+        self.assertEqual(data["status"], "done")
+        self.assertEqual(data["data"]["place"], "Tambo")
+        self.assertIsNone(ReceiptAnalysisJob.objects.get().image)
+
+
+class ReceiptJobRetryTests(SeededAPITestCase):
+    seed_months = 1
+
+    def create_job(self, **fields):
+        fields = {"kind": "expense", "image": b"jpeg", "mime_type": "image/jpeg", "cache_key": "receipt:test", **fields}
+        return ReceiptAnalysisJob.objects.create(**fields)
+
+    def test_analysis_exception_retries_then_fails(self):
+        job = self.create_job(kind="desconocido")
+
+        for expected in ("pending", "pending", "failed"):
+            with self.assertLogs("moneymind_apps.movements.utils.receipt_jobs", "ERROR"):
+                claimed = claim_receipt_jobs(1, max_attempts=3)
+                self.assertEqual([claimed_job.id for claimed_job in claimed], [job.id])
+                self.assertEqual(process_receipt_job(claimed[0], max_attempts=3), expected)
+
+        job.refresh_from_db()
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.result["code"], "JOB_ERROR")
+        self.assertEqual(claim_receipt_jobs(1, max_attempts=3), [])
+
+    def test_abandoned_job_without_attempts_left_is_failed(self):
+        started = timezone.now() - timedelta(hours=1)
+        exhausted = self.create_job(status="processing", started_at=started, attempts=3)
+        retried = self.create_job(status="processing", started_at=started, attempts=1)
+
+        with self.assertLogs("moneymind_apps.movements.utils.receipt_jobs", "WARNING"):
+            claimed = claim_receipt_jobs(5, max_attempts=3)
+
+        self.assertEqual([job.id for job in claimed], [retried.id])
+        exhausted.refresh_from_db()
+        self.assertEqual(exhausted.status, "failed")
+        self.assertIsNone(exhausted.image)
+
+
+class MovementWriteTests(SeededAPITestCase):
+    seed_months = 3
+
+    def balance(self):
+        return Balance.objects.get(user=self.user).current_amount
+
+    def rollup_total(self, on_date, category):
+        return MonthlyCategoryTotal.objects.filter(
+            user=self.user, year=on_date.year, month=on_date.month, category=category
+        ).values_list("total", flat=True).first() or Decimal("0")
+
+    def test_expense_create_and_delete_keep_balance_and_rollup(self):
+        today = date.today()
+        balance_before = self.balance()
+        rollup_before = self.rollup_total(today, "salud")
+
+        data = self.send_json("post", "/api/movements/expense/create/", {
+            "user_id": self.user.id,
+            "category": "salud",
+            "place": "Inkafarma",
+            "date": today.isoformat(),
+            "time": "09:30",
+            "total": "45.90",
+        }, max_queries=12, expected_status=201)
+
+        self.assertEqual(self.balance(), balance_before - Decimal("45.90"))
+        self.assertEqual(self.rollup_total(today, "salud"), rollup_before + Decimal("45.90"))
+
+        self.send_json("delete", f"/api/movements/expense/delete/{data['expense']['id']}/", {}, max_queries=12)
+
+        self.assertEqual(self.balance(), balance_before)
+        self.assertEqual(self.rollup_total(today, "salud"), rollup_before)
+
+    def test_duplicated_expense_is_rejected(self):
+        expense = Expense.objects.filter(user=self.user).first()
+        self.send_json("post", "/api/movements/expense/create/", {
+            "user_id": self.user.id,
+            "category": expense.category,
+            "place": expense.place,
+            "date": expense.date.isoformat(),
+            "time": expense.time.strftime("%H:%M:%S"),
+            "total": str(expense.total),
+        }, max_queries=2, expected_status=400)
+
+    def test_income_create_and_delete(self):
+        balance_before = self.balance()
+
+        data = self.send_json("post", "/api/movements/income/create/", {
+            "user_id": self.user.id,
+            "title": "Venta",
+            "date": date.today().isoformat(),
+            "time": "18:00",
+            "total": "300.00",
+        }, max_queries=10, expected_status=201)
+        self.assertEqual(self.balance(), balance_before + Decimal("300.00"))
+
+        self.send_json("delete", f"/api/movements/income/delete/{data['income']['id']}/", {}, max_queries=10)
+        self.assertEqual(self.balance(), balance_before)
+
+    def test_delete_missing_movement_returns_404(self):
+        self.send_json("delete", "/api/movements/expense/delete/999999/", {}, max_queries=4, expected_status=404)
+
+
+class MovementListTests(SeededAPITestCase):
+
+    def test_scan_dashboard(self):
+        url = f"/api/movements/scan/dashboard/{self.user.id}/"
+        with self.assertMaxQueries(7):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["recent_movements"]), 10)
+
+        with self.assertMaxQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_scan_dashboard_etag_covers_writes_made_by_the_view(self):
+        # Sin el cierre del mes anterior, el GET lo registra (y sube la versión de datos)
+        UserBalanceHistory.objects.filter(user=self.user).delete()
+        url = f"/api/movements/scan/dashboard/{self.user.id}/"
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(UserBalanceHistory.objects.filter(user=self.user).exists())
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_all_movements_offset_pagination(self):
+        data = self.get_json(f"/api/movements/scan/all/{self.user.id}/?page=5&page_size=20", max_queries=6)
+
+        total = Expense.objects.filter(user=self.user).count() + Income.objects.filter(user=self.user).count()
+        self.assertEqual(data["total_movements"], total)
+        self.assertEqual(data["loaded_count"], 20)
+
+    def test_all_movements_cursor_walks_every_movement(self):
+        url = f"/api/movements/scan/all/{self.user.id}/?page_size=500&cursor="
+        seen = 0
+        previous = None
+
+        while True:
+            data = self.get_json(url, max_queries=4)
+            for movement in data["movements"]:
+                key = (movement["date"], movement["time"])
+                if previous:
+                    self.assertLessEqual(key, previous)
+                previous = key
+            seen += data["loaded_count"]
+            if not data["has_more"]:
+                break
+            url = f"/api/movements/scan/all/{self.user.id}/?page_size=500&cursor={data['next_cursor']}"
+
+        self.assertEqual(seen, self.seed_counts["expenses"] + self.seed_counts["incomes"])
+
+    def test_invalid_cursor(self):
+        self.get_json(f"/api/movements/scan/all/{self.user.id}/?cursor=nope", max_queries=1, expected_status=400)
+
+    def test_rollup_matches_expenses(self):
+        rollup = MonthlyCategoryTotal.objects.filter(user=self.user).aggregate(total=Sum("total"))["total"]
+        expenses = Expense.objects.filter(user=self.user).aggregate(total=Sum("total"))["total"]
+        self.assertEqual(rollup, expenses)
@@ -1,3 +1,3 @@
 from decouple import config
 
-GOOGLE_API_KEY = config("GOOGLE_API_KEY")
+GOOGLE_API_KEY = config("GOOGLE_API_KEY", default="")
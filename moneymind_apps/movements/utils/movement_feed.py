@@ -0,0 +1,107 @@
+import base64
+import binascii
+import json
+from datetime import date, time
+from django.db import connection
+from django.db.models import CharField, Q, Value
+from moneymind_apps.movements.models import Expense, Income
+
+INCOME_TYPE = "income"
+EXPENSE_TYPE = "expense"
+
+# Orden del listado: más recientes primero. A igual fecha y hora los ingresos
+# van antes que los gastos ("income" > "expense") y luego por id descendente.
+FEED_ORDERING = ("-date", "-time", "-movement_type", "-id")
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(key):
+    """Codifica la clave (date, time, type, id) de un movimiento como cursor opaco"""
+    raw = json.dumps([key["date"].isoformat(), key["time"].isoformat(), key["movement_type"], key["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decodifica un cursor generado por encode_cursor"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw_date, raw_time, movement_type, movement_id = json.loads(base64.urlsafe_b64decode(padded))
+        if movement_type not in (INCOME_TYPE, EXPENSE_TYPE):
+            raise ValueError(movement_type)
+        return {
+            "date": date.fromisoformat(raw_date),
+            "time": time.fromisoformat(raw_time),
+            "movement_type": movement_type,
+            "id": int(movement_id),
+        }
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError) as e:
+        raise InvalidCursor(str(e))
+
+
+def _after_cursor(movement_type, cursor):
+    """
+    Condición "viene después del cursor" para una de las ramas del UNION.
+    Como el tipo es constante en cada rama, la comparación de la tupla
+    (date, time, type, id) se reduce a filtros simples sobre el índice.
+    """
+    condition = Q(date__lt=cursor["date"]) | Q(date=cursor["date"], time__lt=cursor["time"])
+
+    if movement_type < cursor["movement_type"]:
+        condition |= Q(date=cursor["date"], time=cursor["time"])
+    elif movement_type == cursor["movement_type"]:
+        condition |= Q(date=cursor["date"], time=cursor["time"], id__lt=cursor["id"])
+
+    return condition
+
+
+def _branch(model, movement_type, user_id, cursor, limit):
+    queryset = model.objects.filter(user_id=user_id)
+    if cursor:
+        queryset = queryset.filter(_after_cursor(movement_type, cursor))
+
+    queryset = queryset.annotate(
+        movement_type=Value(movement_type, output_field=CharField())
+    ).values("id", "date", "time", "movement_type")
+
+    # En Postgres cada rama se corta con su propio ORDER BY ... LIMIT (usa el
+    # índice user/date/time); SQLite no permite LIMIT dentro de un UNION
+    if connection.features.supports_slicing_ordering_in_compound:
+        return queryset.order_by("-date", "-time", "-id")[:limit]
+    return queryset.order_by()
+
+
+def fetch_movement_keys(user_id, limit, offset=0, cursor=None):
+    """
+    Devuelve hasta `limit` claves de movimientos (ingresos y gastos combinados)
+    con un único UNION ALL ... ORDER BY ... LIMIT en SQL.
+    """
+    branch_limit = offset + limit
+    incomes = _branch(Income, INCOME_TYPE, user_id, cursor, branch_limit)
+    expenses = _branch(Expense, EXPENSE_TYPE, user_id, cursor, branch_limit)
+
+    combined = incomes.union(expenses, all=True).order_by(*FEED_ORDERING)
+    return list(combined[offset:offset + limit])
+
+
+def load_movements(keys):
+    """
+    Carga las filas completas de las claves indicadas (una consulta por tipo)
+    y las devuelve en el mismo orden como tuplas (tipo, instancia).
+    """
+    income_ids = [key["id"] for key in keys if key["movement_type"] == INCOME_TYPE]
+    expense_ids = [key["id"] for key in keys if key["movement_type"] == EXPENSE_TYPE]
+
+    instances = {
+        INCOME_TYPE: Income.objects.in_bulk(income_ids) if income_ids else {},
+        EXPENSE_TYPE: Expense.objects.in_bulk(expense_ids) if expense_ids else {},
+    }
+
+    movements = []
+    for key in keys:
+        instance = instances[key["movement_type"]].get(key["id"])
+        if instance is not None:
+            movements.append((key["movement_type"], instance))
+    return movements
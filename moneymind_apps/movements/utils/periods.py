@@ -0,0 +1,53 @@
+from datetime import date, timedelta
+from typing import NamedTuple
+
+
+class Period(NamedTuple):
+    """
+    Rango de fechas semiabierto [start, end).
+
+    Se filtra con date >= start AND date < end en lugar de extraer mes/año de
+    la columna, así Postgres puede usar los índices (user_id, date, time).
+    """
+    start: date
+    end: date
+
+    def as_filter(self, field="date"):
+        """Devuelve los kwargs para .filter() sobre el campo indicado"""
+        return {f"{field}__gte": self.start, f"{field}__lt": self.end}
+
+    @property
+    def last_day(self):
+        """Último día incluido en el período"""
+        return self.end - timedelta(days=1)
+
+    @property
+    def days(self):
+        """Cantidad de días del período"""
+        return (self.end - self.start).days
+
+
+def month_period(year, month):
+    """Período de un mes completo"""
+    start = date(int(year), int(month), 1)
+    if start.month == 12:
+        end = date(start.year + 1, 1, 1)
+    else:
+        end = date(start.year, start.month + 1, 1)
+    return Period(start, end)
+
+
+def year_period(year):
+    """Período de un año completo"""
+    return Period(date(int(year), 1, 1), date(int(year) + 1, 1, 1))
+
+
+def date_range_period(start_date, end_date):
+    """Período a partir de un rango personalizado con ambos extremos incluidos"""
+    return Period(start_date, end_date + timedelta(days=1))
+
+
+def shift_month(year, month, offset):
+    """Devuelve (año, mes) desplazado `offset` meses (negativo hacia atrás)"""
+    index = int(year) * 12 + (int(month) - 1) + offset
+    return index // 12, index % 12 + 1
@@ -0,0 +1,146 @@
+import logging
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from moneymind_apps.movements.models import ReceiptAnalysisJob, ReceiptJobStatus, ReceiptKind
+from moneymind_apps.movements.utils.services.gemini_api import (
+    analyze_expense,
+    analyze_income,
+    EXPENSE_PROMPT_VERSION,
+    INCOME_PROMPT_VERSION,
+)
+from moneymind_apps.movements.utils.services.image_preprocessing import prepare_receipt_image
+from moneymind_apps.movements.utils.services.receipt_cache import (
+    analyze_with_cache,
+    get_cached_analysis,
+    is_cacheable,
+    receipt_cache_key,
+    store_analysis,
+)
+
+logger = logging.getLogger(__name__)
+
+# Resultado de un job cuyo análisis lanzó una excepción o cuyo worker murió
+JOB_ERROR_RESULT = {"error": "No se pudo analizar el recibo. Intenta nuevamente.", "code": "JOB_ERROR"}
+
+# Función de análisis y versión del prompt por tipo de recibo
+RECEIPT_ANALYZERS = {
+    ReceiptKind.EXPENSE.value: (analyze_expense, EXPENSE_PROMPT_VERSION),
+    ReceiptKind.INCOME.value: (analyze_income, INCOME_PROMPT_VERSION),
+}
+
+# Un job en "processing" más tiempo que esto se considera de un worker caído
+STALE_PROCESSING_AFTER = timedelta(minutes=5)
+
+
+def analyze_receipt_now(kind, image_bytes, content_type):
+    """Análisis síncrono (dentro del request) con caché por imagen"""
+    analyze, prompt_version = RECEIPT_ANALYZERS[kind]
+
+    def run(data):
+        prepared, mime_type = prepare_receipt_image(data, content_type)
+        return analyze(prepared, mime_type)
+
+    return analyze_with_cache(kind, image_bytes, prompt_version, run)
+
+
+def enqueue_receipt_job(kind, image_bytes, content_type):
+    """
+    Encola el análisis de un recibo. Si la misma imagen ya fue analizada
+    retorna (None, resultado) sin crear el job; si no, (job, None).
+    """
+    _, prompt_version = RECEIPT_ANALYZERS[kind]
+    key = receipt_cache_key(kind, image_bytes, prompt_version)
+
+    cached = get_cached_analysis(key)
+    if cached is not None:
+        return None, cached
+
+    # Se guarda la versión reducida: la fila pesa cientos de KB y no la foto original
+    prepared, mime_type = prepare_receipt_image(image_bytes, content_type)
+    job = ReceiptAnalysisJob.objects.create(
+        kind=kind,
+        image=prepared,
+        mime_type=mime_type,
+        cache_key=key
+    )
+    return job, None
+
+
+def claim_receipt_jobs(limit, max_attempts=3):
+    """
+    Toma hasta `limit` jobs pendientes (o abandonados por un worker caído) y los
+    marca como "processing". SKIP LOCKED permite varios workers en paralelo sin
+    que dos tomen el mismo job. Los abandonados que ya usaron `max_attempts`
+    intentos se marcan como fallidos en lugar de volver a tomarse.
+    """
+    stale_before = timezone.now() - STALE_PROCESSING_AFTER
+    stale = Q(status=ReceiptJobStatus.PROCESSING.value, started_at__lt=stale_before)
+
+    with transaction.atomic():
+        exhausted = ReceiptAnalysisJob.objects.filter(stale, attempts__gte=max_attempts).update(
+            status=ReceiptJobStatus.FAILED.value,
+            result=JOB_ERROR_RESULT,
+            image=None,
+            finished_at=timezone.now()
+        )
+        if exhausted:
+            logger.warning("%s jobs de recibos abandonados sin intentos restantes marcados como fallidos", exhausted)
+
+        jobs = list(
+            ReceiptAnalysisJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=ReceiptJobStatus.PENDING.value) | (stale & Q(attempts__lt=max_attempts))
+            ).order_by("created_at")[:limit]
+        )
+
+        if jobs:
+            ReceiptAnalysisJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=ReceiptJobStatus.PROCESSING.value,
+                started_at=timezone.now(),
+                attempts=F("attempts") + 1
+            )
+
+    return jobs
+
+
+def process_receipt_job(job, max_attempts=3):
+    """
+    Ejecuta el análisis de un job ya reclamado y guarda el resultado.
+    Los errores transitorios (y las excepciones del análisis) vuelven a
+    "pending" hasta agotar `max_attempts`; después el job queda fallido.
+    """
+    try:
+        analyze, _ = RECEIPT_ANALYZERS[job.kind]
+        result = analyze(bytes(job.image), job.mime_type)
+    except Exception:
+        logger.exception("No se pudo analizar el recibo del job %s", job.id)
+        result = JOB_ERROR_RESULT
+    attempts = job.attempts + 1
+
+    if not is_cacheable(result) and attempts < max_attempts:
+        ReceiptAnalysisJob.objects.filter(id=job.id).update(
+            status=ReceiptJobStatus.PENDING.value,
+            started_at=None
+        )
+        return ReceiptJobStatus.PENDING.value
+
+    store_analysis(job.cache_key, result)
+
+    status = ReceiptJobStatus.FAILED.value if "error" in result else ReceiptJobStatus.DONE.value
+    ReceiptAnalysisJob.objects.filter(id=job.id).update(
+        status=status,
+        result=result,
+        image=None,
+        finished_at=timezone.now()
+    )
+    return status
+
+
+def purge_finished_jobs(older_than):
+    """Elimina los jobs terminados hace más de `older_than` (timedelta)"""
+    deleted, _ = ReceiptAnalysisJob.objects.filter(
+        status__in=[ReceiptJobStatus.DONE.value, ReceiptJobStatus.FAILED.value],
+        finished_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
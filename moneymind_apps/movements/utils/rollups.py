@@ -0,0 +1,135 @@
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Sum, Count, F
+from django.db.models.functions import ExtractYear, ExtractMonth
+from moneymind_apps.movements.models import Expense, MonthlyCategoryTotal
+
+
+def _apply_to_rollup(user_id, expense_date, category, amount, count):
+    """
+    Suma `amount` y `count` a la fila (usuario, año, mes, categoría) del acumulado.
+    Debe ejecutarse dentro de la misma transacción que escribe el gasto.
+    """
+    rows = MonthlyCategoryTotal.objects.filter(
+        user_id=user_id,
+        year=expense_date.year,
+        month=expense_date.month,
+        category=category
+    )
+
+    updated = rows.update(total=F('total') + amount, count=F('count') + count)
+    if updated:
+        return
+
+    try:
+        # Savepoint para no invalidar la transacción externa si otra petición
+        # creó la misma fila en paralelo
+        with transaction.atomic():
+            MonthlyCategoryTotal.objects.create(
+                user_id=user_id,
+                year=expense_date.year,
+                month=expense_date.month,
+                category=category,
+                total=amount,
+                count=count
+            )
+    except IntegrityError:
+        rows.update(total=F('total') + amount, count=F('count') + count)
+
+
+def record_expense_in_rollup(expense):
+    """Agrega un gasto recién creado al acumulado mensual"""
+    _apply_to_rollup(expense.user_id, expense.date, expense.category, Decimal(expense.total), 1)
+
+
+def remove_expense_from_rollup(expense):
+    """Descuenta un gasto eliminado del acumulado mensual"""
+    _apply_to_rollup(expense.user_id, expense.date, expense.category, -Decimal(expense.total), -1)
+
+    # Sin gastos restantes la fila ya no aporta nada a los reportes
+    MonthlyCategoryTotal.objects.filter(
+        user_id=expense.user_id,
+        year=expense.date.year,
+        month=expense.date.month,
+        category=expense.category,
+        count__lte=0
+    ).delete()
+
+
+def rebuild_rollup_for_users(user_ids, dry_run=False):
+    """
+    Recalcula el acumulado de los usuarios indicados a partir de la tabla de gastos
+    y corrige solo las filas que difieren.
+
+    Retorna un diccionario con la cantidad de filas creadas, actualizadas y eliminadas.
+    """
+    from moneymind_apps.balances.models import Balance
+    from moneymind_apps.users.utils.data_version import bump_data_versions
+
+    stats = {"created": 0, "updated": 0, "deleted": 0}
+
+    with transaction.atomic():
+        # Los registros/eliminaciones de gastos actualizan el balance en su misma
+        # transacción, así que bloquear los balances evita perder escrituras concurrentes
+        list(Balance.objects.select_for_update().filter(user_id__in=user_ids).values_list('id', flat=True))
+
+        expected = {}
+        rows = Expense.objects.filter(
+            user_id__in=user_ids
+        ).annotate(
+            year=ExtractYear('date'),
+            month=ExtractMonth('date')
+        ).values('user_id', 'year', 'month', 'category').annotate(
+            total=Sum('total'),
+            count=Count('id')
+        ).order_by()
+
+        for row in rows:
+            key = (row['user_id'], row['year'], row['month'], row['category'])
+            expected[key] = (row['total'], row['count'])
+
+        existing = {
+            (item.user_id, item.year, item.month, item.category): item
+            for item in MonthlyCategoryTotal.objects.select_for_update().filter(user_id__in=user_ids)
+        }
+
+        to_create = []
+        to_update = []
+        for key, (total, count) in expected.items():
+            item = existing.pop(key, None)
+            if item is None:
+                user_id, year, month, category = key
+                to_create.append(MonthlyCategoryTotal(
+                    user_id=user_id,
+                    year=year,
+                    month=month,
+                    category=category,
+                    total=total,
+                    count=count
+                ))
+            elif item.total != total or item.count != count:
+                item.total = total
+                item.count = count
+                to_update.append(item)
+
+        # Lo que queda en `existing` ya no tiene gastos asociados
+        to_delete = [item.id for item in existing.values()]
+        changed_users = (
+            {item.user_id for item in to_create} |
+            {item.user_id for item in to_update} |
+            {item.user_id for item in existing.values()}
+        )
+
+        stats["created"] = len(to_create)
+        stats["updated"] = len(to_update)
+        stats["deleted"] = len(to_delete)
+
+        if not dry_run:
+            MonthlyCategoryTotal.objects.bulk_create(to_create)
+            MonthlyCategoryTotal.objects.bulk_update(to_update, ['total', 'count'])
+            MonthlyCategoryTotal.objects.filter(id__in=to_delete).delete()
+
+            # Las escrituras masivas no disparan señales: invalidar los reportes a mano
+            bump_data_versions(changed_users)
+
+    return stats
@@ -1,19 +1,131 @@
 import google.generativeai as genai
 from moneymind_apps.movements.utils.config import GOOGLE_API_KEY
 import json
+import logging
+from functools import wraps
 from moneymind_apps.movements.models import *
 from datetime import datetime, timedelta
 from decimal import Decimal
 from django.db.models import Sum, Count, Avg
+from django.conf import settings
+from moneymind_apps.movements.utils.services.sunat_qr import read_sunat_qr
+from moneymind_apps.movements.utils.spend_profile import build_spend_profile, category_label
+from moneymind_apps.monitoring.utils.metrics import inc_counter
+from moneymind_apps.monitoring.utils.request_timing import track_external_call
+
+logger = logging.getLogger(__name__)
 
 genai.configure(api_key=GOOGLE_API_KEY)
 
+# Subir la versión al cambiar un prompt invalida los resultados guardados en caché
+EXPENSE_PROMPT_VERSION = "expense-v2"
+INCOME_PROMPT_VERSION = "income-v1"
+
+
+def _generate_content(operation, model, contents):
+    """Llamada a Gemini cronometrada (Server-Timing del request y métricas por operación)"""
+    with track_external_call("gemini", operation):
+        return model.generate_content(contents)
+
+
+def _count_results(operation):
+    """Cuenta los resultados de un análisis de recibo por `code` (OK si no hubo error)"""
+    def decorator(analyze):
+        @wraps(analyze)
+        def wrapper(*args, **kwargs):
+            result = analyze(*args, **kwargs)
+            inc_counter("moneymind_gemini_results_total", operation, result.get("code") or "OK")
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+def _classify_expense(image_bytes: bytes, mime_type: str):
+    """
+    Consulta reducida a Gemini: solo categoría y lugar del recibo.
+    Retorna un diccionario con esas claves (en null si no se pudieron obtener);
+    si la consulta falló agrega `transient` para que se reintente.
+    """
+    model = genai.GenerativeModel("gemini-2.5-flash")
+
+    categories = ", ".join(category.value for category in Category)
+    prompt = f"""
+    Del recibo de la imagen devuelve SOLO un JSON con esta estructura:
+    {{"category": "categoria o null", "place": "nombre del comercio o null"}}
+
+    Categorías válidas (en minúsculas): {categories}
+    No escribas nada más fuera del JSON
+    """
+
+    try:
+        response = _generate_content(
+            "classify_expense",
+            model,
+            [
+                {
+                    "role": "user",
+                    "parts": [
+                        prompt,
+                        {"mime_type": mime_type, "data": image_bytes},
+                    ],
+                }
+            ]
+        )
+        result = response.text.strip() if response and response.text else ""
+        data = json.loads(result[result.find("{"):result.rfind("}") + 1])
+    except Exception as e:
+        logger.warning("Error clasificando recibo con Gemini: %s", e)
+        # Error de red o JSON malformado: el resultado no se guarda en caché
+        return {"category": None, "place": None, "transient": True}
+
+    category = data.get("category")
+    return {
+        "category": category.lower() if category else None,
+        "place": data.get("place") or None,
+    }
+
 
-def analyze_expense(image_path: str):
+def _expense_from_sunat_qr(receipt, image_bytes: bytes, mime_type: str):
+    """
+    Arma el resultado del análisis a partir del QR del comprobante electrónico.
+    Fecha y total salen del QR; categoría y lugar se piden al modelo con una
+    consulta reducida (salvo que RECEIPT_QR_CLASSIFY_WITH_MODEL esté desactivado).
+    `missing_fields` lista lo que el cliente debe pedir al usuario.
     """
-    Envía una imagen a Gemini y devuelve un JSON con info del recibo.
+    data = {
+        "valid": True,
+        "validation_error": None,
+        "category": None,
+        "place": None,
+        "date": receipt.issue_date.isoformat(),
+        "time": None,
+        "total": float(receipt.total),
+        "comment": receipt.document_label,
+    }
+
+    if getattr(settings, "RECEIPT_QR_CLASSIFY_WITH_MODEL", True):
+        data.update(_classify_expense(image_bytes, mime_type))
+
+    # La categoría es obligatoria al registrar el gasto; el lugar no
+    data["missing_fields"] = ["category"] if data["category"] is None else []
+    return data
+
+
+@_count_results("analyze_expense")
+def analyze_expense(image_bytes: bytes, mime_type: str = "image/jpeg"):
+    """
+    Envía una imagen (ya en memoria) a Gemini y devuelve un JSON con info del recibo.
     Si no se puede leer correctamente, retorna un mensaje de error.
+
+    Si la imagen trae el QR de un comprobante electrónico de SUNAT, la fecha y el
+    total se leen localmente sin llamar a Gemini.
     """
+    receipt = read_sunat_qr(image_bytes) if mime_type.startswith("image/") else None
+    if receipt:
+        return _expense_from_sunat_qr(receipt, image_bytes, mime_type)
+
     model = genai.GenerativeModel("gemini-2.5-flash")
 
     prompt = """
@@ -72,16 +184,15 @@ def analyze_expense(image_path: str):
     """
 
     try:
-        with open(image_path, "rb") as img_file:
-            image_bytes = img_file.read()
-
-        response = model.generate_content(
+        response = _generate_content(
+            "analyze_expense",
+            model,
             [
                 {
                     "role": "user",
                     "parts": [
                         prompt,
-                        {"mime_type": "image/jpeg", "data": image_bytes},
+                        {"mime_type": mime_type, "data": image_bytes},
                     ],
                 }
             ]
@@ -124,9 +235,10 @@ def analyze_expense(image_path: str):
         return {"error": f"Ocurrió un problema al analizar el recibo: {str(e)}", "code": "UNEXPECTED_ERROR"}
 
 
-def analyze_income(image_path: str):
+@_count_results("analyze_income")
+def analyze_income(image_bytes: bytes, mime_type: str = "image/jpeg"):
     """
-    Envía una imagen a Gemini y devuelve un JSON con info del ingreso.
+    Envía una imagen (ya en memoria) a Gemini y devuelve un JSON con info del ingreso.
     """
     model = genai.GenerativeModel("gemini-2.5-flash")
 
@@ -165,16 +277,15 @@ def analyze_income(image_path: str):
     """
 
     try:
-        with open(image_path, "rb") as img_file:
-            image_bytes = img_file.read()
-
-        response = model.generate_content(
+        response = _generate_content(
+            "analyze_income",
+            model,
             [
                 {
                     "role": "user",
                     "parts": [
                         prompt,
-                        {"mime_type": "image/jpeg", "data": image_bytes},
+                        {"mime_type": mime_type, "data": image_bytes},
                     ],
                 }
             ]
@@ -214,66 +325,31 @@ def generate_weekly_tip(user_id: int) -> str:
     """
     Genera un tip personalizado basado en el comportamiento de los últimos 30 días
     """
-    from datetime import datetime, timedelta
-
-    # Fecha de hace 30 días
-    thirty_days_ago = datetime.now() - timedelta(days=30)
+    # Comportamiento de los últimos 30 días en una sola consulta agrupada
+    profile = build_spend_profile(user_id, days=30)
 
     # 1. Total gastado en últimos 30 días
-    total_spent = Expense.objects.filter(
-        user_id=user_id,
-        date__gte=thirty_days_ago.date()
-    ).aggregate(total=Sum('total'))['total'] or Decimal('0')
-    total_spent = float(total_spent)
+    total_spent = float(profile.total)
 
     # 2. Categoría con mayor gasto
-    top_category = Expense.objects.filter(
-        user_id=user_id,
-        date__gte=thirty_days_ago.date()
-    ).values('category').annotate(
-        total=Sum('total')
-    ).order_by('-total').first()
-
     top_category_name = ""
     top_category_amount = 0
-    if top_category:
-        try:
-            cat_enum = Category(top_category['category'])
-            top_category_name = CATEGORY_LABELS.get(cat_enum, top_category['category'])
-            top_category_amount = float(top_category['total'])
-        except ValueError:
-            pass
+    if profile.top_category:
+        top_category, top_amount = profile.top_category
+        top_category_name = category_label(top_category)
+        top_category_amount = float(top_amount)
 
     # 3. Promedio de gasto diario
-    days_with_expenses = Expense.objects.filter(
-        user_id=user_id,
-        date__gte=thirty_days_ago.date()
-    ).values('date').distinct().count()
-
-    avg_daily_spend = total_spent / 30 if days_with_expenses > 0 else 0
+    avg_daily_spend = float(profile.avg_daily_spend)
 
     # 4. Número de transacciones
-    transaction_count = Expense.objects.filter(
-        user_id=user_id,
-        date__gte=thirty_days_ago.date()
-    ).count()
+    transaction_count = profile.transaction_count
 
     # 5. Categorías más frecuentes (top 3)
-    frequent_categories = Expense.objects.filter(
-        user_id=user_id,
-        date__gte=thirty_days_ago.date()
-    ).values('category').annotate(
-        count=Count('id')
-    ).order_by('-count')[:3]
-
-    frequent_categories_list = []
-    for cat in frequent_categories:
-        try:
-            cat_enum = Category(cat['category'])
-            cat_name = CATEGORY_LABELS.get(cat_enum, cat['category'])
-            frequent_categories_list.append(f"{cat_name} ({cat['count']} veces)")
-        except ValueError:
-            pass
+    frequent_categories_list = [
+        f"{category_label(category)} ({count} veces)"
+        for category, count in profile.frequent_categories(3)
+    ]
 
     # Crear el prompt para Gemini
     model = genai.GenerativeModel("gemini-2.0-flash-exp")
@@ -307,7 +383,7 @@ Genera el consejo ahora:
 """
 
     try:
-        response = model.generate_content(prompt)
+        response = _generate_content("weekly_tip", model, prompt)
         tip = response.text.strip() if response and response.text else "Revisa tus gastos semanalmente para mantener el control de tu presupuesto."
 
         # Limpiar cualquier formato markdown que pudiera venir
@@ -316,7 +392,7 @@ Genera el consejo ahora:
         return tip
 
     except Exception as e:
-        print(f"Error generando tip con Gemini: {str(e)}")
+        logger.warning("Error generando tip con Gemini: %s", e)
         return "Revisa tus gastos semanalmente y ajusta tu presupuesto según tus necesidades."
 
 def _generate_all_chart_comments(chart_data_list):
@@ -345,7 +421,7 @@ def _generate_all_chart_comments(chart_data_list):
     model = genai.GenerativeModel("gemini-2.0-flash-exp")
 
     try:
-        response = model.generate_content(prompt)
+        response = _generate_content("chart_comments", model, prompt)
         text = response.text.strip()
         comments = [c.strip() for c in text.split("||")]
 
@@ -356,7 +432,7 @@ def _generate_all_chart_comments(chart_data_list):
         return comments[:5]
 
     except Exception as e:
-        print("Error en _generate_all_chart_comments:", e)
+        logger.warning("Error en _generate_all_chart_comments: %s", e)
         return ["Error al generar comentario"] * 5
 
 
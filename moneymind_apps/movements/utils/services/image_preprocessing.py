@@ -0,0 +1,49 @@
+from io import BytesIO
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+DEFAULT_MAX_EDGE = 1600
+DEFAULT_JPEG_QUALITY = 80
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def prepare_receipt_image(image_bytes, content_type=None):
+    """
+    Prepara la foto de un recibo antes de enviarla a Gemini, todo en memoria:
+    corrige la rotación EXIF, reduce el lado mayor a RECEIPT_IMAGE_MAX_EDGE,
+    pasa a escala de grises y vuelve a codificar en JPEG.
+
+    Retorna (bytes, mime_type). Si Pillow no reconoce el archivo se devuelve
+    el original tal cual con el tipo que informó el cliente.
+    """
+    max_edge = _setting("RECEIPT_IMAGE_MAX_EDGE", DEFAULT_MAX_EDGE)
+    quality = _setting("RECEIPT_IMAGE_JPEG_QUALITY", DEFAULT_JPEG_QUALITY)
+    grayscale = _setting("RECEIPT_IMAGE_GRAYSCALE", True)
+
+    try:
+        with Image.open(BytesIO(image_bytes)) as img:
+            original_format = img.format
+            mode = "L" if grayscale else "RGB"
+
+            # En JPEG el decodificador puede escalar por 1/2, 1/4 u 1/8 al leer,
+            # así una foto de 12MP nunca se descomprime a tamaño completo
+            img.draft(mode, (max_edge, max_edge))
+
+            img = ImageOps.exif_transpose(img)
+            img = img.convert(mode)
+            img.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+
+            output = BytesIO()
+            img.save(output, format="JPEG", quality=quality, optimize=True)
+            processed = output.getvalue()
+    except (UnidentifiedImageError, OSError, ValueError):
+        return image_bytes, content_type or "image/jpeg"
+
+    # Imágenes ya pequeñas pueden crecer al recodificar: se envía la más liviana
+    if len(processed) >= len(image_bytes) and original_format in ("JPEG", "PNG", "WEBP"):
+        return image_bytes, Image.MIME[original_format]
+
+    return processed, "image/jpeg"
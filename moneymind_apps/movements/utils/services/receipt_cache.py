@@ -0,0 +1,55 @@
+import hashlib
+from django.core.cache import caches
+from moneymind_apps.monitoring.utils.metrics import inc_counter
+
+RECEIPT_CACHE_ALIAS = "receipts"
+
+# Errores deterministas para una misma imagen: vale la pena guardarlos.
+# Los errores transitorios (respuesta vacía, JSON malformado, red) se reintentan.
+CACHEABLE_ERROR_CODES = {"INVALID_IMAGE"}
+
+
+def receipt_cache_key(kind, image_bytes, prompt_version):
+    """Clave por tipo de análisis, versión del prompt y SHA-256 de la imagen"""
+    digest = hashlib.sha256(image_bytes).hexdigest()
+    return f"receipt:{kind}:{prompt_version}:{digest}"
+
+
+def get_cached_analysis(key):
+    """Resultado guardado para la clave o None"""
+    cached = caches[RECEIPT_CACHE_ALIAS].get(key)
+    inc_counter("moneymind_cache_requests_total", RECEIPT_CACHE_ALIAS, "miss" if cached is None else "hit")
+    return cached
+
+
+def is_cacheable(result):
+    """
+    Éxitos y errores deterministas se guardan; los transitorios no, tampoco un
+    resultado parcial marcado con `transient` (QR leído pero sin clasificar)
+    """
+    if result.get("transient"):
+        return False
+    return "error" not in result or result.get("code") in CACHEABLE_ERROR_CODES
+
+
+def store_analysis(key, result):
+    """Guarda el resultado si corresponde según is_cacheable"""
+    if is_cacheable(result):
+        caches[RECEIPT_CACHE_ALIAS].set(key, result)
+
+
+def analyze_with_cache(kind, image_bytes, prompt_version, analyze):
+    """
+    Devuelve el análisis guardado para esta misma imagen si existe; si no,
+    llama a `analyze(image_bytes)` y guarda el resultado.
+    """
+    key = receipt_cache_key(kind, image_bytes, prompt_version)
+
+    cached = get_cached_analysis(key)
+    if cached is not None:
+        return cached
+
+    result = analyze(image_bytes)
+    store_analysis(key, result)
+
+    return result
@@ -0,0 +1,105 @@
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import NamedTuple
+import cv2
+import numpy as np
+
+# Tipos de comprobante electrónico de SUNAT que puede traer el QR
+DOCUMENT_TYPES = {
+    "01": "Factura",
+    "03": "Boleta",
+    "07": "Nota de crédito",
+    "08": "Nota de débito",
+    "12": "Ticket",
+}
+
+RUC_WEIGHTS = (5, 4, 3, 2, 7, 6, 5, 4, 3, 2)
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y")
+
+
+class SunatReceipt(NamedTuple):
+    ruc: str
+    document_type: str
+    series: str
+    number: str
+    igv: Decimal
+    total: Decimal
+    issue_date: date
+
+    @property
+    def document_label(self):
+        """Ej.: 'Boleta B001-00012345'"""
+        return f"{DOCUMENT_TYPES[self.document_type]} {self.series}-{self.number}"
+
+
+def is_valid_ruc(ruc):
+    """Valida longitud, prefijo y dígito verificador (módulo 11) de un RUC"""
+    if len(ruc) != 11 or not ruc.isdigit() or ruc[:2] not in ("10", "15", "16", "17", "20"):
+        return False
+
+    remainder = 11 - sum(int(d) * w for d, w in zip(ruc, RUC_WEIGHTS)) % 11
+    check_digit = {10: 0, 11: 1}.get(remainder, remainder)
+    return int(ruc[10]) == check_digit
+
+
+def _parse_amount(value):
+    try:
+        amount = Decimal(value.strip().replace(",", ""))
+    except InvalidOperation:
+        return None
+    return amount if amount.is_finite() and amount >= 0 else None
+
+
+def _parse_date(value):
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def parse_sunat_payload(text):
+    """
+    Interpreta el contenido del QR de un comprobante electrónico:
+    RUC|TIPO|SERIE|NUMERO|IGV|TOTAL|FECHA|TIPO_DOC_ADQ|NUM_DOC_ADQ|...
+
+    Retorna un SunatReceipt o None si el texto no es un QR de SUNAT válido.
+    """
+    fields = [field.strip() for field in (text or "").split("|")]
+    if len(fields) < 7:
+        return None
+
+    ruc, document_type, series, number, raw_igv, raw_total, raw_date = fields[:7]
+
+    if not is_valid_ruc(ruc) or document_type not in DOCUMENT_TYPES:
+        return None
+    if not series or not number.isdigit():
+        return None
+
+    igv = _parse_amount(raw_igv) if raw_igv else Decimal("0")
+    total = _parse_amount(raw_total)
+    issue_date = _parse_date(raw_date)
+
+    if igv is None or not total or issue_date is None:
+        return None
+
+    return SunatReceipt(ruc, document_type, series.upper(), number, igv, total, issue_date)
+
+
+def read_sunat_qr(image_bytes):
+    """
+    Busca y decodifica el QR del comprobante con OpenCV, sin llamar a ningún servicio.
+    Retorna un SunatReceipt o None si no hay QR o su contenido no es válido.
+    """
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image = cv2.imdecode(buffer, cv2.IMREAD_GRAYSCALE)
+    if image is None:
+        return None
+
+    try:
+        text, _, _ = cv2.QRCodeDetector().detectAndDecode(image)
+    except cv2.error:
+        return None
+
+    return parse_sunat_payload(text)
@@ -0,0 +1,109 @@
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from decimal import Decimal
+from django.db.models import Count, Sum
+from moneymind_apps.movements.models import (
+    Expense,
+    Category,
+    ExpenseType,
+    CATEGORY_EXPENSE_TYPE_MAP,
+    CATEGORY_LABELS,
+)
+
+
+@dataclass(frozen=True)
+class SpendProfile:
+    """
+    Resumen del comportamiento de gasto de un usuario en una ventana de días.
+    Todas las métricas salen de una sola consulta agrupada por (categoría, fecha).
+    """
+    user_id: int
+    start: date
+    days: int
+    total: Decimal = Decimal("0")
+    transaction_count: int = 0
+    active_days: int = 0
+    category_totals: dict = field(default_factory=dict)  # {categoria: Decimal}
+    category_counts: dict = field(default_factory=dict)  # {categoria: int}
+    expense_type_totals: dict = field(default_factory=dict)  # {esencial/no_esencial: Decimal}
+
+    @property
+    def avg_daily_spend(self):
+        """Promedio diario sobre toda la ventana (0 si no hubo gastos)"""
+        return self.total / self.days if self.active_days else Decimal("0")
+
+    @property
+    def top_category(self):
+        """(categoria, total) con mayor gasto o None"""
+        if not self.category_totals:
+            return None
+        return max(self.category_totals.items(), key=lambda item: item[1])
+
+    def frequent_categories(self, limit=3):
+        """[(categoria, cantidad)] de las categorías con más transacciones"""
+        ranked = sorted(self.category_counts.items(), key=lambda item: item[1], reverse=True)
+        return ranked[:limit]
+
+
+def category_label(category):
+    """Nombre legible de una categoría (o el valor tal cual si no es conocida)"""
+    try:
+        return CATEGORY_LABELS.get(Category(category), category)
+    except ValueError:
+        return category
+
+
+def build_spend_profile(user_id, days=30, today=None):
+    """
+    Construye el SpendProfile de los últimos `days` días con UNA consulta.
+
+    Agrupar por (categoría, fecha) da a lo sumo 16 x `days` filas, de las que se
+    derivan totales, cantidad de transacciones, días con gasto, rankings por
+    categoría y el reparto esencial / no esencial.
+    """
+    today = today or date.today()
+    start = today - timedelta(days=days)
+
+    rows = Expense.objects.filter(
+        user_id=user_id,
+        date__gte=start
+    ).values('category', 'date').annotate(
+        total=Sum('total'),
+        count=Count('id')
+    ).order_by()
+
+    total = Decimal("0")
+    transaction_count = 0
+    active_dates = set()
+    category_totals = {}
+    category_counts = {}
+    expense_type_totals = {expense_type.value: Decimal("0") for expense_type in ExpenseType}
+
+    for row in rows:
+        category = row['category']
+        total += row['total']
+        transaction_count += row['count']
+        active_dates.add(row['date'])
+        category_totals[category] = category_totals.get(category, Decimal("0")) + row['total']
+        category_counts[category] = category_counts.get(category, 0) + row['count']
+
+    for category, category_total in category_totals.items():
+        try:
+            expense_type = CATEGORY_EXPENSE_TYPE_MAP.get(Category(category))
+        except ValueError:
+            continue
+
+        if expense_type:
+            expense_type_totals[expense_type.value] += category_total
+
+    return SpendProfile(
+        user_id=user_id,
+        start=start,
+        days=days,
+        total=total,
+        transaction_count=transaction_count,
+        active_days=len(active_dates),
+        category_totals=category_totals,
+        category_counts=category_counts,
+        expense_type_totals=expense_type_totals,
+    )
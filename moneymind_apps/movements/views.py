@@ -3,95 +3,122 @@ from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from rest_framework import status
 from django.shortcuts import get_object_or_404
-import os
-import tempfile
-from moneymind_apps.movements.utils.services.gemini_api import analyze_expense, analyze_income
+from django.urls import reverse
+from moneymind_apps.movements.utils.receipt_jobs import analyze_receipt_now, enqueue_receipt_job
 from django.contrib.auth import get_user_model
+from django.db import transaction
 from django.db.models import Q
 from moneymind_apps.balances.models import Balance
 from .serializers import ExpenseSerializer, IncomeSerializer
 from decimal import Decimal
-from moneymind_apps.movements.models import Expense, Income
+from moneymind_apps.movements.models import (
+    Expense,
+    Income,
+    ReceiptAnalysisJob,
+    ReceiptJobStatus,
+    ReceiptKind,
+)
+from moneymind_apps.movements.utils.rollups import record_expense_in_rollup, remove_expense_from_rollup
+from moneymind_apps.movements.utils.movement_feed import (
+    INCOME_TYPE,
+    InvalidCursor,
+    decode_cursor,
+    encode_cursor,
+    fetch_movement_keys,
+    load_movements,
+)
 from itertools import chain
 from operator import attrgetter
 
-from moneymind_apps.balances.views import check_and_register_monthly_balance
+from moneymind_apps.balances.views import check_and_register_monthly_balance, apply_balance_delta
+from moneymind_apps.users.utils.etags import etag_on_user_state, user_id_from_url
 
 User = get_user_model()  # Obtiene tu modelo User personalizado
 
 
-class ExpenseReceiptGeminiView(APIView):
-    permission_classes = [AllowAny]
+def _analyze_receipt_request(request, kind):
+    """
+    Lógica común de analyze-expense/ y analyze-income/.
 
-    def post(self, request):
-        image = request.FILES.get("file")
-        if not image:
+    Con `?async=true` solo se encola el análisis y se responde 202 con el id del
+    job (consultar en analyze-jobs/<id>/); si no, se analiza dentro del request.
+    """
+    image = request.FILES.get("file")
+    if not image:
+        return Response(
+            {"message": "No se envió ninguna imagen", "code": "NO_IMAGE"},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    image_bytes = b"".join(image.chunks())
+    async_mode = request.query_params.get("async", "").lower() in ("1", "true")
+
+    if async_mode:
+        job, result = enqueue_receipt_job(kind, image_bytes, image.content_type)
+        if job:
             return Response(
-                {"message": "No se envió ninguna imagen", "code": "NO_IMAGE"},
-                status=status.HTTP_400_BAD_REQUEST
+                {
+                    "job_id": str(job.id),
+                    "status": job.status,
+                    "status_url": reverse("receipt-analysis-job", args=[job.id])
+                },
+                status=status.HTTP_202_ACCEPTED
             )
+    else:
+        # Reintentos con la misma foto se responden desde caché sin llamar a Gemini
+        result = analyze_receipt_now(kind, image_bytes, image.content_type)
 
-        # Guardar imagen temporalmente
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-            for chunk in image.chunks():
-                tmp_file.write(chunk)
-            tmp_path = tmp_file.name
+    # Si hay un error de validación
+    if "error" in result:
+        return Response(
+            {
+                "message": result["error"],
+                "code": result.get("code", "ANALYSIS_ERROR")
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
 
-        try:
-            result = analyze_expense(tmp_path)
+    # Si el análisis fue exitoso
+    return Response({"data": result}, status=status.HTTP_200_OK)
 
-            # Si hay un error de validación
-            if "error" in result:
-                return Response(
-                    {
-                        "message": result["error"],
-                        "code": result.get("code", "ANALYSIS_ERROR")
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
 
-            # Si el análisis fue exitoso
-            return Response({"data": result}, status=status.HTTP_200_OK)
+class ExpenseReceiptGeminiView(APIView):
+    permission_classes = [AllowAny]
 
-        finally:
-            os.remove(tmp_path)
+    def post(self, request):
+        return _analyze_receipt_request(request, ReceiptKind.EXPENSE.value)
 
 
 class IncomeReceiptGeminiView(APIView):
     permission_classes = [AllowAny]
 
     def post(self, request):
-        image = request.FILES.get("file")
-        if not image:
-            return Response(
-                {"message": "No se envió ninguna imagen", "code": "NO_IMAGE"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        return _analyze_receipt_request(request, ReceiptKind.INCOME.value)
 
-        # Guardar imagen temporalmente
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as tmp_file:
-            for chunk in image.chunks():
-                tmp_file.write(chunk)
-            tmp_path = tmp_file.name
 
-        try:
-            result = analyze_income(tmp_path)
+class ReceiptAnalysisJobView(APIView):
+    """
+    Estado de un análisis encolado con ?async=true.
+    Mientras el job esté "pending"/"processing" el cliente debe volver a consultar.
+    """
+    permission_classes = [AllowAny]
 
-            # Si hay un error de validación
-            if "error" in result:
-                return Response(
-                    {
-                        "message": result["error"],
-                        "code": result.get("code", "ANALYSIS_ERROR")
-                    },
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+    def get(self, request, job_id):
+        job = get_object_or_404(
+            ReceiptAnalysisJob.objects.only("id", "kind", "status", "result"),
+            id=job_id
+        )
 
-            # Si el análisis fue exitoso
-            return Response({"data": result}, status=status.HTTP_200_OK)
+        response = {"job_id": str(job.id), "kind": job.kind, "status": job.status}
+
+        if job.status == ReceiptJobStatus.DONE.value:
+            response["data"] = job.result
+        elif job.status == ReceiptJobStatus.FAILED.value:
+            response["message"] = job.result["error"]
+            response["code"] = job.result.get("code", "ANALYSIS_ERROR")
+
+        return Response(response, status=status.HTTP_200_OK)
 
-        finally:
-            os.remove(tmp_path)
 
 class ExpenseCreateView(APIView):
     permission_classes = [AllowAny]
@@ -125,11 +152,22 @@ class ExpenseCreateView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # 👇 Usamos serializer.save() que internamente resuelve el user_id → user
-            expense = serializer.save()
-            balance = expense.user.balance
-            balance.current_amount -= Decimal(expense.total)
-            balance.save()
+            with transaction.atomic():
+                # 👇 Usamos serializer.save() que internamente resuelve el user_id → user
+                expense = serializer.save()
+
+                # Restar del balance con un UPDATE atómico en la misma transacción
+                try:
+                    balance = apply_balance_delta(expense.user_id, -Decimal(expense.total))
+                except Balance.DoesNotExist:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"error": "El usuario no tiene un balance asociado"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+
+                # Mantener el acumulado mensual en la misma transacción
+                record_expense_in_rollup(expense)
 
             return Response(
                 {
@@ -173,12 +211,19 @@ class IncomeCreateView(APIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Crear el income normalmente (serializer se encarga de mapear user_id → user)
-            income = serializer.save()
+            with transaction.atomic():
+                # Crear el income normalmente (serializer se encarga de mapear user_id → user)
+                income = serializer.save()
 
-            balance = income.user.balance  # ✅ Aquí ya tenemos el user correcto
-            balance.current_amount += Decimal(income.total)
-            balance.save()
+                # Sumar al balance con un UPDATE atómico en la misma transacción
+                try:
+                    balance = apply_balance_delta(income.user_id, Decimal(income.total))
+                except Balance.DoesNotExist:
+                    transaction.set_rollback(True)
+                    return Response(
+                        {"error": "El usuario no tiene un balance asociado"},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
 
             return Response(
                 {
@@ -197,26 +242,23 @@ class IncomeDeleteView(APIView):
     authentication_classes = []
 
     def delete(self, request, pk, *args, **kwargs):
-        # Obtener el income o devolver 404 si no existe
-        income = get_object_or_404(Income, id=pk)
-
-        user = income.user
-        income_amount = income.total
-
-        try:
-            balance = user.balance
-        except Balance.DoesNotExist:
-            return Response(
-                {"error": "El usuario no tiene un balance asociado"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # RESTAR el monto del income del balance (porque se elimina un ingreso)
-        balance.current_amount = balance.current_amount - Decimal(income_amount)
-        balance.save()
+        with transaction.atomic():
+            # Bloquear el income para que dos eliminaciones simultáneas no
+            # descuenten el monto dos veces (404 si no existe)
+            income = get_object_or_404(Income.objects.select_for_update(), id=pk)
+            income_amount = income.total
+
+            # RESTAR el monto del income del balance (porque se elimina un ingreso)
+            try:
+                balance = apply_balance_delta(income.user_id, -Decimal(income_amount))
+            except Balance.DoesNotExist:
+                return Response(
+                    {"error": "El usuario no tiene un balance asociado"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        # Eliminar el income
-        income.delete()
+            # Eliminar el income
+            income.delete()
 
         return Response(
             {
@@ -233,26 +275,24 @@ class ExpenseDeleteView(APIView):
     authentication_classes = []
 
     def delete(self, request, pk, *args, **kwargs):
-        # Obtener el expense o devolver 404 si no existe
-        expense = get_object_or_404(Expense, id=pk)
-
-        user = expense.user
-        expense_amount = expense.total
-
-        try:
-            balance = user.balance
-        except Balance.DoesNotExist:
-            return Response(
-                {"error": "El usuario no tiene un balance asociado"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-
-        # SUMAR el monto del expense al balance (porque se elimina un gasto)
-        balance.current_amount = balance.current_amount + Decimal(expense_amount)
-        balance.save()
+        with transaction.atomic():
+            # Bloquear el expense para que dos eliminaciones simultáneas no
+            # devuelvan el monto dos veces (404 si no existe)
+            expense = get_object_or_404(Expense.objects.select_for_update(), id=pk)
+            expense_amount = expense.total
+
+            # SUMAR el monto del expense al balance (porque se elimina un gasto)
+            try:
+                balance = apply_balance_delta(expense.user_id, Decimal(expense_amount))
+            except Balance.DoesNotExist:
+                return Response(
+                    {"error": "El usuario no tiene un balance asociado"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
 
-        # Eliminar el expense
-        expense.delete()
+            # Descontar del acumulado mensual y eliminar el expense
+            remove_expense_from_rollup(expense)
+            expense.delete()
 
         return Response(
             {
@@ -268,6 +308,7 @@ class ScanDashboardView(APIView):
     permission_classes = [AllowAny]
     authentication_classes = []
 
+    @etag_on_user_state(user_id_from_url)
     def get(self, request, user_id, *args, **kwargs):
 
         check_and_register_monthly_balance(user_id)
@@ -347,32 +388,17 @@ class AllMovementsOptimizedView(APIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Obtener movimientos (ordenados descendente por fecha y hora)
-        all_incomes = Income.objects.filter(user=user).order_by('-date', '-time')
-        all_expenses = Expense.objects.filter(user=user).order_by('-date', '-time')
-
-        combined_movements = list(chain(all_incomes, all_expenses))
-        combined_movements.sort(key=attrgetter('date', 'time'), reverse=True)
+        # Modo cursor: se activa enviando ?cursor= (vacío para la primera página)
+        if 'cursor' in request.query_params:
+            return self._get_cursor_page(user, request.query_params.get('cursor'), page_size)
 
-        # Calcular offset y límite
+        # Calcular offset y límite; la combinación y el orden se resuelven en SQL
         offset = (page - 1) * page_size
-        movements_slice = combined_movements[offset:offset + page_size]
-
-        # Serializar
-        movements_data = []
-        for movement in movements_slice:
-            if isinstance(movement, Income):
-                serializer = IncomeSerializer(movement)
-                movement_data = serializer.data
-                movement_data['type'] = 'income'
-            else:
-                serializer = ExpenseSerializer(movement)
-                movement_data = serializer.data
-                movement_data['type'] = 'expense'
-            movements_data.append(movement_data)
+        keys = fetch_movement_keys(user.id, page_size, offset=offset)
+        movements_data = self._serialize(load_movements(keys))
 
         # Calcular si hay más
-        total_count = len(combined_movements)
+        total_count = Income.objects.filter(user=user).count() + Expense.objects.filter(user=user).count()
         has_more = (offset + page_size) < total_count
 
         return Response(
@@ -388,3 +414,44 @@ class AllMovementsOptimizedView(APIView):
             status=status.HTTP_200_OK
         )
 
+    def _get_cursor_page(self, user, cursor, page_size):
+        """
+        Paginación por cursor (date, time, type, id): cada página es un
+        UNION ALL acotado con LIMIT, sin importar el tamaño del historial.
+        """
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except InvalidCursor:
+            return Response(
+                {"error": "El parámetro cursor no es válido"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Pedimos un elemento extra para saber si hay más páginas
+        keys = fetch_movement_keys(user.id, page_size + 1, cursor=after)
+        has_more = len(keys) > page_size
+        keys = keys[:page_size]
+
+        movements_data = self._serialize(load_movements(keys))
+
+        return Response(
+            {
+                "movements": movements_data,
+                "has_more": has_more,
+                "page_size": page_size,
+                "loaded_count": len(movements_data),
+                "next_cursor": encode_cursor(keys[-1]) if has_more else None
+            },
+            status=status.HTTP_200_OK
+        )
+
+    def _serialize(self, movements):
+        movements_data = []
+        for movement_type, movement in movements:
+            if movement_type == INCOME_TYPE:
+                movement_data = IncomeSerializer(movement).data
+            else:
+                movement_data = ExpenseSerializer(movement).data
+            movement_data['type'] = movement_type
+            movements_data.append(movement_data)
+        return movements_data
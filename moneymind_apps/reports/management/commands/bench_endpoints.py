@@ -0,0 +1,141 @@
+import json
+import platform
+from datetime import date
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from moneymind.testing import stub_external_services
+from moneymind_apps.reports.utils.benchmark import (
+    BENCHMARK_ENDPOINTS,
+    benchmark_endpoint,
+    compare_results,
+    seed_benchmark_user,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide latencia (p50/p95/p99), consultas SQL y pico de memoria de los endpoints "
+        "con el cliente de pruebas de Django, sobre una base de datos de prueba sembrada "
+        "con distintos volúmenes de movimientos por usuario. Gemini y OneSignal se simulan. "
+        "Escribe los resultados en JSON para comparar corridas."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes",
+            type=int,
+            nargs="+",
+            default=[1000, 10000, 100000],
+            help="Movimientos por usuario de cada corrida (default: 1000 10000 100000)."
+        )
+        parser.add_argument(
+            "--iterations",
+            type=int,
+            default=20,
+            help="Requests cronometrados por endpoint (default: 20)."
+        )
+        parser.add_argument(
+            "--endpoint",
+            action="append",
+            dest="endpoints",
+            help="Solo endpoints cuyo nombre contenga este texto (se puede repetir)."
+        )
+        parser.add_argument(
+            "--warm-cache",
+            action="store_true",
+            help="No vaciar la caché de reportes entre requests (mide la respuesta cacheada)."
+        )
+        parser.add_argument(
+            "--output",
+            default="bench_endpoints.json",
+            help="Archivo JSON de resultados (default: bench_endpoints.json)."
+        )
+        parser.add_argument(
+            "--compare",
+            help="JSON de una corrida anterior; imprime el cambio de p95 por endpoint."
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reutiliza la base de datos de prueba en lugar de recrearla."
+        )
+
+    def handle(self, *args, **options):
+        endpoints = [
+            endpoint for endpoint in BENCHMARK_ENDPOINTS
+            if not options["endpoints"] or any(text in endpoint[0] for text in options["endpoints"])
+        ]
+        if not endpoints:
+            raise CommandError("Ningún endpoint coincide con --endpoint")
+
+        baseline = None
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                baseline = json.load(file)
+
+        # DEBUG apagado como en producción (y para que no se acumule connection.queries)
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+
+        try:
+            # Sin RequestTimingMiddleware: ni su costo ni sus logs entran en la medición
+            with stub_external_services(), override_settings(REQUEST_TIMING_SAMPLE_RATE=0):
+                results = self._run(endpoints, options)
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        with open(options["output"], "w") as file:
+            json.dump(results, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+        if baseline:
+            self._print_comparison(baseline, results)
+
+    def _run(self, endpoints, options):
+        today = date.today()
+        client = Client()
+        runs = []
+
+        for size in options["sizes"]:
+            user, movements = seed_benchmark_user(size, today=today)
+            params = {"user_id": user.id, "month": today.month, "year": today.year}
+            self.stdout.write(f"\n== {movements} movimientos (usuario {user.id}) ==")
+            self.stdout.write(f"{'endpoint':42} {'p50':>9} {'p95':>9} {'p99':>9} {'queries':>8} {'mem KiB':>9}")
+
+            results = []
+            for endpoint in endpoints:
+                result = benchmark_endpoint(
+                    client, endpoint, params, iterations=options["iterations"], warm_cache=options["warm_cache"]
+                )
+                results.append(result)
+
+                line = (
+                    f"{result['name']:42} {result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} "
+                    f"{result['queries']:>8} {result['peak_memory_kib']:>9}"
+                )
+                self.stdout.write(line if result["status"] < 400 else self.style.ERROR(f"{line} [{result['status']}]"))
+
+            runs.append({"size": size, "movements": movements, "endpoints": results})
+
+        return {
+            "generated_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "iterations": options["iterations"],
+            "warm_cache": options["warm_cache"],
+            "runs": runs,
+        }
+
+    def _print_comparison(self, baseline, results):
+        self.stdout.write(f"\n{'tamaño':>8} {'endpoint':42} {'p95 base':>10} {'p95 actual':>11} {'cambio':>8}")
+        for size, name, before, after, change in compare_results(baseline, results):
+            line = f"{size:>8} {name:42} {before:>10} {after:>11} {change:>7}%"
+            if change >= 10:
+                line = self.style.ERROR(line)
+            elif change <= -10:
+                line = self.style.SUCCESS(line)
+            self.stdout.write(line)
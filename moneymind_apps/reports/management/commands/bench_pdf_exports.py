@@ -0,0 +1,118 @@
+import json
+import os
+import platform
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from moneymind_apps.reports.utils.benchmark import benchmark_concurrent_exports, seed_benchmark_user
+from moneymind_apps.reports.utils import pdf_render
+from moneymind_apps.reports.utils.pdf_pool import get_pdf_executor, shutdown_pdf_executor
+
+EMPTY_PAYLOAD = {
+    "user_name": "", "period_label": "", "summary": [], "categories": [],
+    "movements_path": None, "movements_count": 0, "statistics": [],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Mide el throughput de N exportes PDF anuales simultáneos (hilos de un mismo "
+        "proceso, como un worker gthread de gunicorn) renderizando en el hilo del request "
+        "y en el pool de procesos (PDF_RENDER_PROCESSES), sobre una base de datos de prueba."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--movements",
+            type=int,
+            default=100000,
+            help="Movimientos del usuario sembrado, repartidos en 24 meses (default: 100000)."
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            nargs="+",
+            default=[1, 2, 4, 8],
+            help="Exportes simultáneos de cada corrida (default: 1 2 4 8)."
+        )
+        parser.add_argument(
+            "--rounds",
+            type=int,
+            default=3,
+            help="Rondas de exportes simultáneos por corrida (default: 3)."
+        )
+        parser.add_argument(
+            "--processes",
+            type=int,
+            default=max(1, settings.PDF_RENDER_PROCESSES),
+            help="Tamaño del pool de procesos a comparar (default: PDF_RENDER_PROCESSES)."
+        )
+        parser.add_argument(
+            "--output",
+            default="bench_pdf_exports.json",
+            help="Archivo JSON de resultados (default: bench_pdf_exports.json)."
+        )
+        parser.add_argument(
+            "--keepdb",
+            action="store_true",
+            help="Reutiliza la base de datos de prueba en lugar de recrearla."
+        )
+
+    def handle(self, *args, **options):
+        setup_test_environment(debug=False)
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options["keepdb"])
+
+        try:
+            with override_settings(REQUEST_TIMING_SAMPLE_RATE=0):
+                results = self._run(options)
+        finally:
+            shutdown_pdf_executor()
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            teardown_test_environment()
+
+        with open(options["output"], "w") as file:
+            json.dump(results, file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Resultados guardados en {options['output']}"))
+
+    def _run(self, options):
+        today = date.today()
+        user, movements = seed_benchmark_user(options["movements"], today=today)
+        # Año anterior completo: 12 meses del historial sembrado
+        start_date, end_date = date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+
+        modes = [("hilo del request", 0), (f"pool de {options['processes']} procesos", options["processes"])]
+        runs = []
+
+        self.stdout.write(f"== {movements} movimientos, PDF {start_date.year}, {os.cpu_count()} CPUs ==")
+        self.stdout.write(f"{'modo':24} {'simultáneos':>11} {'PDF/s':>8} {'p50':>9} {'p95':>9}")
+
+        for label, processes in modes:
+            with override_settings(PDF_RENDER_PROCESSES=processes):
+                if processes:
+                    # Arranque de los procesos (spawn) fuera de la medición
+                    list(get_pdf_executor().map(pdf_render.render_pdf, [EMPTY_PAYLOAD] * processes))
+
+                for concurrency in options["concurrency"]:
+                    result = benchmark_concurrent_exports(
+                        user, start_date, end_date, "pdf", concurrency, rounds=options["rounds"]
+                    )
+                    result["mode"] = label
+                    result["processes"] = processes
+                    runs.append(result)
+                    self.stdout.write(
+                        f"{label:24} {concurrency:>11} {result['exports_per_s']:>8} "
+                        f"{result['p50_ms']:>9} {result['p95_ms']:>9}"
+                    )
+
+        return {
+            "generated_at": timezone.now().isoformat(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "cpus": os.cpu_count(),
+            "movements": movements,
+            "rounds": options["rounds"],
+            "runs": runs,
+        }
@@ -0,0 +1,100 @@
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from moneymind_apps.reports.utils.export_jobs import (
+    claim_export_jobs,
+    process_export_job,
+    prune_export_artifacts,
+    purge_finished_export_jobs,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera los exportes Excel/PDF/CSV encolados con ?async=true en MEDIA_ROOT y "
+        "poda los archivos antiguos. Se pueden ejecutar varios workers en paralelo."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=2,
+            help="Jobs reclamados por iteración (default: 2)."
+        )
+        parser.add_argument(
+            "--poll-interval",
+            type=float,
+            default=1.0,
+            help="Segundos de espera cuando no hay jobs pendientes (default: 1)."
+        )
+        parser.add_argument(
+            "--max-attempts",
+            type=int,
+            default=3,
+            help="Intentos ante errores antes de marcar el job como fallido (default: 3)."
+        )
+        parser.add_argument(
+            "--max-age-hours",
+            type=int,
+            default=settings.EXPORT_ARTIFACTS_MAX_AGE_HOURS,
+            help="Elimina archivos y jobs terminados de más de estas horas "
+                 f"(default: {settings.EXPORT_ARTIFACTS_MAX_AGE_HOURS})."
+        )
+        parser.add_argument(
+            "--max-megabytes",
+            type=int,
+            default=settings.EXPORT_ARTIFACTS_MAX_BYTES // (1024 * 1024),
+            help="Tamaño máximo de los archivos generados; se eliminan los menos usados "
+                 f"(default: {settings.EXPORT_ARTIFACTS_MAX_BYTES // (1024 * 1024)})."
+        )
+        parser.add_argument(
+            "--prune-interval",
+            type=float,
+            default=300,
+            help="Segundos entre podas de archivos mientras el worker escucha (default: 300)."
+        )
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Procesa lo pendiente y termina en lugar de quedarse escuchando."
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options["batch_size"])
+        max_age = timedelta(hours=options["max_age_hours"])
+        max_bytes = options["max_megabytes"] * 1024 * 1024
+        processed = 0
+
+        self._prune(max_age, max_bytes)
+        last_prune = time.monotonic()
+
+        try:
+            while True:
+                if time.monotonic() - last_prune >= options["prune_interval"]:
+                    self._prune(max_age, max_bytes)
+                    last_prune = time.monotonic()
+
+                jobs = claim_export_jobs(batch_size)
+
+                if not jobs:
+                    if options["once"]:
+                        break
+                    time.sleep(options["poll_interval"])
+                    continue
+
+                for job in jobs:
+                    status = process_export_job(job, max_attempts=options["max_attempts"])
+                    processed += 1
+                    self.stdout.write(f"Job {job.id} ({job.file_format} {job.start_date}/{job.end_date}): {status}")
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(f"{processed} jobs procesados"))
+
+    def _prune(self, max_age, max_bytes):
+        removed = prune_export_artifacts(max_age, max_bytes)
+        purged = purge_finished_export_jobs(max_age)
+        if removed or purged:
+            self.stdout.write(f"{removed} archivos y {purged} jobs antiguos eliminados")
@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from django.db import connection
+from moneymind_apps.reports.utils.weekly_tips import refresh_weekly_tip, users_needing_weekly_tip
+
+
+def _refresh(user_id):
+    try:
+        return refresh_weekly_tip(user_id)
+    finally:
+        # Cada hilo abre su propia conexión a la base de datos
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Regenera con Gemini los tips semanales vencidos o por vencer y crea los de "
+        "usuarios que aún no tienen uno. Pensado para ejecutarse periódicamente (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=4,
+            help="Llamadas a Gemini en paralelo (default: 4)."
+        )
+        parser.add_argument(
+            "--expiring-within-hours",
+            type=int,
+            default=24,
+            help="Regenera también los tips que vencen dentro de estas horas (default: 24)."
+        )
+        parser.add_argument(
+            "--user",
+            type=int,
+            action="append",
+            dest="user_ids",
+            help="ID de usuario a procesar (se puede repetir). Por defecto todos."
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Solo lista los usuarios que se procesarían."
+        )
+
+    def handle(self, *args, **options):
+        user_ids = users_needing_weekly_tip(
+            expiring_within=timedelta(hours=options["expiring_within_hours"]),
+            user_ids=options["user_ids"]
+        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"[dry-run] {len(user_ids)} usuarios necesitan un tip nuevo: {user_ids}")
+            return
+
+        refreshed = 0
+        failed = 0
+
+        with ThreadPoolExecutor(max_workers=max(1, options["workers"])) as executor:
+            futures = {executor.submit(_refresh, user_id): user_id for user_id in user_ids}
+
+            for future in as_completed(futures):
+                user_id = futures[future]
+                try:
+                    future.result()
+                    refreshed += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"Usuario {user_id}: error regenerando tip ({e})")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{refreshed} tips regenerados, {failed} con error"
+        ))
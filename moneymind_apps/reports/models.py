@@ -1,3 +1,4 @@
+import uuid
 from django.db import models
 from django.conf import settings
 from enum import Enum
@@ -21,3 +22,55 @@ class WeeklyTip(models.Model):
         """Verifica si el tip tiene más de 7 días"""
         from datetime import datetime, timedelta
         return datetime.now() - self.created_at.replace(tzinfo=None) > timedelta(days=7)
+
+
+class ExportJobStatus(Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class ExportJob(models.Model):
+    """
+    Exporte encolado con ?async=true: `python manage.py process_export_jobs`
+    genera el archivo en MEDIA_ROOT y el cliente lo descarga cuando está listo.
+    El archivo se nombra con la versión de datos del usuario, así un exporte
+    repetido sin cambios en los datos reutiliza el archivo ya generado.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    report_type = models.CharField(max_length=10)
+    file_format = models.CharField(max_length=10)
+    start_date = models.DateField()
+    end_date = models.DateField()
+    data_version = models.BigIntegerField(default=0)
+    status = models.CharField(
+        max_length=12,
+        choices=[(tag.value, tag.value) for tag in ExportJobStatus],
+        default=ExportJobStatus.PENDING.value
+    )
+    file_path = models.CharField(max_length=255, blank=True, default="")  # Relativa a MEDIA_ROOT
+    file_size = models.BigIntegerField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    attempts = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = "report_export_jobs"
+        ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="export_jobs_status_idx"),
+            models.Index(
+                fields=["user", "file_format", "start_date", "end_date", "data_version"],
+                name="export_jobs_artifact_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.file_format} {self.start_date}/{self.end_date} - {self.status} ({self.id})"
@@ -1,3 +1,368 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import os
+import random
+import re
+import tempfile
+from datetime import date, timedelta
+from urllib.parse import urlencode
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import Count, Sum
+from django.test import Client, SimpleTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from openpyxl import load_workbook
+from moneymind.testing import SeededAPITestCase
+from moneymind_apps.movements.models import Expense, Income
+from moneymind_apps.movements.utils.periods import date_range_period, shift_month
+from moneymind_apps.movements.utils.rollups import rebuild_rollup_for_users
+from moneymind_apps.reports.models import ExportJob
+from moneymind_apps.reports.utils.export_jobs import prune_export_artifacts
+from moneymind_apps.reports.utils.export_report import ReportDataBuilder
+from moneymind_apps.reports.utils.export_stream import CSV_HEADERS
+from moneymind_apps.reports.utils import pdf_render
+from moneymind_apps.reports.utils.pdf_pool import shutdown_pdf_executor
+from moneymind_apps.reports.utils.benchmark import BENCHMARK_ENDPOINTS, benchmark_endpoint, compare_results
+from moneymind_apps.users.utils.data_version import bump_data_version
+from moneymind_apps.users.utils.seed_data import seed_user_history
 
-# Create your tests here.
+# (endpoint, máximo de consultas) con el usuario sembrado en query string
+REPORT_ENDPOINTS = [
+    ("essential-vs-non-essential/", 2),
+    ("monthly-prediction/", 2),
+    ("saving-evolution/", 2),
+    ("unified-analysis/", 3),
+    ("dashboard-overview/", 4),
+    ("home/dashboard/", 9),
+]
+
+
+class ReportEndpointsTests(SeededAPITestCase):
+
+    def report_url(self, path, **params):
+        query = "&".join(f"{name}={value}" for name, value in {"user_id": self.user.id, **params}.items())
+        return f"/api/reports/{path}?{query}"
+
+    def test_report_endpoints_query_budget(self):
+        for path, max_queries in REPORT_ENDPOINTS:
+            with self.subTest(path=path):
+                self.get_json(self.report_url(path), max_queries=max_queries)
+
+    def test_monthly_category_reports(self):
+        for path in ("expenses-by-category/", "expenses-by-parent-category/"):
+            with self.subTest(path=path):
+                data = self.get_json(
+                    self.report_url(path, month=self.today.month, year=self.today.year), max_queries=2
+                )
+                self.assertTrue(data)
+
+    def test_report_endpoints_for_past_year(self):
+        for path, max_queries in REPORT_ENDPOINTS:
+            with self.subTest(path=path):
+                self.get_json(self.report_url(path, year=self.today.year - 1), max_queries=max_queries)
+
+    def test_cached_report_costs_one_query(self):
+        url = self.report_url("unified-analysis/")
+        first = self.get_json(url, max_queries=3)
+
+        # Solo la lectura de la versión de datos del usuario
+        self.assertEqual(self.get_json(url, max_queries=1), first)
+
+    def test_new_expense_invalidates_cached_report(self):
+        url = self.report_url("dashboard-overview/", month=self.today.month, year=self.today.year)
+        self.get_json(url, max_queries=4)
+
+        self.send_json("post", "/api/movements/expense/create/", {
+            "user_id": self.user.id,
+            "category": "transporte",
+            "place": "Uber",
+            "date": self.today.isoformat(),
+            "time": "23:59",
+            "total": "12.40",
+        }, max_queries=12, expected_status=201)
+
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(url)
+        self.assertGreater(len(context.captured_queries), 1)
+
+    def test_home_dashboard_not_modified(self):
+        url = self.report_url("home/dashboard/")
+        with self.assertMaxQueries(9):
+            response = self.client.get(url)
+
+        with self.assertMaxQueries(2):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_home_dashboard_uses_stored_tip(self):
+        self.get_json(self.report_url("home/dashboard/"), max_queries=9)
+        self.gemini.return_value.generate_content.assert_not_called()
+
+    def test_report_requires_user(self):
+        self.get_json("/api/reports/unified-analysis/", max_queries=0, expected_status=400)
+
+    def test_query_count_does_not_grow_with_history(self):
+        def count_queries():
+            counts = {}
+            for path, _ in REPORT_ENDPOINTS:
+                with CaptureQueriesContext(connection) as context:
+                    self.client.get(self.report_url(path))
+                counts[path] = len(context.captured_queries)
+            return counts
+
+        before = count_queries()
+
+        # Otros dos años de historial, anteriores al sembrado inicial
+        older = date(*shift_month(self.today.year, self.today.month, -self.seed_months), 1)
+        seed_user_history(self.user, months=24, today=older, rng=random.Random(99))
+        rebuild_rollup_for_users([self.user.id])
+        caches["reports"].clear()
+
+        self.assertEqual(count_queries(), before)
+
+    def test_generate_chart_comments(self):
+        chart_data_list = [{"chart": f"grafico_{index}", "values": [1, 2, 3]} for index in range(5)]
+        data = self.send_json(
+            "post", "/api/reports/generate-chart-comments/", {"chart_data_list": chart_data_list}, max_queries=0
+        )
+        self.assertTrue(data["success"])
+
+    def test_generate_chart_comments_requires_five_charts(self):
+        self.send_json(
+            "post", "/api/reports/generate-chart-comments/", {"chart_data_list": []},
+            max_queries=0, expected_status=400
+        )
+
+
+class ExportReportTests(SeededAPITestCase):
+    seed_months = 14
+
+    def export(self, max_queries, **params):
+        query = "&".join(f"{name}={value}" for name, value in {"user_id": self.user.id, **params}.items())
+        with self.assertMaxQueries(max_queries):
+            response = self.client.get(f"/api/reports/export/?{query}")
+            # Excel y CSV se envían por partes: las consultas ocurren al consumir el cuerpo
+            body = response.getvalue()
+        self.assertEqual(response.status_code, 200, body[:300])
+        return body
+
+    def test_exports(self):
+        year_ago = self.today.replace(year=self.today.year - 1, day=1)
+        periods = {
+            "monthly": {"month": self.today.month, "year": self.today.year},
+            "yearly": {"year": self.today.year - 1},
+            "custom": {"start_date": year_ago.isoformat(), "end_date": self.today.isoformat()},
+        }
+        signatures = {"excel": b"PK", "pdf": b"%PDF"}
+
+        for report_type, params in periods.items():
+            for file_format, signature in signatures.items():
+                with self.subTest(report_type=report_type, file_format=file_format):
+                    body = self.export(3, report_type=report_type, file_format=file_format, **params)
+                    self.assertTrue(body.startswith(signature))
+
+    def test_report_data_built_in_one_pass_matches_aggregates(self):
+        start, end = self.today.replace(year=self.today.year - 1, day=1), self.today
+        period = date_range_period(start, end)
+        expenses = Expense.objects.filter(user=self.user, **period.as_filter())
+        incomes = Income.objects.filter(user=self.user, **period.as_filter())
+
+        with self.assertNumQueries(2):
+            data = ReportDataBuilder(self.user, start, end).build()
+
+        total_expenses = expenses.aggregate(total=Sum("total"))["total"]
+        self.assertAlmostEqual(data["summary"]["total_expenses"], float(total_expenses), places=2)
+        self.assertAlmostEqual(
+            data["summary"]["total_income"], float(incomes.aggregate(total=Sum("total"))["total"]), places=2
+        )
+        self.assertEqual(data["statistics"]["total_transactions"], expenses.count() + incomes.count())
+
+        categories = {
+            item["category"]: (float(item["total"]), item["count"])
+            for item in expenses.values("category").annotate(total=Sum("total"), count=Count("id"))
+        }
+        self.assertEqual(
+            {item["category"]: (item["total"], item["count"]) for item in data["expenses_by_category"]}, categories
+        )
+        totals = [item["total"] for item in data["expenses_by_category"]]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+        top_day = expenses.values("date").annotate(total=Sum("total")).order_by("-total").first()
+        self.assertAlmostEqual(data["statistics"]["max_expense_amount"], float(top_day["total"]), places=2)
+
+    def test_pdf_rendered_in_process_pool(self):
+        self.addCleanup(shutdown_pdf_executor)
+        with override_settings(PDF_RENDER_PROCESSES=1):
+            body = self.export(3, report_type="yearly", file_format="pdf", year=self.today.year - 1)
+        self.assertTrue(body.startswith(b"%PDF"))
+
+    def test_pdf_export_lists_every_movement_across_pages(self):
+        year_ago = self.today.replace(year=self.today.year - 2)
+        body = self.export(
+            3, report_type="custom", file_format="pdf",
+            start_date=year_ago.isoformat(), end_date=self.today.isoformat()
+        )
+        self.assertTrue(body.startswith(b"%PDF"))
+
+        total = self.seed_counts["expenses"] + self.seed_counts["incomes"]
+        pages = len(re.findall(rb"/Type /Page\b(?!s)", body))
+        # ~48 filas por página: sin el recorte de 30 filas el listado ocupa varias páginas
+        self.assertGreater(pages, total // 60)
+
+    def test_excel_export_lists_every_movement(self):
+        year_ago = self.today.replace(year=self.today.year - 2)
+        body = self.export(
+            3, report_type="custom", file_format="excel",
+            start_date=year_ago.isoformat(), end_date=self.today.isoformat()
+        )
+
+        workbook = load_workbook(io.BytesIO(body), read_only=True)
+        self.assertEqual(
+            workbook.sheetnames, ["Resumen", "Gastos por Categoría", "Movimientos Detallados", "Estadísticas"]
+        )
+        # título, fila vacía y encabezados
+        rows = list(workbook["Movimientos Detallados"].iter_rows(min_row=4, values_only=True))
+        self.assertEqual(len(rows), self.seed_counts["expenses"] + self.seed_counts["incomes"])
+
+    def test_streamed_exports_cover_whole_range_in_order(self):
+        start = self.today.replace(year=self.today.year - 2)
+        params = {"report_type": "custom", "start_date": start.isoformat(), "end_date": self.today.isoformat()}
+        expected = self.seed_counts["expenses"] + self.seed_counts["incomes"]
+
+        # usuario + un cursor para ingresos y otro para gastos, sin importar el volumen
+        with self.assertMaxQueries(3):
+            response = self.client.get(
+                "/api/reports/export/?" + urlencode({"user_id": self.user.id, "file_format": "csv", **params})
+            )
+            body = b"".join(response.streaming_content).decode("utf-8-sig")
+        self.assertTrue(response.streaming)
+        self.assertIn("text/csv", response["Content-Type"])
+
+        rows = list(csv.reader(io.StringIO(body)))
+        self.assertEqual(rows[0], CSV_HEADERS)
+        self.assertEqual(len(rows) - 1, expected)
+        keys = [(row[0], row[1]) for row in rows[1:]]
+        self.assertEqual(keys, sorted(keys))
+
+        response = self.client.get(
+            "/api/reports/export/?" + urlencode({"user_id": self.user.id, "file_format": "ndjson", **params})
+        )
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), expected)
+        first = json.loads(lines[0])
+        self.assertEqual(set(first), {"date", "time", "type", "category", "description", "amount"})
+
+    def test_export_invalid_parameters(self):
+        response = self.client.get(f"/api/reports/export/?user_id={self.user.id}")
+        self.assertEqual(response.status_code, 400)
+
+        response = self.client.get(f"/api/reports/export/?user_id={self.user.id}&report_type=weekly&file_format=pdf")
+        self.assertEqual(response.status_code, 400)
+
+
+class PdfRenderTests(SimpleTestCase):
+
+    def render(self, rows):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", newline="", encoding="utf-8", delete=False) as spool:
+            writer = csv.writer(spool)
+            for index in range(rows):
+                writer.writerow(["01/05/2025", "10:00", "Gasto", f"Categoría {index}", "-S/ 12.50"])
+        self.addCleanup(os.remove, spool.name)
+
+        self.assertEqual(len(pdf_render._movement_chunks(spool.name)), math.ceil(rows / pdf_render.MOVEMENT_CHUNK_ROWS))
+        return pdf_render.render_pdf({
+            "user_name": "Ana", "period_label": "Año 2025", "summary": [], "categories": [], "statistics": [],
+            "movements_path": spool.name, "movements_count": rows,
+        })
+
+    def test_movements_span_several_chunks_and_pages(self):
+        rows = 2 * pdf_render.MOVEMENT_CHUNK_ROWS + 200
+        body = self.render(rows)
+        pages = len(re.findall(rb"/Type /Page\b(?!s)", body))
+
+        # Página de resumen más las de movimientos: ~47 filas por página con el
+        # encabezado repetido; las uniones entre partes no dejan páginas a medias
+        rows_per_page = 47
+        expected = 1 + math.ceil(rows / rows_per_page)
+        self.assertGreaterEqual(pages, expected)
+        self.assertLessEqual(pages, expected + 1)
+
+
+class ExportJobTests(SeededAPITestCase):
+    seed_months = 3
+
+    def setUp(self):
+        super().setUp()
+        media_root = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=media_root))
+
+    def enqueue(self, max_queries, expected_status, **params):
+        query = urlencode({
+            "user_id": self.user.id, "report_type": "monthly", "file_format": "excel", "async": "true", **params
+        })
+        return self.get_json(f"/api/reports/export/?{query}", max_queries, expected_status=expected_status)
+
+    def test_async_export_flow_reuses_artifact_until_data_changes(self):
+        job = self.enqueue(4, 202)
+        self.assertEqual(job["status"], "pending")
+        # Mientras está pendiente se reutiliza el mismo job
+        self.assertEqual(self.enqueue(4, 202)["job_id"], job["job_id"])
+
+        call_command("process_export_jobs", "--once", stdout=io.StringIO())
+
+        data = self.get_json(job["status_url"], max_queries=1)
+        self.assertEqual(data["status"], "done")
+        with self.assertMaxQueries(1):
+            response = self.client.get(data["download_url"])
+            body = response.getvalue()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(body.startswith(b"PK"))
+        self.assertIn("reporte_financiero_", response["Content-Disposition"])
+
+        # Sin cambios en los datos se sirve el archivo ya generado
+        repeated = self.enqueue(4, 200)
+        self.assertEqual(repeated["job_id"], job["job_id"])
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        bump_data_version(self.user.id)
+        self.assertNotEqual(self.enqueue(5, 202)["job_id"], job["job_id"])
+
+    def test_pruned_artifact_is_gone(self):
+        job = self.enqueue(4, 202, file_format="pdf")
+        download_url = f"/api/reports/export-jobs/{job['job_id']}/download/"
+        # Todavía no se generó
+        self.get_json(download_url, max_queries=1, expected_status=409)
+
+        call_command("process_export_jobs", "--once", stdout=io.StringIO())
+        self.assertEqual(prune_export_artifacts(timedelta(days=1), max_bytes=0), 1)
+
+        response = self.client.get(download_url)
+        self.assertEqual(response.status_code, 410)
+
+
+class BenchmarkHarnessTests(SeededAPITestCase):
+    seed_months = 2
+
+    def test_benchmark_endpoint_reports_latency_queries_and_memory(self):
+        params = {"user_id": self.user.id, "month": self.today.month, "year": self.today.year}
+        endpoint = next(endpoint for endpoint in BENCHMARK_ENDPOINTS if endpoint[0] == "reports.unified-analysis")
+
+        result = benchmark_endpoint(Client(), endpoint, params, iterations=3)
+
+        self.assertEqual(result["status"], 200)
+        self.assertEqual(result["queries"], 3)
+        self.assertGreater(result["peak_memory_kib"], 0)
+        self.assertLessEqual(result["p50_ms"], result["p95_ms"])
+        self.assertLessEqual(result["p95_ms"], result["p99_ms"])
+
+    def test_compare_results(self):
+        def run(p95):
+            return {"runs": [{"size": 1000, "endpoints": [{"name": "reports.home-dashboard", "p95_ms": p95}]}]}
+
+        self.assertEqual(
+            compare_results(run(10.0), run(15.0)),
+            [(1000, "reports.home-dashboard", 10.0, 15.0, 50.0)]
+        )
@@ -12,5 +12,7 @@ urlpatterns = [
     path('dashboard-overview/', DashboardOverviewView.as_view(), name='dashboard-overview'),
     path('home/dashboard/', HomeDashboardView.as_view(), name='home-dashboard'),
     path('export/', ExportReportView.as_view(), name='export-report'),
+    path('export-jobs/<uuid:job_id>/', ExportJobView.as_view(), name='export-job'),
+    path('export-jobs/<uuid:job_id>/download/', ExportJobDownloadView.as_view(), name='export-job-download'),
 
 ]
\ No newline at end of file
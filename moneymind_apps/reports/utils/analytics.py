@@ -0,0 +1,191 @@
+from decimal import Decimal
+from django.db.models import Q
+from moneymind_apps.movements.models import (
+    MonthlyCategoryTotal,
+    Category,
+    CategoryParent,
+    ExpenseType,
+    CATEGORY_PARENT_MAP,
+    CATEGORY_EXPENSE_TYPE_MAP,
+)
+
+
+def load_monthly_category_totals(user_id, months):
+    """
+    Lee del acumulado mensual los totales por categoría de los meses indicados.
+
+    `months` es una lista de tuplas (año, mes). Retorna
+    {(año, mes): {categoria: {"total": Decimal, "count": int}}} con una sola consulta
+    sobre a lo sumo 16 filas por mes.
+    """
+    months = list(months)
+    cells = {key: {} for key in months}
+    if not months:
+        return cells
+
+    months_by_year = {}
+    for year, month in months:
+        months_by_year.setdefault(year, []).append(month)
+
+    period_filter = Q()
+    for year, year_months in months_by_year.items():
+        period_filter |= Q(year=year, month__in=year_months)
+
+    rows = MonthlyCategoryTotal.objects.filter(
+        period_filter,
+        user_id=user_id,
+        count__gt=0
+    ).values('year', 'month', 'category', 'total', 'count')
+
+    for row in rows:
+        cells[(row['year'], row['month'])][row['category']] = {
+            "total": row['total'],
+            "count": row['count'],
+        }
+
+    return cells
+
+
+def categories_total(categories):
+    """Suma los totales de un mes cargado con load_monthly_category_totals"""
+    return sum((cell["total"] for cell in categories.values()), Decimal('0'))
+
+
+class YearlyExpenseMatrix:
+    """
+    Totales de gastos de un usuario para un año, agrupados por mes y categoría.
+
+    Se leen con UNA sola consulta del acumulado mensual (a lo sumo 16x12 filas) y
+    todas las secciones del dashboard se derivan de este resultado en memoria, de
+    modo que la cantidad de consultas no crece con el número de secciones ni de meses.
+    """
+
+    def __init__(self, user_id, year, months=None):
+        self.user_id = user_id
+        self.year = int(year)
+        months = list(months) if months else list(range(1, 13))
+        loaded = load_monthly_category_totals(user_id, [(self.year, month) for month in months])
+        # {mes: {categoria: {"total": Decimal, "count": int}}}
+        self.cells = {month: {} for month in range(1, 13)}
+        for (_, month), categories in loaded.items():
+            self.cells[month] = categories
+
+    def month_total(self, month):
+        """Total gastado en el mes (Decimal('0') si no hubo gastos)"""
+        return categories_total(self.cells[month])
+
+    def category_totals(self, month):
+        """Totales por cada una de las 16 categorías en el mes"""
+        totals = {cat.value: Decimal('0') for cat in Category}
+        for category, cell in self.cells[month].items():
+            totals[category] = totals.get(category, Decimal('0')) + cell["total"]
+        return totals
+
+    def parent_totals(self, month):
+        """Totales por categoría padre en el mes"""
+        totals = {parent.value: Decimal('0') for parent in CategoryParent}
+        for category, cell in self.cells[month].items():
+            try:
+                parent = CATEGORY_PARENT_MAP.get(Category(category))
+            except ValueError:
+                continue
+
+            if parent:
+                totals[parent.value] += cell["total"]
+        return totals
+
+    def expense_type_totals(self, month):
+        """Totales esenciales vs no esenciales en el mes"""
+        totals = {expense_type.value: Decimal('0') for expense_type in ExpenseType}
+        for category, cell in self.cells[month].items():
+            try:
+                expense_type = CATEGORY_EXPENSE_TYPE_MAP.get(Category(category))
+            except ValueError:
+                continue
+
+            if expense_type:
+                totals[expense_type.value] += cell["total"]
+        return totals
+
+
+def build_monthly_predictions(matrix, current_month):
+    """
+    Gastos reales de cada mes del año y predicción para los meses restantes
+    """
+    monthly_expenses = []
+
+    for month in range(1, 13):
+        month_total = matrix.month_total(month)
+        monthly_expenses.append({
+            "month": month,
+            "real": float(month_total) if month_total else None
+        })
+
+    # Calcular predicción para meses futuros
+    months_with_data = [m for m in monthly_expenses if m["real"] is not None and m["real"] > 0]
+
+    if len(months_with_data) >= 3:
+        last_3_months = months_with_data[-3:]
+        avg_expense = sum(m["real"] for m in last_3_months) / 3
+    elif len(months_with_data) > 0:
+        avg_expense = sum(m["real"] for m in months_with_data) / len(months_with_data)
+    else:
+        avg_expense = 0
+
+    # Valor real del mes actual como punto de partida
+    current_month_value = monthly_expenses[current_month - 1]["real"] if current_month <= 12 else None
+
+    result = []
+    for month_data in monthly_expenses:
+        month = month_data["month"]
+
+        if month < current_month:
+            # Meses pasados - no hay predicción
+            prediction = None
+        elif month == current_month:
+            # Mes actual - usar valor real para conectar las líneas
+            prediction = current_month_value
+        else:
+            # Meses futuros - usar el valor del mes actual como base
+            months_ahead = month - current_month
+            base_value = current_month_value if current_month_value else avg_expense
+            prediction = round(base_value * (1.02 ** months_ahead), 2)
+
+        result.append({
+            "month": month,
+            "real": month_data["real"],
+            "prediction": prediction
+        })
+
+    return result
+
+
+def build_expenses_by_category(matrix, month):
+    """Gastos por categoría (16 categorías) de un mes"""
+    return [
+        {"category": category, "total": float(total)}
+        for category, total in matrix.category_totals(month).items()
+    ]
+
+
+def build_expenses_by_parent_category(matrix, month):
+    """Gastos por categoría padre de un mes"""
+    return [
+        {"parent_category": parent_category, "total": float(total)}
+        for parent_category, total in matrix.parent_totals(month).items()
+    ]
+
+
+def build_essential_vs_non_essential(matrix):
+    """Gastos esenciales vs no esenciales por cada mes del año"""
+    monthly_data = []
+
+    for month in range(1, 13):
+        totals = matrix.expense_type_totals(month)
+        monthly_data.append({
+            "month": month,
+            "esencial": float(totals[ExpenseType.ESENCIAL.value]),
+            "no_esencial": float(totals[ExpenseType.NO_ESENCIAL.value])
+        })
+
+    return monthly_data
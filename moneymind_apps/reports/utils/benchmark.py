@@ -0,0 +1,197 @@
+import io
+import statistics
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from moneymind_apps.movements.utils.rollups import rebuild_rollup_for_users
+from moneymind_apps.reports.utils.export_report import render_report
+from moneymind_apps.users.models import User
+from moneymind_apps.users.utils.seed_data import seed_user_history
+
+BENCHMARK_MONTHS = 24
+INCOMES_PER_MONTH = 4
+
+# (nombre, método, ruta, cuerpo JSON). La ruta se formatea con user_id, month y year.
+BENCHMARK_ENDPOINTS = [
+    ("balances.user-balance", "get", "/api/balances/user-balance/?user_id={user_id}", None),
+    ("alerts.user-alerts", "get", "/api/alerts/user-alerts/?user_id={user_id}", None),
+    ("alerts.user-alerts-pagination", "get",
+     "/api/alerts/user-alerts-pagination/?user_id={user_id}&page=1&page_size=10", None),
+    ("alerts.recurring-payments", "get", "/api/alerts/recurring-payments/list/?user_id={user_id}", None),
+    ("movements.scan-dashboard", "get", "/api/movements/scan/dashboard/{user_id}/", None),
+    ("movements.scan-all-offset", "get", "/api/movements/scan/all/{user_id}/?page=5&page_size=20", None),
+    ("movements.scan-all-cursor", "get", "/api/movements/scan/all/{user_id}/?cursor=&page_size=20", None),
+    ("reports.expenses-by-category", "get",
+     "/api/reports/expenses-by-category/?user_id={user_id}&month={month}&year={year}", None),
+    ("reports.expenses-by-parent-category", "get",
+     "/api/reports/expenses-by-parent-category/?user_id={user_id}&month={month}&year={year}", None),
+    ("reports.essential-vs-non-essential", "get", "/api/reports/essential-vs-non-essential/?user_id={user_id}", None),
+    ("reports.monthly-prediction", "get", "/api/reports/monthly-prediction/?user_id={user_id}", None),
+    ("reports.saving-evolution", "get", "/api/reports/saving-evolution/?user_id={user_id}", None),
+    ("reports.unified-analysis", "get", "/api/reports/unified-analysis/?user_id={user_id}", None),
+    ("reports.dashboard-overview", "get", "/api/reports/dashboard-overview/?user_id={user_id}", None),
+    ("reports.home-dashboard", "get", "/api/reports/home/dashboard/?user_id={user_id}", None),
+    ("reports.generate-chart-comments", "post", "/api/reports/generate-chart-comments/",
+     {"chart_data_list": [{"chart": f"grafico_{index}", "values": [1, 2, 3]} for index in range(5)]}),
+    ("reports.export-monthly-excel", "get",
+     "/api/reports/export/?user_id={user_id}&report_type=monthly&file_format=excel", None),
+    ("reports.export-monthly-pdf", "get",
+     "/api/reports/export/?user_id={user_id}&report_type=monthly&file_format=pdf", None),
+    ("reports.export-yearly-excel", "get",
+     "/api/reports/export/?user_id={user_id}&report_type=yearly&file_format=excel", None),
+    ("reports.export-yearly-pdf", "get",
+     "/api/reports/export/?user_id={user_id}&report_type=yearly&file_format=pdf", None),
+    ("reports.export-yearly-csv", "get",
+     "/api/reports/export/?user_id={user_id}&report_type=yearly&file_format=csv", None),
+]
+
+
+def seed_benchmark_user(movements, today=None):
+    """
+    Crea un usuario con aproximadamente `movements` gastos + ingresos repartidos
+    en BENCHMARK_MONTHS meses y reconstruye su acumulado mensual.
+    Retorna (usuario, cantidad real de movimientos).
+    """
+    today = today or date.today()
+    expenses_per_month = max(16, movements // BENCHMARK_MONTHS - INCOMES_PER_MONTH)
+
+    email = f"bench-{movements}-{User.objects.count() + 1}@moneymind.test"
+    user = User.objects.create_user(
+        username=email, email=email, password="moneymind123", first_name="Bench", last_name=str(movements)
+    )
+    counts = seed_user_history(
+        user,
+        months=BENCHMARK_MONTHS,
+        expenses_per_month=expenses_per_month,
+        incomes_per_month=INCOMES_PER_MONTH,
+        today=today,
+    )
+    rebuild_rollup_for_users([user.id])
+
+    return user, counts["expenses"] + counts["incomes"]
+
+
+def latency_summary(samples):
+    """p50/p95/p99, media y máximo en milisegundos de una lista de duraciones en segundos"""
+    milliseconds = sorted(sample * 1000 for sample in samples)
+    if len(milliseconds) == 1:
+        milliseconds = milliseconds * 2
+
+    cuts = statistics.quantiles(milliseconds, n=100, method="inclusive")
+    return {
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "mean_ms": round(statistics.fmean(milliseconds), 2),
+        "max_ms": round(milliseconds[-1], 2),
+    }
+
+
+def _request(client, method, path, body, warm_cache):
+    """Retorna (respuesta, bytes del cuerpo); las respuestas en streaming se consumen completas"""
+    if not warm_cache:
+        caches["reports"].clear()
+
+    if body is None:
+        response = getattr(client, method)(path)
+    else:
+        response = getattr(client, method)(path, body, content_type="application/json")
+    return response, len(response.getvalue())
+
+
+def benchmark_endpoint(client, endpoint, params, iterations=20, warm_cache=False):
+    """
+    Mide un endpoint en tres fases para que la instrumentación no afecte las
+    latencias: una pasada con conteo de consultas, una con tracemalloc (pico de
+    memoria Python) y `iterations` pasadas cronometradas.
+    """
+    name, method, path, body = endpoint
+    path = path.format(**params)
+
+    with CaptureQueriesContext(connection) as queries:
+        response, response_bytes = _request(client, method, path, body, warm_cache)
+    # captured_queries lee connection.queries, que se vacía en el siguiente request
+    query_count = len(queries.captured_queries)
+
+    tracemalloc.start()
+    try:
+        _request(client, method, path, body, warm_cache)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    samples = []
+    for _ in range(max(1, iterations)):
+        started = time.perf_counter()
+        _request(client, method, path, body, warm_cache)
+        samples.append(time.perf_counter() - started)
+
+    return {
+        "name": name,
+        "method": method.upper(),
+        "path": path,
+        "status": response.status_code,
+        "response_bytes": response_bytes,
+        "queries": query_count,
+        "peak_memory_kib": round(peak / 1024, 1),
+        "iterations": len(samples),
+        **latency_summary(samples),
+    }
+
+
+def benchmark_concurrent_exports(user, start_date, end_date, file_format, concurrency, rounds=3):
+    """
+    Lanza `concurrency` exportes simultáneos desde hilos, como los hilos de un
+    worker gthread de gunicorn, durante `rounds` rondas. Retorna exportes por
+    segundo y las latencias individuales.
+    """
+    def export_once(_):
+        started = time.perf_counter()
+        try:
+            render_report(io.BytesIO(), user, start_date, end_date, file_format)
+        finally:
+            # Cada hilo usa su propia conexión, como un request
+            connection.close()
+        return time.perf_counter() - started
+
+    samples = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for _ in range(max(1, rounds)):
+            samples.extend(pool.map(export_once, range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "exports": len(samples),
+        "elapsed_s": round(elapsed, 2),
+        "exports_per_s": round(len(samples) / elapsed, 2),
+        **latency_summary(samples),
+    }
+
+
+def compare_results(baseline, current, metric="p95_ms"):
+    """
+    [(tamaño, endpoint, valor base, valor actual, % de cambio)] para los
+    endpoints presentes en ambos resultados
+    """
+    baseline_values = {
+        (run["size"], endpoint["name"]): endpoint[metric]
+        for run in baseline["runs"]
+        for endpoint in run["endpoints"]
+    }
+
+    rows = []
+    for run in current["runs"]:
+        for endpoint in run["endpoints"]:
+            before = baseline_values.get((run["size"], endpoint["name"]))
+            if before is None:
+                continue
+            change = (endpoint[metric] - before) / before * 100 if before else 0.0
+            rows.append((run["size"], endpoint["name"], before, endpoint[metric], round(change, 1)))
+
+    return rows
@@ -0,0 +1,152 @@
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Font, NamedStyle, PatternFill
+from openpyxl.utils import get_column_letter
+
+EXCEL_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+CURRENCY_FORMAT = '"S/"#,##0.00'
+SIGNED_CURRENCY_FORMAT = '"S/"#,##0.00;[Red]-"S/"#,##0.00'
+
+# (hoja, anchos de columna) en el orden en que aparecen en el archivo
+SHEETS = [
+    ("Resumen", [25, 20]),
+    ("Gastos por Categoría", [30, 15, 15, 15]),
+    ("Movimientos Detallados", [12, 8, 10, 25, 30, 15]),
+    ("Estadísticas", [30, 40]),
+]
+
+
+def _named_styles():
+    header = NamedStyle(name="mm_header")
+    header.fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
+    header.font = Font(bold=True, color="FFFFFF", size=12)
+    header.alignment = Alignment(horizontal="center", vertical="center")
+
+    report_title = NamedStyle(name="mm_report_title")
+    report_title.font = Font(bold=True, size=16)
+
+    sheet_title = NamedStyle(name="mm_sheet_title")
+    sheet_title.font = Font(bold=True, size=14)
+
+    subtitle = NamedStyle(name="mm_subtitle")
+    subtitle.font = Font(size=12)
+
+    currency = NamedStyle(name="mm_currency", number_format=CURRENCY_FORMAT)
+    signed_currency = NamedStyle(name="mm_signed_currency", number_format=SIGNED_CURRENCY_FORMAT)
+
+    return [header, report_title, sheet_title, subtitle, currency, signed_currency]
+
+
+def category_label(category):
+    return category.replace('_', ' ').title()
+
+
+class ExcelReportWriter:
+    """
+    Reporte financiero en Excel con openpyxl en modo write_only: cada hoja se
+    escribe fila por fila a un archivo temporal y nunca se arma el árbol de
+    celdas en memoria. Los estilos son NamedStyle registrados una sola vez y
+    las celdas solo los referencian por nombre.
+
+    Las cuatro hojas se crean al inicio para fijar su orden; se pueden llenar en
+    cualquier orden (por ejemplo los movimientos antes que el resumen).
+    """
+
+    def __init__(self):
+        self.workbook = Workbook(write_only=True)
+        for style in _named_styles():
+            self.workbook.add_named_style(style)
+
+        self.sheets = []
+        for title, widths in SHEETS:
+            sheet = self.workbook.create_sheet(title)
+            for index, width in enumerate(widths):
+                sheet.column_dimensions[get_column_letter(index + 1)].width = width
+            self.sheets.append(sheet)
+
+        self.summary_sheet, self.categories_sheet, self.movements_sheet, self.stats_sheet = self.sheets
+
+    def _cell(self, sheet, value, style):
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.style = style
+        return cell
+
+    def _title(self, sheet, text, last_column, style="mm_sheet_title"):
+        sheet.append([self._cell(sheet, text, style)])
+        sheet.merged_cells.add(f"A1:{last_column}1")
+
+    def _header(self, sheet, labels):
+        sheet.append([self._cell(sheet, label, "mm_header") for label in labels])
+
+    def write_movements(self, movements):
+        """Consume un iterable de ExportMovement; retorna la cantidad de filas escritas"""
+        sheet = self.movements_sheet
+        self._title(sheet, "Lista Detallada de Movimientos", "F")
+        sheet.append([])
+        self._header(sheet, ["Fecha", "Hora", "Tipo", "Categoría", "Lugar/Desc", "Monto"])
+
+        count = 0
+        for movement in movements:
+            sheet.append([
+                movement.date.strftime('%d/%m/%Y'),
+                movement.time,
+                movement.type_label,
+                category_label(movement.category),
+                movement.description,
+                self._cell(sheet, movement.signed_amount, "mm_signed_currency"),
+            ])
+            count += 1
+
+        return count
+
+    def write_summary(self, data):
+        """Hojas Resumen, Gastos por Categoría y Estadísticas a partir de los datos del reporte"""
+        sheet = self.summary_sheet
+        self._title(sheet, "REPORTE FINANCIERO", "D", style="mm_report_title")
+        sheet.append([self._cell(sheet, f"Periodo: {data['period']['label']}", "mm_subtitle")])
+        sheet.merged_cells.add("A2:D2")
+        sheet.append([f"Usuario: {data['user']['name']}"])
+        sheet.merged_cells.add("A3:D3")
+        sheet.append([])
+
+        summary = data['summary']
+        self._header(sheet, ["Concepto", "Monto"])
+        sheet.append(["Ingresos totales", self._cell(sheet, summary['total_income'], "mm_currency")])
+        sheet.append(["Gastos totales", self._cell(sheet, summary['total_expenses'], "mm_currency")])
+        sheet.append(["Balance", self._cell(sheet, summary['balance'], "mm_currency")])
+        sheet.append(["Tasa de ahorro", f"{summary['savings_rate']}%"])
+
+        sheet = self.categories_sheet
+        self._title(sheet, "Gastos por Categoría", "D")
+        sheet.append([])
+        self._header(sheet, ["Categoría", "Monto", "% del Total", "Transacciones"])
+        for category in data['expenses_by_category']:
+            sheet.append([
+                category_label(category['category']),
+                self._cell(sheet, category['total'], "mm_currency"),
+                f"{category['percentage']}%",
+                category['count'],
+            ])
+
+        stats = data['statistics']
+        sheet = self.stats_sheet
+        self._title(sheet, "Estadísticas Adicionales", "B")
+        sheet.append([])
+        self._header(sheet, ["Métrica", "Valor"])
+        sheet.append(["Gasto promedio diario", f"S/ {stats['avg_daily_expense']:.2f}"])
+        sheet.append([
+            "Día con más gastos",
+            f"{stats['max_expense_day'].strftime('%d/%m/%Y')} (S/ {stats['max_expense_amount']:.2f})"
+            if stats['max_expense_day'] else "N/A"
+        ])
+        sheet.append([
+            "Categoría más frecuente",
+            f"{category_label(stats['most_frequent_category'])} ({stats['most_frequent_count']} transacciones)"
+            if stats['most_frequent_category'] else "N/A"
+        ])
+        sheet.append(["Total de transacciones", f"{stats['total_transactions']} movimientos"])
+
+    def save(self, output):
+        """Cierra las hojas y escribe el .xlsx en `output` (ruta o archivo binario)"""
+        self.workbook.save(output)
@@ -0,0 +1,194 @@
+import logging
+import os
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from moneymind_apps.reports.models import ExportJob, ExportJobStatus
+from moneymind_apps.reports.utils.export_report import FILE_EXTENSIONS, render_report
+from moneymind_apps.users.utils.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Un job en "processing" más tiempo que esto se considera de un worker caído
+STALE_PROCESSING_AFTER = timedelta(minutes=15)
+
+ACTIVE_STATUSES = [ExportJobStatus.PENDING.value, ExportJobStatus.PROCESSING.value]
+
+
+def artifact_path(user_id, start_date, end_date, file_format, version):
+    """Ruta del archivo relativa a MEDIA_ROOT; cambia con cada versión de datos del usuario"""
+    filename = f"{start_date:%Y%m%d}_{end_date:%Y%m%d}_v{version}.{FILE_EXTENSIONS[file_format]}"
+    return os.path.join(settings.EXPORT_ARTIFACTS_DIR, str(user_id), filename)
+
+
+def artifact_absolute_path(relative_path):
+    return os.path.join(settings.MEDIA_ROOT, relative_path)
+
+
+def enqueue_export_job(user, report_type, start_date, end_date, file_format):
+    """
+    Encola el exporte o reutiliza lo existente para la versión actual de datos:
+    un job igual pendiente/en proceso, o el archivo ya generado (se retorna un
+    job terminado que apunta a él, sin volver a renderizar).
+    """
+    version = get_data_version(user.id)
+    jobs = ExportJob.objects.filter(
+        user=user,
+        file_format=file_format,
+        start_date=start_date,
+        end_date=end_date,
+        data_version=version,
+    )
+
+    active = jobs.filter(status__in=ACTIVE_STATUSES).order_by("-created_at").first()
+    if active:
+        return active
+
+    relative_path = artifact_path(user.id, start_date, end_date, file_format, version)
+    absolute_path = artifact_absolute_path(relative_path)
+    if os.path.exists(absolute_path):
+        done = jobs.filter(status=ExportJobStatus.DONE.value, file_path=relative_path).order_by("-created_at").first()
+        if done:
+            return done
+        return ExportJob.objects.create(
+            user=user,
+            report_type=report_type,
+            file_format=file_format,
+            start_date=start_date,
+            end_date=end_date,
+            data_version=version,
+            status=ExportJobStatus.DONE.value,
+            file_path=relative_path,
+            file_size=os.path.getsize(absolute_path),
+            finished_at=timezone.now(),
+        )
+
+    return ExportJob.objects.create(
+        user=user,
+        report_type=report_type,
+        file_format=file_format,
+        start_date=start_date,
+        end_date=end_date,
+        data_version=version,
+    )
+
+
+def claim_export_jobs(limit):
+    """
+    Toma hasta `limit` jobs pendientes (o abandonados por un worker caído) y los
+    marca como "processing". SKIP LOCKED permite varios workers en paralelo.
+    """
+    stale_before = timezone.now() - STALE_PROCESSING_AFTER
+
+    with transaction.atomic():
+        jobs = list(
+            ExportJob.objects.select_for_update(skip_locked=True).filter(
+                Q(status=ExportJobStatus.PENDING.value) |
+                Q(status=ExportJobStatus.PROCESSING.value, started_at__lt=stale_before)
+            ).select_related("user").order_by("created_at")[:limit]
+        )
+
+        if jobs:
+            ExportJob.objects.filter(id__in=[job.id for job in jobs]).update(
+                status=ExportJobStatus.PROCESSING.value,
+                started_at=timezone.now(),
+                attempts=F("attempts") + 1
+            )
+
+    return jobs
+
+
+def process_export_job(job, max_attempts=3):
+    """
+    Genera el archivo de un job ya reclamado. Se escribe en un temporal y se
+    renombra al terminar, así nunca se sirve un archivo a medio escribir.
+    Si otro job ya generó el archivo para la misma versión de datos se reutiliza.
+    """
+    # Versión al momento de renderizar: si los datos cambiaron desde que se encoló
+    # el archivo queda con la versión nueva
+    version = get_data_version(job.user_id)
+    relative_path = artifact_path(job.user_id, job.start_date, job.end_date, job.file_format, version)
+    absolute_path = artifact_absolute_path(relative_path)
+
+    if not os.path.exists(absolute_path):
+        os.makedirs(os.path.dirname(absolute_path), exist_ok=True)
+        temporary = f"{absolute_path}.{os.getpid()}.tmp"
+        try:
+            with open(temporary, "wb") as output:
+                render_report(output, job.user, job.start_date, job.end_date, job.file_format)
+            os.replace(temporary, absolute_path)
+        except Exception as error:
+            logger.exception("No se pudo generar el exporte %s", job.id)
+            if os.path.exists(temporary):
+                os.remove(temporary)
+
+            if job.attempts + 1 < max_attempts:
+                ExportJob.objects.filter(id=job.id).update(status=ExportJobStatus.PENDING.value, started_at=None)
+                return ExportJobStatus.PENDING.value
+
+            ExportJob.objects.filter(id=job.id).update(
+                status=ExportJobStatus.FAILED.value,
+                error=str(error),
+                finished_at=timezone.now()
+            )
+            return ExportJobStatus.FAILED.value
+
+    ExportJob.objects.filter(id=job.id).update(
+        status=ExportJobStatus.DONE.value,
+        data_version=version,
+        file_path=relative_path,
+        file_size=os.path.getsize(absolute_path),
+        finished_at=timezone.now()
+    )
+    return ExportJobStatus.DONE.value
+
+
+def prune_export_artifacts(max_age, max_bytes):
+    """
+    Elimina los archivos generados hace más de `max_age` (timedelta) y, si el
+    total sigue pasando `max_bytes`, los menos usados hasta bajar del límite
+    (cada descarga actualiza la fecha de modificación del archivo).
+    Retorna la cantidad de archivos eliminados.
+    """
+    root = os.path.join(settings.MEDIA_ROOT, settings.EXPORT_ARTIFACTS_DIR)
+    expired_before = time.time() - max_age.total_seconds()
+
+    files = []
+    for directory, _, filenames in os.walk(root):
+        for filename in filenames:
+            path = os.path.join(directory, filename)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+    files.sort()  # los menos usados primero
+    total = sum(size for _, size, _ in files)
+    removed = 0
+
+    for modified, size, path in files:
+        expired = modified < expired_before
+        # Los temporales de un render en curso solo se borran si quedaron abandonados
+        if not expired and (total <= max_bytes or path.endswith(".tmp")):
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def purge_finished_export_jobs(older_than):
+    """Elimina los jobs terminados hace más de `older_than` (timedelta); los archivos se podan aparte"""
+    deleted, _ = ExportJob.objects.filter(
+        status__in=[ExportJobStatus.DONE.value, ExportJobStatus.FAILED.value],
+        finished_at__lt=timezone.now() - older_than
+    ).delete()
+    return deleted
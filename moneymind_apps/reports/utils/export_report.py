@@ -0,0 +1,269 @@
+import csv
+import os
+import tempfile
+from decimal import Decimal
+from moneymind_apps.movements.utils.periods import date_range_period
+from moneymind_apps.reports.utils.excel_export import ExcelReportWriter, EXCEL_CONTENT_TYPE
+from moneymind_apps.reports.utils.export_stream import iter_period_movements, STREAM_CONTENT_TYPES, STREAM_WRITERS
+from moneymind_apps.reports.utils.pdf_pool import render_pdf
+
+EXPORT_FORMATS = ("excel", "pdf", *STREAM_WRITERS)
+
+FILE_EXTENSIONS = {"excel": "xlsx", "pdf": "pdf", "csv": "csv", "ndjson": "ndjson"}
+
+CONTENT_TYPES = {"excel": EXCEL_CONTENT_TYPE, "pdf": "application/pdf", **STREAM_CONTENT_TYPES}
+
+
+def export_filename(file_format, start_date, end_date):
+    """Nombre de descarga: CSV/NDJSON solo traen movimientos, Excel/PDF el reporte completo"""
+    prefix = "movimientos" if file_format in STREAM_WRITERS else "reporte_financiero"
+    return f"{prefix}_{start_date.strftime('%Y%m%d')}_{end_date.strftime('%Y%m%d')}.{FILE_EXTENSIONS[file_format]}"
+
+
+class ReportDataBuilder:
+    """
+    Datos del reporte (totales, gastos por categoría y estadísticas) calculados
+    en una sola pasada sobre los movimientos del período: `rows()` entrega cada
+    movimiento al que escribe el archivo mientras acumula, y `build()` arma el
+    dict del reporte al terminar. Reemplaza los aggregate/annotate por separado.
+    """
+
+    def __init__(self, user, start_date, end_date):
+        self.user = user
+        self.start_date = start_date
+        self.end_date = end_date
+
+        self.total_income = Decimal('0')
+        self.total_expenses = Decimal('0')
+        self.transactions = 0
+        self.categories = {}  # categoría -> [total, cantidad]
+
+        # Los movimientos llegan por fecha: basta el total del día en curso
+        self.max_expense_day = None
+        self.max_expense_amount = Decimal('0')
+        self._day = None
+        self._day_total = Decimal('0')
+        self._consumed = False
+
+    def rows(self, chunk_size=None):
+        """Movimientos del período (ExportMovement) en orden, acumulando a medida que se leen"""
+        period = date_range_period(self.start_date, self.end_date)
+        for movement in iter_period_movements(self.user.id, period, chunk_size):
+            self.add(movement)
+            yield movement
+        self._close_day()
+        self._consumed = True
+
+    def add(self, movement):
+        self.transactions += 1
+
+        if movement.is_income:
+            self.total_income += movement.amount
+            return
+
+        self.total_expenses += movement.amount
+
+        category = self.categories.setdefault(movement.category, [Decimal('0'), 0])
+        category[0] += movement.amount
+        category[1] += 1
+
+        if movement.date != self._day:
+            self._close_day()
+            self._day = movement.date
+        self._day_total += movement.amount
+
+    def _close_day(self):
+        # A igual monto queda el primer día, no hay un orden definido en el original
+        if self._day is not None and (self.max_expense_day is None or self._day_total > self.max_expense_amount):
+            self.max_expense_day = self._day
+            self.max_expense_amount = self._day_total
+        self._day = None
+        self._day_total = Decimal('0')
+
+    def build(self):
+        """Dict del reporte; si las filas no se recorrieron, las lee sin escribirlas"""
+        if not self._consumed:
+            for _ in self.rows():
+                pass
+
+        balance = self.total_income - self.total_expenses
+
+        # Tasa de ahorro
+        savings_rate = 0
+        if self.total_income > 0:
+            savings_rate = round((balance / self.total_income) * 100, 1)
+
+        # Gastos por categoría, de mayor a menor
+        category_data = []
+        for category, (total, count) in sorted(self.categories.items(), key=lambda item: -item[1][0]):
+            percentage = 0
+            if self.total_expenses > 0:
+                percentage = round((total / self.total_expenses) * 100, 1)
+
+            category_data.append({
+                'category': category,
+                'total': float(total),
+                'percentage': percentage,
+                'count': count
+            })
+
+        # Estadísticas adicionales
+        total_days = (self.end_date - self.start_date).days + 1
+        avg_daily_expense = float(self.total_expenses) / total_days if total_days > 0 else 0
+
+        # Categoría más frecuente
+        most_frequent_category = None
+        most_frequent_count = 0
+        if category_data:
+            most_frequent = max(category_data, key=lambda x: x['count'])
+            most_frequent_category = most_frequent['category']
+            most_frequent_count = most_frequent['count']
+
+        return {
+            'user': {
+                'name': self.user.get_full_name() or self.user.username,
+                'email': self.user.email
+            },
+            'period': {
+                'start': self.start_date,
+                'end': self.end_date,
+                'label': period_label(self.start_date, self.end_date)
+            },
+            'summary': {
+                'total_income': float(self.total_income),
+                'total_expenses': float(self.total_expenses),
+                'balance': float(balance),
+                'savings_rate': savings_rate
+            },
+            'expenses_by_category': category_data,
+            'statistics': {
+                'avg_daily_expense': round(avg_daily_expense, 2),
+                'max_expense_day': self.max_expense_day,
+                'max_expense_amount': float(self.max_expense_amount),
+                'most_frequent_category': most_frequent_category,
+                'most_frequent_count': most_frequent_count,
+                'total_transactions': self.transactions
+            }
+        }
+
+
+def period_label(start_date, end_date):
+    """Genera etiqueta del período"""
+    months_es = [
+        'Enero', 'Febrero', 'Marzo', 'Abril', 'Mayo', 'Junio',
+        'Julio', 'Agosto', 'Septiembre', 'Octubre', 'Noviembre', 'Diciembre'
+    ]
+
+    if start_date.year == end_date.year and start_date.month == end_date.month:
+        # Mismo mes
+        return f"{months_es[start_date.month - 1]} {start_date.year}"
+    elif start_date.month == 1 and end_date.month == 12 and start_date.year == end_date.year:
+        # Año completo
+        return f"Año {start_date.year}"
+    else:
+        # Rango personalizado
+        return f"{start_date.strftime('%d/%m/%Y')} - {end_date.strftime('%d/%m/%Y')}"
+
+
+def write_pdf_movement_rows(file, movements):
+    """
+    Escribe las filas de movimientos del PDF, ya formateadas, en un CSV temporal
+    que pdf_render lee por partes. Retorna la cantidad de filas.
+    """
+    writer = csv.writer(file)
+    count = 0
+    for movement in movements:
+        sign = "+" if movement.is_income else "-"
+        writer.writerow([
+            movement.date.strftime('%d/%m/%Y'),
+            movement.time.strftime('%H:%M'),
+            movement.type_label,
+            movement.category.replace('_', ' ').title()[:15],
+            f"{sign}S/ {movement.amount:,.2f}",
+        ])
+        count += 1
+    return count
+
+
+def pdf_payload(data, movements_path, movements_count):
+    """Datos del reporte formateados como texto para pdf_render (se envían a otro proceso)"""
+    summary = data['summary']
+    stats = data['statistics']
+
+    return {
+        'user_name': data['user']['name'],
+        'period_label': data['period']['label'],
+        'summary': [
+            ['Ingresos totales', f"S/ {summary['total_income']:,.2f}"],
+            ['Gastos totales', f"S/ {summary['total_expenses']:,.2f}"],
+            ['Balance (Neto)', f"S/ {summary['balance']:,.2f}"],
+            ['Tasa de ahorro', f"{summary['savings_rate']}%"],
+        ],
+        'categories': [
+            [cat['category'].replace('_', ' ').title(), f"S/ {cat['total']:,.2f}", f"{cat['percentage']}%"]
+            for cat in data['expenses_by_category']
+        ],
+        'movements_path': movements_path,
+        'movements_count': movements_count,
+        'statistics': [
+            ['Gasto promedio diario', f"S/ {stats['avg_daily_expense']:.2f}"],
+            ['Día con más gastos',
+             f"{stats['max_expense_day'].strftime('%d/%m/%Y')} (S/ {stats['max_expense_amount']:.2f})"
+             if stats['max_expense_day'] else "N/A"],
+            ['Categoría más frecuente',
+             f"{stats['most_frequent_category'].replace('_', ' ').title()} ({stats['most_frequent_count']} transacciones)"
+             if stats['most_frequent_category'] else "N/A"],
+            ['Total de transacciones', f"{stats['total_transactions']} movimientos"],
+        ],
+    }
+
+
+def write_pdf_report(output, report):
+    """
+    Escribe el reporte financiero en PDF en `output` (archivo binario) con el
+    listado completo de movimientos. Las filas pasan de la base de datos a un
+    CSV temporal (acumulando los datos del reporte en `report`, un
+    ReportDataBuilder) y de ahí, por partes, a la maquetación en el pool de procesos.
+    """
+    with tempfile.NamedTemporaryFile(
+        "w", suffix=".csv", prefix="moneymind-pdf-", newline="", encoding="utf-8", delete=False
+    ) as spool:
+        count = write_pdf_movement_rows(spool, report.rows())
+
+    try:
+        output.write(render_pdf(pdf_payload(report.build(), spool.name, count)))
+    finally:
+        os.remove(spool.name)
+
+
+def write_excel_report(output, report):
+    """
+    Escribe el Excel con ExcelReportWriter (openpyxl write_only): los movimientos
+    se escriben mientras se leen de la base de datos y el resumen, calculado en
+    la misma pasada por `report` (ReportDataBuilder), al final
+    """
+    writer = ExcelReportWriter()
+    writer.write_movements(report.rows())
+    writer.write_summary(report.build())
+    writer.save(output)
+
+
+def write_movements_file(output, user_id, start_date, end_date, file_format):
+    """Escribe los movimientos del período en CSV o NDJSON (UTF-8) en un archivo binario"""
+    movements = iter_period_movements(user_id, date_range_period(start_date, end_date))
+    for line in STREAM_WRITERS[file_format](movements):
+        output.write(line.encode("utf-8"))
+
+
+def render_report(output, user, start_date, end_date, file_format):
+    """Genera el archivo del exporte en `output` (archivo binario abierto)"""
+    if file_format in STREAM_WRITERS:
+        write_movements_file(output, user.id, start_date, end_date, file_format)
+        return
+
+    report = ReportDataBuilder(user, start_date, end_date)
+
+    if file_format == 'excel':
+        write_excel_report(output, report)
+    else:
+        write_pdf_report(output, report)
@@ -0,0 +1,58 @@
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from django.conf import settings
+from moneymind_apps.reports.utils import pdf_render
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_size = 0
+_lock = threading.Lock()
+
+
+def get_pdf_executor():
+    """
+    Pool de procesos de este worker (se crea al primer uso, después del fork de
+    gunicorn). Con contexto spawn los hijos no heredan conexiones ni hilos del
+    padre y solo importan pdf_render, sin Django.
+    """
+    global _executor, _executor_size
+
+    size = settings.PDF_RENDER_PROCESSES
+    with _lock:
+        if _executor is None or _executor_size != size:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            _executor = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+            _executor_size = size
+        return _executor
+
+
+def shutdown_pdf_executor(wait=True):
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=wait)
+            _executor = None
+
+
+def render_pdf(payload):
+    """
+    Renderiza el PDF en el pool de procesos: la maquetación de reportlab es CPU y
+    retiene el GIL, en un hilo del worker bloquearía a los demás requests.
+    Con PDF_RENDER_PROCESSES = 0 se renderiza en el mismo proceso.
+    """
+    if settings.PDF_RENDER_PROCESSES <= 0:
+        return pdf_render.render_pdf(payload)
+
+    try:
+        future = get_pdf_executor().submit(pdf_render.render_pdf, payload)
+        return future.result(timeout=settings.PDF_RENDER_TIMEOUT)
+    except BrokenProcessPool:
+        # Un hijo murió (OOM, kill): se descarta el pool y este PDF se hace aquí
+        logger.exception("Pool de PDF roto, se renderiza en el proceso del request")
+        shutdown_pdf_executor(wait=False)
+        return pdf_render.render_pdf(payload)
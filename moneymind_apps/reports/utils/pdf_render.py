@@ -0,0 +1,221 @@
+"""
+Maquetación del reporte financiero en PDF con reportlab.
+
+Este módulo no importa Django ni modelos: se ejecuta en los procesos del pool
+de `pdf_pool` (contexto spawn), que solo importan este archivo. Recibe el
+reporte ya formateado como tipos primitivos (ver `export_report.pdf_payload`);
+los movimientos llegan en un archivo CSV temporal que se lee por partes.
+"""
+import csv
+import io
+from itertools import islice
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.units import inch
+from reportlab.platypus import Flowable, SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.enums import TA_CENTER
+
+BRAND_COLOR = colors.HexColor('#1033d3')
+
+MOVEMENT_HEADERS = ['Fecha', 'Hora', 'Tipo', 'Categoría', 'Monto']
+MOVEMENT_COL_WIDTHS = [1 * inch, 0.7 * inch, 0.8 * inch, 2 * inch, 1.2 * inch]
+
+# Alto fijo de filas: reportlab no mide cada celda al partir la tabla entre páginas
+MOVEMENT_HEADER_HEIGHT = 24
+MOVEMENT_ROW_HEIGHT = 14
+
+# Filas por tabla: cada tabla se parte entre páginas repitiendo el encabezado y
+# solo una está en memoria a la vez (número par para alternar bien los colores)
+MOVEMENT_CHUNK_ROWS = 500
+
+MOVEMENT_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+])
+
+
+class MovementChunk(Flowable):
+    """
+    Marcador de `rows` filas del CSV a partir del byte `offset`. La LongTable se
+    arma recién cuando reportlab la maqueta (wrap/split, la API documentada para
+    flowables propios) y se suelta al partirla, así solo una tabla de
+    movimientos está en memoria a la vez aunque la lista tenga todos los marcadores.
+    """
+
+    def __init__(self, path, offset, rows):
+        super().__init__()
+        self.path = path
+        self.offset = offset
+        self.rows = rows
+        self._table = None
+
+    def _get_table(self):
+        if self._table is None:
+            with open(self.path, 'rb') as file:
+                file.seek(self.offset)
+                lines = (line.decode('utf-8') for line in islice(file, self.rows))
+                chunk = list(csv.reader(lines))
+
+            self._table = LongTable(
+                [MOVEMENT_HEADERS] + chunk,
+                colWidths=MOVEMENT_COL_WIDTHS,
+                rowHeights=[MOVEMENT_HEADER_HEIGHT] + [MOVEMENT_ROW_HEIGHT] * len(chunk),
+                repeatRows=1
+            )
+            self._table.setStyle(MOVEMENT_TABLE_STYLE)
+        return self._table
+
+    def wrap(self, availWidth, availHeight):
+        self.width, self.height = self._get_table().wrap(availWidth, availHeight)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        # Las partes reemplazan a este marcador en la lista de reportlab
+        parts = self._get_table().split(availWidth, availHeight)
+        self._table = None
+        return parts
+
+    def drawOn(self, canvas, x, y, _sW=0):
+        self._get_table().drawOn(canvas, x, y, _sW)
+        self._table = None
+
+
+def _movement_chunks(path, chunk_rows=MOVEMENT_CHUNK_ROWS):
+    """Un MovementChunk por cada `chunk_rows` filas del CSV (solo se leen los saltos de línea)"""
+    chunks = []
+    with open(path, 'rb') as file:
+        while True:
+            offset = file.tell()
+            rows = sum(1 for _ in islice(file, chunk_rows))
+            if not rows:
+                return chunks
+            chunks.append(MovementChunk(path, offset, rows))
+
+
+def render_pdf(payload):
+    """
+    Retorna los bytes del PDF. `payload` es un dict con:
+    user_name, period_label, summary [[concepto, monto]], categories
+    [[categoría, monto, %]], statistics [[métrica, valor]], todo como texto,
+    y movements_path: CSV con filas [fecha, hora, tipo, categoría, monto] en
+    orden, con movements_count filas.
+    """
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=letter,
+                            rightMargin=72, leftMargin=72,
+                            topMargin=72, bottomMargin=18)
+
+    # Container para los elementos
+    elements = []
+
+    # Estilos
+    styles = getSampleStyleSheet()
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=24,
+        textColor=BRAND_COLOR,
+        spaceAfter=30,
+        alignment=TA_CENTER
+    )
+
+    heading_style = ParagraphStyle(
+        'CustomHeading',
+        parent=styles['Heading2'],
+        fontSize=14,
+        textColor=BRAND_COLOR,
+        spaceAfter=12,
+        spaceBefore=12
+    )
+
+    # ============ TÍTULO Y ENCABEZADO ============
+    elements.append(Paragraph("REPORTE FINANCIERO", title_style))
+    elements.append(Paragraph(f"<b>Periodo:</b> {payload['period_label']}", styles['Normal']))
+    elements.append(Paragraph(f"<b>Usuario:</b> {payload['user_name']}", styles['Normal']))
+    elements.append(Spacer(1, 20))
+
+    # ============ RESUMEN EJECUTIVO ============
+    elements.append(Paragraph("Resumen de Cifras Clave", heading_style))
+
+    summary_table = Table([['Concepto', 'Monto']] + payload['summary'], colWidths=[3 * inch, 2 * inch])
+    summary_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    elements.append(summary_table)
+    elements.append(Spacer(1, 20))
+
+    # ============ GASTOS POR CATEGORÍA ============
+    elements.append(Paragraph("Gastos por Categoría", heading_style))
+
+    if payload['categories']:
+        category_table = Table(
+            [['Categoría', 'Monto', '% del Total']] + payload['categories'],
+            colWidths=[3 * inch, 1.5 * inch, 1.5 * inch]
+        )
+        category_table.setStyle(TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('FONTSIZE', (0, 0), (-1, 0), 11),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey])
+        ]))
+
+        elements.append(category_table)
+    else:
+        elements.append(Paragraph("No hay gastos registrados en este período.", styles['Normal']))
+
+    elements.append(PageBreak())
+
+    # ============ MOVIMIENTOS DETALLADOS ============
+    elements.append(Paragraph("Lista Detallada de Movimientos", heading_style))
+
+    # Las tablas de movimientos se arman durante el build, una a la vez
+    if payload['movements_count']:
+        elements.extend(_movement_chunks(payload['movements_path']))
+    else:
+        elements.append(Paragraph("No hay movimientos registrados en este período.", styles['Normal']))
+
+    elements.append(Spacer(1, 20))
+
+    # ============ ESTADÍSTICAS ADICIONALES ============
+    elements.append(Paragraph("Estadísticas Adicionales", heading_style))
+
+    stats_table = Table([['Métrica', 'Valor']] + payload['statistics'], colWidths=[2.5 * inch, 3.5 * inch])
+    stats_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), BRAND_COLOR),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (0, -1), 'LEFT'),
+        ('ALIGN', (1, 0), (1, -1), 'LEFT'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 11),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    elements.append(stats_table)
+
+    # Construir PDF
+    doc.build(elements)
+    return buffer.getvalue()
@@ -0,0 +1,58 @@
+import hashlib
+from datetime import date
+from functools import wraps
+from urllib.parse import urlencode
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+from moneymind_apps.monitoring.utils.metrics import inc_counter
+from moneymind_apps.users.utils.data_version import get_data_version
+
+REPORT_CACHE_ALIAS = "reports"
+
+
+def report_cache_key(endpoint, user_id, version, query_params):
+    """
+    Clave por endpoint, usuario, versión de datos, parámetros y fecha de hoy
+    (los reportes usan el mes/día actual cuando no se envían parámetros)
+    """
+    params = urlencode(sorted(
+        (name, value) for name, values in query_params.lists() for value in values
+    ))
+    params_hash = hashlib.sha1(params.encode()).hexdigest()
+    return f"report:{endpoint}:{user_id}:v{version}:{date.today().isoformat()}:{params_hash}"
+
+
+def cache_report_response(view_method):
+    """
+    Decorador para el `get` de las vistas de reportes que reciben `user_id` por
+    query param. Las respuestas 200 se guardan con la versión de datos del usuario
+    en la clave: cualquier escritura sube la versión y la siguiente petición
+    vuelve a calcular el reporte.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        user_id = request.query_params.get('user_id')
+        if not user_id or not user_id.isdigit():
+            return view_method(self, request, *args, **kwargs)
+
+        cache = caches[REPORT_CACHE_ALIAS]
+        key = report_cache_key(
+            type(self).__name__,
+            int(user_id),
+            get_data_version(int(user_id)),
+            request.query_params
+        )
+
+        data = cache.get(key)
+        inc_counter("moneymind_cache_requests_total", REPORT_CACHE_ALIAS, "miss" if data is None else "hit")
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK)
+
+        response = view_method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data)
+
+        return response
+
+    return wrapper
@@ -0,0 +1,49 @@
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.utils import timezone
+from moneymind_apps.reports.models import WeeklyTip
+from moneymind_apps.movements.utils.services.gemini_api import generate_weekly_tip
+from moneymind_apps.users.utils.data_version import bump_data_version
+
+User = get_user_model()
+
+TIP_LIFETIME = timedelta(days=7)
+DEFAULT_WEEKLY_TIP = "Revisa tus gastos semanalmente para mantener el control de tu presupuesto."
+
+
+def get_stored_weekly_tip(user_id):
+    """
+    Tip guardado del usuario (una sola consulta, sin llamar al modelo).
+    Retorna None si todavía no se generó ninguno.
+    """
+    return WeeklyTip.objects.filter(user_id=user_id).values_list("tip", flat=True).first()
+
+
+def users_needing_weekly_tip(expiring_within=timedelta(0), user_ids=None):
+    """
+    Ids de usuarios activos sin tip o cuyo tip vence dentro de `expiring_within`
+    """
+    threshold = timezone.now() - TIP_LIFETIME + expiring_within
+
+    users = User.objects.filter(is_active=True).filter(
+        Q(weeklytip__isnull=True) | Q(weeklytip__created_at__lt=threshold)
+    )
+    if user_ids:
+        users = users.filter(id__in=user_ids)
+
+    return list(users.order_by("id").values_list("id", flat=True).distinct())
+
+
+def refresh_weekly_tip(user_id):
+    """Genera un tip nuevo con Gemini y lo guarda (crea o reemplaza el del usuario)"""
+    tip = generate_weekly_tip(user_id)
+
+    updated = WeeklyTip.objects.filter(user_id=user_id).update(tip=tip, created_at=timezone.now())
+    if updated:
+        # .update() no dispara post_save
+        bump_data_version(user_id)
+    else:
+        WeeklyTip.objects.create(user_id=user_id, tip=tip)
+
+    return tip
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
-    name = 'moneymind_apps.users'
\ No newline at end of file
+    name = 'moneymind_apps.users'
+
+    def ready(self):
+        # Versión de datos por usuario para invalidar los reportes cacheados
+        from moneymind_apps.users import signals  # noqa: F401
@@ -0,0 +1,121 @@
+import random
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from moneymind_apps.movements.utils.rollups import rebuild_rollup_for_users
+from moneymind_apps.users.utils.seed_data import create_seed_users, seed_user_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Crea usuarios sintéticos con años de historial (gastos en las 16 categorías, ingresos, "
+        "cierres de mes, recordatorios y alertas) usando bulk_create por lotes. "
+        "Para pruebas de carga locales: no usar en producción."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--users",
+            type=int,
+            default=10,
+            help="Cantidad de usuarios a crear (default: 10)."
+        )
+        parser.add_argument(
+            "--years",
+            type=int,
+            default=2,
+            help="Años de historial por usuario (default: 2)."
+        )
+        parser.add_argument(
+            "--expenses-per-month",
+            type=int,
+            default=120,
+            help="Gastos promedio por usuario y mes (default: 120)."
+        )
+        parser.add_argument(
+            "--incomes-per-month",
+            type=int,
+            default=4,
+            help="Ingresos por usuario y mes (default: 4)."
+        )
+        parser.add_argument(
+            "--reminders",
+            type=int,
+            default=6,
+            help="Recordatorios de pago por usuario (default: 6)."
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Filas por bulk_create (default: 5000)."
+        )
+        parser.add_argument(
+            "--users-per-transaction",
+            type=int,
+            default=20,
+            help="Usuarios sembrados por transacción y por reconstrucción del acumulado (default: 20)."
+        )
+        parser.add_argument(
+            "--email-prefix",
+            default="seed",
+            help="Prefijo de los correos generados (<prefijo>-<n>@moneymind.test)."
+        )
+        parser.add_argument(
+            "--password",
+            default="moneymind123",
+            help="Contraseña de todos los usuarios creados."
+        )
+        parser.add_argument(
+            "--random-seed",
+            type=int,
+            default=None,
+            help="Semilla para generar siempre los mismos datos."
+        )
+
+    def handle(self, *args, **options):
+        if options["users"] < 1 or options["years"] < 1:
+            raise CommandError("--users y --years deben ser mayores a 0")
+
+        rng = random.Random(options["random_seed"])
+        batch_size = max(1, options["users_per_transaction"])
+        started = time.monotonic()
+
+        users = create_seed_users(
+            options["users"],
+            email_prefix=options["email_prefix"],
+            password=options["password"],
+            rng=rng
+        )
+        self.stdout.write(f"{len(users)} usuarios creados ({users[0].email} ... {users[-1].email})")
+
+        totals = {}
+        for start in range(0, len(users), batch_size):
+            batch = users[start:start + batch_size]
+
+            with transaction.atomic():
+                for user in batch:
+                    counts = seed_user_history(
+                        user,
+                        months=options["years"] * 12,
+                        expenses_per_month=options["expenses_per_month"],
+                        incomes_per_month=options["incomes_per_month"],
+                        reminders=options["reminders"],
+                        rng=random.Random(rng.random()),
+                        chunk_size=options["chunk_size"]
+                    )
+                    for table, count in counts.items():
+                        totals[table] = totals.get(table, 0) + count
+
+                rebuild_rollup_for_users([user.id for user in batch])
+
+            self.stdout.write(
+                f"Usuarios {start + 1}-{start + len(batch)} de {len(users)}: "
+                f"{totals['expenses']} gastos, {totals['incomes']} ingresos "
+                f"({time.monotonic() - started:.1f}s)"
+            )
+
+        summary = ", ".join(f"{count} {table}" for table, count in totals.items())
+        self.stdout.write(self.style.SUCCESS(
+            f"Datos sintéticos creados en {time.monotonic() - started:.1f}s: {summary}"
+        ))
@@ -56,3 +56,27 @@ class UserPreference(models.Model):
 
     def __str__(self):
         return f"{self.user.email} → {self.color}"
+
+
+class UserDataVersion(models.Model):
+    """
+    Contador que sube con cada escritura de datos financieros del usuario
+    (gastos, ingresos, balance, historial, tips, recordatorios).
+
+    Los reportes cacheados incluyen este número en la clave, así una escritura
+    invalida todas las respuestas anteriores sin borrar claves una por una.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="data_version"
+    )
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = "user_data_versions"
+
+    def __str__(self):
+        return f"{self.user_id} → v{self.version}"
@@ -0,0 +1,36 @@
+from django.contrib.auth import get_user_model
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete, post_save
+from moneymind_apps.alerts.models import RecurringPaymentReminder
+from moneymind_apps.balances.models import Balance, UserBalanceHistory
+from moneymind_apps.movements.models import Expense, Income
+from moneymind_apps.reports.models import WeeklyTip
+from moneymind_apps.users.utils.data_version import bump_data_version
+
+# Modelos cuyas escrituras cambian lo que muestran los reportes del usuario
+VERSIONED_MODELS = (
+    Expense,
+    Income,
+    Balance,
+    UserBalanceHistory,
+    WeeklyTip,
+    RecurringPaymentReminder,
+)
+
+
+def _bump_on_save(sender, instance, **kwargs):
+    bump_data_version(instance.user_id)
+
+
+def _bump_on_delete(sender, instance, origin=None, **kwargs):
+    # Al eliminar el usuario en cascada no hay nada que invalidar (origin es el
+    # usuario o, con QuerySet.delete(), el queryset de usuarios)
+    user_model = get_user_model()
+    if isinstance(origin, user_model) or (isinstance(origin, QuerySet) and origin.model is user_model):
+        return
+    bump_data_version(instance.user_id)
+
+
+for model in VERSIONED_MODELS:
+    post_save.connect(_bump_on_save, sender=model, dispatch_uid=f"data_version_save_{model.__name__}")
+    post_delete.connect(_bump_on_delete, sender=model, dispatch_uid=f"data_version_delete_{model.__name__}")
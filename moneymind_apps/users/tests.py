@@ -1,3 +1,111 @@
+import io
+from django.core.management import call_command
+from django.db.models import Sum
 from django.test import TestCase
+from moneymind.testing import SeededAPITestCase
+from moneymind_apps.alerts.models import Alert
+from moneymind_apps.movements.models import Category, Expense, MonthlyCategoryTotal
+from moneymind_apps.balances.models import Balance
+from moneymind_apps.users.models import User, UserDataVersion, UserPreference
 
-# Create your tests here.
+
+class UserEndpointsTests(SeededAPITestCase):
+    seed_months = 3
+
+    def test_register_creates_user_and_balance(self):
+        self.send_json("post", "/api/users/register/", {
+            "email": "nuevo@moneymind.pe",
+            "password": "moneymind123",
+            "first_name": "Luis",
+            "last_name": "Rojas",
+            "current_amount": "1500.00",
+            "monthly_income": "3000.00",
+        }, max_queries=8, expected_status=201)
+
+        user = User.objects.get(email="nuevo@moneymind.pe")
+        self.assertEqual(Balance.objects.get(user=user).current_amount, 1500)
+
+    def test_login_and_logout(self):
+        data = self.send_json("post", "/api/users/login/", {
+            "email": self.user.email,
+            "password": "moneymind123",
+        }, max_queries=5)
+        self.assertEqual(data["user"]["id"], self.user.id)
+
+        with self.assertMaxQueries(3):
+            response = self.client.post("/api/users/logout/", HTTP_AUTHORIZATION=f"Token {data['token']}")
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_rejects_wrong_password(self):
+        self.send_json("post", "/api/users/login/", {
+            "email": self.user.email,
+            "password": "incorrecta",
+        }, max_queries=2, expected_status=401)
+
+    def test_user_list_requires_authentication(self):
+        self.get_json("/api/users/list/", max_queries=0, expected_status=403)
+
+        self.client.force_login(self.user)
+        data = self.get_json("/api/users/list/", max_queries=3)
+        self.assertEqual(len(data), User.objects.count())
+
+    def test_update_profile(self):
+        data = self.send_json("patch", "/api/users/update-profile/", {
+            "user_id": self.user.id,
+            "first_name": "Ana María",
+            "monthly_income": "4200.00",
+        }, max_queries=8)
+
+        self.assertEqual(data["user"]["first_name"], "Ana María")
+        self.assertEqual(data["monthly_income"], 4200.0)
+
+    def test_deleting_users_in_bulk_leaves_no_data_version(self):
+        self.client.post("/api/movements/income/create/", {
+            "user_id": self.user.id, "title": "Venta", "date": "2025-05-01", "time": "10:00", "total": "10.00",
+        }, content_type="application/json")
+        self.assertTrue(UserDataVersion.objects.filter(user_id=self.user.id).exists())
+
+        User.objects.filter(id=self.user.id).delete()
+        self.assertFalse(UserDataVersion.objects.filter(user_id=self.user.id).exists())
+
+    def test_user_preferences_upsert(self):
+        url = f"/api/users/user-preferences/{self.user.id}/"
+        self.get_json(url, max_queries=1, expected_status=404)
+
+        self.send_json("post", url, {"color": "#ff0000"}, max_queries=4)
+        self.send_json("post", url, {"color": "#00ff00"}, max_queries=4)
+
+        data = self.get_json(url, max_queries=1)
+        self.assertEqual(data["color"], "#00ff00")
+        self.assertEqual(UserPreference.objects.filter(user=self.user).count(), 1)
+
+
+class SeedMoneymindCommandTests(TestCase):
+
+    def test_seed_creates_users_with_full_history(self):
+        call_command(
+            "seed_moneymind", "--users", "3", "--years", "1", "--expenses-per-month", "30",
+            "--random-seed", "7", stdout=io.StringIO()
+        )
+        users = User.objects.filter(email__startswith="seed-")
+        self.assertEqual(users.count(), 3)
+
+        for user in users:
+            categories = set(Expense.objects.filter(user=user).values_list("category", flat=True))
+            self.assertEqual(categories, {category.value for category in Category})
+            self.assertTrue(Balance.objects.filter(user=user).exists())
+            self.assertEqual(Alert.objects.filter(user=user).count(), 24)
+            self.assertAlmostEqual(
+                MonthlyCategoryTotal.objects.filter(user=user).aggregate(total=Sum("total"))["total"],
+                Expense.objects.filter(user=user).aggregate(total=Sum("total"))["total"],
+                places=2
+            )
+
+        # Una segunda corrida continúa la numeración de correos
+        call_command("seed_moneymind", "--users", "1", "--years", "1", stdout=io.StringIO())
+        self.assertTrue(User.objects.filter(email="seed-4@moneymind.test").exists())
+
+        # Con huecos en la numeración se continúa desde el mayor, sin repetir correos
+        User.objects.filter(email__in=["seed-1@moneymind.test", "seed-2@moneymind.test"]).delete()
+        call_command("seed_moneymind", "--users", "1", "--years", "1", stdout=io.StringIO())
+        self.assertTrue(User.objects.filter(email="seed-5@moneymind.test").exists())
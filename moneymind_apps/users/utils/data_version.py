@@ -0,0 +1,35 @@
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from moneymind_apps.users.models import UserDataVersion
+
+
+def get_data_version(user_id):
+    """Versión actual de los datos del usuario (0 si nunca se escribió nada)"""
+    version = UserDataVersion.objects.filter(user_id=user_id).values_list("version", flat=True).first()
+    return version or 0
+
+
+def bump_data_version(user_id):
+    """
+    Incrementa la versión de datos del usuario. Se ejecuta en la misma transacción
+    que la escritura, así la versión nueva se ve junto con los datos nuevos.
+    """
+    rows = UserDataVersion.objects.filter(user_id=user_id)
+
+    updated = rows.update(version=F("version") + 1, updated_at=timezone.now())
+    if updated:
+        return
+
+    try:
+        # Savepoint por si otra petición creó la fila en paralelo
+        with transaction.atomic():
+            UserDataVersion.objects.create(user_id=user_id, version=1)
+    except IntegrityError:
+        rows.update(version=F("version") + 1, updated_at=timezone.now())
+
+
+def bump_data_versions(user_ids):
+    """bump_data_version para varios usuarios (comandos y escrituras masivas)"""
+    for user_id in set(user_ids):
+        bump_data_version(user_id)
@@ -0,0 +1,100 @@
+import hashlib
+from datetime import date
+from functools import wraps
+from django.db import connection
+from django.db.models import Count, Max, Q
+from django.http import HttpResponseNotModified
+from django.utils.cache import parse_etags, patch_cache_control, quote_etag
+from rest_framework import status
+from moneymind_apps.alerts.models import Alert
+from moneymind_apps.monitoring.utils.metrics import inc_counter
+from moneymind_apps.users.utils.data_version import get_data_version
+
+
+def user_state_etag(endpoint, user_id, query_params):
+    """
+    ETag fuerte a partir del estado del usuario: versión de datos (movimientos,
+    balance, tips, recordatorios), un resumen de sus alertas y la fecha de hoy.
+    Cuesta dos consultas pequeñas en lugar de armar y serializar la respuesta.
+    """
+    alerts = Alert.objects.filter(user_id=user_id).aggregate(
+        total=Count('id'),
+        last_id=Max('id'),
+        unseen=Count('id', filter=Q(seen=False))
+    )
+    params = sorted((name, value) for name, values in query_params.lists() for value in values)
+
+    state = "|".join(str(part) for part in (
+        endpoint,
+        user_id,
+        get_data_version(user_id),
+        alerts['total'],
+        alerts['last_id'],
+        alerts['unseen'],
+        date.today().isoformat(),
+        params,
+    ))
+    return quote_etag(hashlib.sha1(state.encode()).hexdigest())
+
+
+class _WriteDetector:
+    """execute_wrapper que anota si la vista ejecutó algo distinto de un SELECT"""
+
+    def __init__(self):
+        self.wrote = False
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip()[:6].upper() == "SELECT":
+            self.wrote = True
+        return execute(sql, params, many, context)
+
+
+def user_id_from_query(request, *args, **kwargs):
+    return request.query_params.get('user_id')
+
+
+def user_id_from_url(request, *args, **kwargs):
+    return kwargs.get('user_id')
+
+
+def etag_on_user_state(get_user_id=user_id_from_query):
+    """
+    Decorador para el `get` de una APIView: si el If-None-Match del cliente
+    coincide con el estado actual del usuario responde 304 sin ejecutar la vista;
+    si no, agrega el ETag a la respuesta 200. Si la vista escribió (cierre de
+    mes, alertas de presupuesto) el ETag se recalcula después, para no entregar
+    uno que ya no corresponde al estado del usuario.
+    """
+    def decorator(view_method):
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            user_id = get_user_id(request, *args, **kwargs)
+            if user_id is None or not str(user_id).isdigit():
+                return view_method(self, request, *args, **kwargs)
+
+            etag = user_state_etag(type(self).__name__, int(user_id), request.query_params)
+
+            not_modified = etag in parse_etags(request.headers.get('If-None-Match', ''))
+            inc_counter("moneymind_cache_requests_total", "etag", "hit" if not_modified else "miss")
+
+            if not_modified:
+                response = HttpResponseNotModified()
+                response['ETag'] = etag
+                return response
+
+            writes = _WriteDetector()
+            with connection.execute_wrapper(writes):
+                response = view_method(self, request, *args, **kwargs)
+
+            if response.status_code == status.HTTP_200_OK:
+                if writes.wrote:
+                    etag = user_state_etag(type(self).__name__, int(user_id), request.query_params)
+                response['ETag'] = etag
+                # El navegador debe revalidar siempre (respuesta por usuario)
+                patch_cache_control(response, private=True, no_cache=True)
+
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,245 @@
+import calendar
+import random
+from datetime import date, time
+from decimal import Decimal
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from moneymind_apps.alerts.models import Alert, AlertType, RecurringPaymentReminder
+from moneymind_apps.balances.models import Balance, UserBalanceHistory
+from moneymind_apps.movements.models import Expense, Income, Category
+from moneymind_apps.movements.utils.periods import shift_month
+from moneymind_apps.reports.models import WeeklyTip
+
+User = get_user_model()
+
+# Rango de montos (S/) por categoría para que los reportes se parezcan a datos reales
+CATEGORY_AMOUNTS = {
+    Category.VIVIENDA: (400, 1800),
+    Category.SERVICIOS_BASICOS: (40, 250),
+    Category.ALIMENTACION: (8, 220),
+    Category.TRANSPORTE: (3, 90),
+    Category.SALUD: (15, 400),
+    Category.ENTRETENIMIENTO: (10, 180),
+    Category.STREAMING_SUSCRIPCIONES: (15, 60),
+    Category.MASCOTAS: (20, 200),
+    Category.CUIDADO_PERSONAL: (15, 250),
+    Category.DEUDAS_PRESTAMOS: (100, 900),
+    Category.AHORRO_INVERSION: (50, 1000),
+    Category.SEGUROS: (40, 300),
+    Category.EDUCACION_DESARROLLO: (30, 800),
+    Category.REGALOS_CELEBRACIONES: (20, 300),
+    Category.VIAJES_VACACIONES: (80, 1500),
+    Category.IMPREVISTOS: (20, 600),
+}
+
+# Peso relativo de cada categoría en la cantidad de gastos
+CATEGORY_WEIGHTS = {
+    Category.ALIMENTACION: 30,
+    Category.TRANSPORTE: 25,
+    Category.ENTRETENIMIENTO: 8,
+    Category.CUIDADO_PERSONAL: 6,
+    Category.SALUD: 5,
+    Category.SERVICIOS_BASICOS: 4,
+    Category.STREAMING_SUSCRIPCIONES: 3,
+    Category.MASCOTAS: 3,
+    Category.REGALOS_CELEBRACIONES: 3,
+    Category.IMPREVISTOS: 3,
+    Category.EDUCACION_DESARROLLO: 2,
+    Category.VIVIENDA: 1,
+    Category.DEUDAS_PRESTAMOS: 1,
+    Category.AHORRO_INVERSION: 1,
+    Category.SEGUROS: 1,
+    Category.VIAJES_VACACIONES: 1,
+}
+
+FIRST_NAMES = ["Ana", "Luis", "María", "José", "Rosa", "Carlos", "Lucía", "Jorge", "Carmen", "Diego"]
+LAST_NAMES = ["Quispe", "Flores", "Rojas", "Huamán", "García", "Mendoza", "Torres", "Vargas", "Castillo", "Ramos"]
+PLACES = ["Plaza Vea", "Tottus", "Metro", "Tambo", "Inkafarma", "Uber", "Cineplanet", "Sodimac", "Rappi", "Starbucks"]
+INCOME_TITLES = ["Sueldo", "Venta", "Intereses", "Devolución", "Transferencia"]
+REMINDER_NAMES = ["Netflix Premium", "Internet Movistar", "Luz del Sur", "Sedapal", "Gimnasio", "Seguro vehicular"]
+
+
+def bulk_create_in_chunks(model, objects, chunk_size=5000):
+    """
+    bulk_create sobre un iterable/generador sin materializarlo completo:
+    cada lote se inserta y se libera antes de generar el siguiente.
+    """
+    objects = iter(objects)
+    created = 0
+    while True:
+        chunk = list(islice(objects, chunk_size))
+        if not chunk:
+            return created
+        model.objects.bulk_create(chunk, batch_size=chunk_size)
+        created += len(chunk)
+
+
+def create_seed_users(count, email_prefix="seed", email_domain="moneymind.test",
+                      password="moneymind123", rng=None):
+    """
+    Crea `count` usuarios con un solo bulk_create. Los correos siguen el patrón
+    `<prefijo>-<n>@<dominio>` continuando desde el mayor `n` ya existente (no
+    desde la cantidad: puede haber huecos si se eliminaron usuarios), así que se
+    puede ejecutar varias veces. La contraseña se hashea una sola vez.
+    Retorna los usuarios creados ordenados por id.
+    """
+    rng = rng or random.Random()
+    existing = User.objects.filter(
+        email__startswith=f"{email_prefix}-", email__endswith=f"@{email_domain}"
+    ).values_list("email", flat=True)
+    suffixes = (email[len(email_prefix) + 1:-len(email_domain) - 1] for email in existing)
+    last = max((int(suffix) for suffix in suffixes if suffix.isdigit()), default=0)
+    password_hash = make_password(password)
+
+    emails = [f"{email_prefix}-{last + index}@{email_domain}" for index in range(1, count + 1)]
+    User.objects.bulk_create(
+        [
+            User(
+                username=email,
+                email=email,
+                password=password_hash,
+                first_name=rng.choice(FIRST_NAMES),
+                last_name=rng.choice(LAST_NAMES),
+            )
+            for email in emails
+        ],
+        batch_size=1000
+    )
+
+    # bulk_create no retorna ids en todos los motores
+    return list(User.objects.filter(email__in=emails).order_by("id"))
+
+
+def _history_months(months, today):
+    """(año, mes) de los últimos `months` meses, del más antiguo al actual"""
+    return [shift_month(today.year, today.month, -offset) for offset in range(months - 1, -1, -1)]
+
+
+def _month_days(year, month, today):
+    last_day = calendar.monthrange(year, month)[1]
+    if (year, month) == (today.year, today.month):
+        last_day = today.day
+    return last_day
+
+
+def _random_time(rng):
+    return time(rng.randrange(7, 23), rng.randrange(60))
+
+
+def _amount(rng, low, high):
+    return Decimal(rng.randrange(low * 100, high * 100)) / 100
+
+
+def _expenses(user_id, months, expenses_per_month, rng, today):
+    categories = list(CATEGORY_WEIGHTS)
+    weights = list(CATEGORY_WEIGHTS.values())
+
+    for year, month in months:
+        last_day = _month_days(year, month, today)
+        count = max(len(categories), int(expenses_per_month * rng.uniform(0.8, 1.2)))
+
+        # Al menos un gasto por categoría cada mes para cubrir las 16 en los reportes
+        month_categories = categories + rng.choices(categories, weights=weights, k=count - len(categories))
+
+        for category in month_categories:
+            low, high = CATEGORY_AMOUNTS[category]
+            yield Expense(
+                user_id=user_id,
+                category=category.value,
+                place=rng.choice(PLACES),
+                date=date(year, month, rng.randint(1, last_day)),
+                time=_random_time(rng),
+                total=_amount(rng, low, high),
+            )
+
+
+def _incomes(user_id, months, incomes_per_month, salary, rng, today):
+    for year, month in months:
+        last_day = _month_days(year, month, today)
+        for index in range(incomes_per_month):
+            is_salary = index == 0
+            yield Income(
+                user_id=user_id,
+                title="Sueldo" if is_salary else rng.choice(INCOME_TITLES[1:]),
+                date=date(year, month, min(last_day, 1 if is_salary else rng.randint(1, last_day))),
+                time=_random_time(rng),
+                total=salary if is_salary else _amount(rng, 20, 600),
+                is_recurring=is_salary,
+            )
+
+
+def seed_user_history(user, months=12, expenses_per_month=120, incomes_per_month=4,
+                      reminders=6, today=None, rng=None, chunk_size=5000):
+    """
+    Genera historial sintético para un usuario: gastos en las 16 categorías,
+    ingresos, balance, cierres de mes en UserBalanceHistory, recordatorios de
+    pago, alertas y tip semanal. Todo con bulk_create por lotes.
+
+    No actualiza el acumulado mensual: después de sembrar hay que llamar a
+    `rebuild_rollup_for_users`. Los bulk_create no disparan señales, pero el
+    update_or_create del Balance sí sube la versión de datos del usuario
+    (post_save en users/signals.py).
+    Retorna la cantidad de filas creadas por tabla.
+    """
+    today = today or date.today()
+    rng = rng or random.Random(user.id)
+    history = _history_months(months, today)
+    salary = _amount(rng, 2500, 9000)
+
+    counts = {
+        "expenses": bulk_create_in_chunks(
+            Expense, _expenses(user.id, history, expenses_per_month, rng, today), chunk_size
+        ),
+        "incomes": bulk_create_in_chunks(
+            Income, _incomes(user.id, history, incomes_per_month, salary, rng, today), chunk_size
+        ),
+    }
+
+    Balance.objects.update_or_create(
+        user=user,
+        defaults={"current_amount": _amount(rng, 500, 5000), "monthly_income": salary}
+    )
+
+    # Cierre de cada mes ya terminado
+    counts["balance_history"] = bulk_create_in_chunks(UserBalanceHistory, (
+        UserBalanceHistory(
+            user_id=user.id,
+            date=date(year, month, calendar.monthrange(year, month)[1]),
+            amount=_amount(rng, 200, 6000),
+        )
+        for year, month in history[:-1]
+    ), chunk_size)
+
+    counts["reminders"] = bulk_create_in_chunks(RecurringPaymentReminder, (
+        RecurringPaymentReminder(
+            user_id=user.id,
+            name=rng.choice(REMINDER_NAMES),
+            category=rng.choice([Category.STREAMING_SUSCRIPCIONES, Category.SERVICIOS_BASICOS, Category.SEGUROS]).value,
+            amount=_amount(rng, 20, 400),
+            payment_day=rng.randint(1, 28),
+            start_date=date(*history[0], 1),
+        )
+        for _ in range(reminders)
+    ), chunk_size)
+
+    # Una alerta de riesgo y una de recordatorio por mes (únicas por usuario/tipo/mes)
+    counts["alerts"] = bulk_create_in_chunks(Alert, (
+        Alert(
+            user_id=user.id,
+            alert_type=alert_type.value,
+            message=f"Alerta sintética de {alert_type.value} para {month}/{year}",
+            target_month=month,
+            target_year=year,
+            seen=(year, month) != history[-1],
+        )
+        for year, month in history
+        for alert_type in AlertType
+    ), chunk_size)
+
+    WeeklyTip.objects.update_or_create(
+        user=user,
+        defaults={"tip": "Planifica tus compras semanalmente para evitar gastos impulsivos."}
+    )
+
+    return counts